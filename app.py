@@ -4,15 +4,19 @@ Production-ready REST API with professional UI
 """
 from fastapi import FastAPI, HTTPException, UploadFile, File
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, FileResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, AsyncIterator
 import uvicorn
+import json
 import os
+import time
 from pathlib import Path
 
 from src.interfaces.rag_phi import BoseRAGPhi
+from src.interfaces.query_executor import QueryExecutor, QueueFullError
 from src.error_handling.logger import logger
+from config.settings import config
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -24,6 +28,12 @@ app = FastAPI(
 # Initialize RAG system
 rag: Optional[BoseRAGPhi] = None
 
+# Blocking RAG work runs here, never on the event loop
+executor = QueryExecutor(
+    max_concurrent=config.QUERY_WORKERS,
+    max_queue=config.QUERY_MAX_QUEUE
+)
+
 # Mount static files for UI
 static_dir = Path(__file__).parent / "static"
 if not static_dir.exists():
@@ -38,6 +48,12 @@ class QueryRequest(BaseModel):
     verbose: bool = False
 
 
+class BatchQueryRequest(BaseModel):
+    """Batch query request model"""
+    questions: List[str]
+    verbose: bool = False
+
+
 class QueryResponse(BaseModel):
     """Query response model"""
     status: str
@@ -72,6 +88,14 @@ async def startup_event():
         raise
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop worker pool and persist index state"""
+    executor.shutdown()
+    if rag:
+        rag.close()
+
+
 @app.get("/", response_class=HTMLResponse)
 async def root():
     """Serve the main UI"""
@@ -110,13 +134,111 @@ async def query_endpoint(request: QueryRequest):
         )
     
     try:
-        result = rag.answer_query(request.question, verbose=request.verbose)
+        # In-memory cache hits are answered inline; everything else goes through the queue
+        cached = rag.get_cached(request.question)
+        if cached is not None:
+            return cached
+        
+        result = await executor.run(rag.answer_query, request.question, verbose=request.verbose)
         return result
+    except QueueFullError as e:
+        logger.warning(f"Query rejected: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         logger.error(f"Query processing failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def format_sse(event: str, data: Dict) -> str:
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/api/query/stream")
+async def query_stream_endpoint(request: QueryRequest):
+    """
+    Process a technical question, streaming the answer as Server-Sent Events
+    
+    Events:
+        sources: retrieved sources (sent before generation starts)
+        token:   {"text": ...} answer fragment
+        done:    full result (same shape as /api/query)
+    """
+    if not rag:
+        raise HTTPException(status_code=503, detail="RAG system not initialized")
+    
+    if not rag.retriever:
+        raise HTTPException(
+            status_code=400, 
+            detail="No documents loaded. Please process documents first."
+        )
+    
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            async for event in executor.stream(rag.answer_query_stream, request.question, verbose=request.verbose):
+                yield format_sse(event['event'], event['data'])
+        except QueueFullError as e:
+            logger.warning(f"Streaming query rejected: {e}")
+            yield format_sse('done', {'status': 'error', 'query': request.question, 'answer': str(e),
+                                      'sources': [], 'error': str(e)})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/api/query/batch")
+async def query_batch_endpoint(request: BatchQueryRequest):
+    """
+    Process a set of questions, streaming each answer as Server-Sent Events once ready
+    
+    Retrieval is batched across the questions; generation runs with bounded
+    concurrency, so results arrive in completion order, not request order.
+    
+    Events:
+        result: {"index": i, "result": {...}} (result has the same shape as /api/query)
+        done:   {"count": n, "time": "..."}
+    """
+    if not rag:
+        raise HTTPException(status_code=503, detail="RAG system not initialized")
+    
+    if not rag.retriever:
+        raise HTTPException(
+            status_code=400, 
+            detail="No documents loaded. Please process documents first."
+        )
+    
+    if not request.questions:
+        raise HTTPException(status_code=400, detail="No questions given")
+    
+    if len(request.questions) > config.BATCH_MAX_QUESTIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many questions ({len(request.questions)} > {config.BATCH_MAX_QUESTIONS})"
+        )
+    
+    async def event_stream() -> AsyncIterator[str]:
+        start_time = time.time()
+        count = 0
+        try:
+            async for event in executor.stream(rag.answer_queries, request.questions, verbose=request.verbose):
+                count += 1
+                yield format_sse('result', event)
+        except QueueFullError as e:
+            logger.warning(f"Batch query rejected: {e}")
+            yield format_sse('done', {'status': 'error', 'count': count, 'error': str(e)})
+            return
+        yield format_sse('done', {'status': 'success', 'count': count, 'time': f"{time.time() - start_time:.2f}s"})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
@@ -127,12 +249,13 @@ async def health_check():
         "status": "healthy",
         "model": "phi-2",
         "documents_loaded": rag.retriever is not None,
-        "document_count": rag.vector_store.collection.count() if rag else 0
+        "document_count": rag.vector_store.collection.count() if rag else 0,
+        "executor": executor.get_stats()
     }
 
 
 @app.get("/api/info", response_model=SystemInfo)
-async def system_info():
+def system_info():
     """Get system information"""
     if not rag:
         raise HTTPException(status_code=503, detail="RAG system not initialized")
@@ -151,13 +274,15 @@ async def system_info():
 
 
 @app.get("/api/metrics")
-async def get_metrics():
+def get_metrics():
     """Get performance metrics (if enabled)"""
     if not rag:
         raise HTTPException(status_code=503, detail="RAG system not initialized")
     
     try:
-        return rag.get_metrics()
+        metrics = rag.get_metrics()
+        metrics['executor'] = executor.get_stats()
+        return metrics
     except Exception as e:
         logger.error(f"Failed to get metrics: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -191,7 +316,7 @@ async def clear_cache():
 
 
 @app.get("/api/enhancements")
-async def get_enhancements():
+def get_enhancements():
     """Get status of enhancement features"""
     if not rag:
         raise HTTPException(status_code=503, detail="RAG system not initialized")
@@ -236,7 +361,7 @@ async def test_confidence():
 
 
 @app.post("/api/process-documents")
-async def process_documents(pdf_paths: List[str]):
+def process_documents(pdf_paths: List[str]):
     """
     Process PDF documents
     
@@ -26,19 +26,63 @@ class Config:
     OLLAMA_TEMPERATURE = float(os.getenv("OLLAMA_TEMPERATURE", "0.7"))
     OLLAMA_NUM_THREADS = int(os.getenv("OLLAMA_NUM_THREADS", "4"))
     OLLAMA_NUM_GPU = int(os.getenv("OLLAMA_NUM_GPU", "0"))  # 0 = CPU only
+    OLLAMA_POOL_SIZE = int(os.getenv("OLLAMA_POOL_SIZE", "10"))  # Pooled keep-alive connections
+    OLLAMA_CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "2"))
+    OLLAMA_TAGS_CACHE_SECONDS = float(os.getenv("OLLAMA_TAGS_CACHE_SECONDS", "30"))  # /api/tags reuse
+    OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")  # Keep the model (and prompt KV cache) loaded
+    OLLAMA_WARM_PREFIXES = os.getenv("OLLAMA_WARM_PREFIXES", "false").lower() == "true"  # Evaluate template prefixes at startup
     
     # Processing Configuration
     CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "500"))
     CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "50"))
     TOP_K_RESULTS = int(os.getenv("TOP_K_RESULTS", "5"))
     
+    # Parallel Ingestion: parse PDFs (and page ranges of large PDFs) in a process pool
+    ENABLE_PARALLEL_INGESTION = os.getenv("ENABLE_PARALLEL_INGESTION", "false").lower() == "true"
+    INGESTION_WORKERS = int(os.getenv("INGESTION_WORKERS", "0"))  # 0 = os.cpu_count()
+    INGESTION_PAGES_PER_TASK = int(os.getenv("INGESTION_PAGES_PER_TASK", "20"))
+    
     # Embedding Configuration
     EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))  # Chunks per embed_documents call
+    VECTOR_DB_WRITE_BATCH_SIZE = int(os.getenv("VECTOR_DB_WRITE_BATCH_SIZE", "512"))  # Chunks per collection.add
+    # Embedding cache: model + text digest -> vector (memory LRU in front of a float32 file store)
+    ENABLE_EMBEDDING_CACHE = os.getenv("ENABLE_EMBEDDING_CACHE", "false").lower() == "true"
+    EMBEDDING_CACHE_DIR = DATA_DIR / "embedding_cache"
+    EMBEDDING_CACHE_MEMORY_SIZE = int(os.getenv("EMBEDDING_CACHE_MEMORY_SIZE", "10000"))
+    # Query embedding micro-batcher: concurrent queries are encoded together
+    ENABLE_EMBEDDING_BATCHER = os.getenv("ENABLE_EMBEDDING_BATCHER", "false").lower() == "true"
+    EMBEDDING_BATCHER_MAX_BATCH = int(os.getenv("EMBEDDING_BATCHER_MAX_BATCH", "32"))
+    EMBEDDING_BATCHER_MAX_WAIT_MS = float(os.getenv("EMBEDDING_BATCHER_MAX_WAIT_MS", "5"))
+    EMBEDDING_TIMEOUT = float(os.getenv("EMBEDDING_TIMEOUT", "30"))  # Seconds a query waits for its embedding
+    # Vector search backend: "chroma", or "mmap" (read-only dense index exported from
+    # Chroma after each ingest, memory-mapped and shared by all processes on the host)
+    VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma").lower()
+    DENSE_INDEX_DIR = DATA_DIR / "dense_index"
+    DENSE_INDEX_ANN_THRESHOLD = int(os.getenv("DENSE_INDEX_ANN_THRESHOLD", "50000"))  # Chunks before IVF partitioning
+    DENSE_INDEX_NPROBE = int(os.getenv("DENSE_INDEX_NPROBE", "16"))  # IVF lists scanned per query
+    DENSE_INDEX_QUANTIZATION = os.getenv("DENSE_INDEX_QUANTIZATION", "none").lower()  # "none" or "int8"
+    DENSE_INDEX_RERANK_FACTOR = int(os.getenv("DENSE_INDEX_RERANK_FACTOR", "4"))  # int8 candidates per result re-scored in float32
     
     # Generation Configuration
     MAX_TOKENS = int(os.getenv("MAX_TOKENS", "512"))
+    OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "1024"))  # Context window per request (prompt + answer)
+    # Context packing: prompt context filled to a token budget with the most relevant sentences / table rows
+    CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "450"))
+    CONTEXT_ANSWER_RESERVE = int(os.getenv("CONTEXT_ANSWER_RESERVE", "256"))  # num_ctx tokens kept free for the answer
+    CONTEXT_TOKENIZER = os.getenv("CONTEXT_TOKENIZER", "")  # HF tokenizer (e.g. microsoft/phi-2); empty = fast approximation
+    # Extractive fast path: spec lookups answered from a matching table cell / "key: value" line, else the LLM
+    ENABLE_EXTRACTIVE_ANSWERS = os.getenv("ENABLE_EXTRACTIVE_ANSWERS", "false").lower() == "true"
+    EXTRACTIVE_MIN_CONFIDENCE = float(os.getenv("EXTRACTIVE_MIN_CONFIDENCE", "0.85"))
     RESPONSE_TIMEOUT = int(os.getenv("RESPONSE_TIMEOUT", "60"))
     
+    # API Concurrency: blocking RAG work runs on a bounded worker pool
+    QUERY_WORKERS = int(os.getenv("QUERY_WORKERS", "4"))  # Concurrent RAG calls and LLM generations
+    QUERY_MAX_QUEUE = int(os.getenv("QUERY_MAX_QUEUE", "32"))  # Waiting calls before HTTP 503
+    ENABLE_REQUEST_COALESCING = os.getenv("ENABLE_REQUEST_COALESCING", "false").lower() == "true"  # Share identical in-flight queries
+    BATCH_MAX_QUESTIONS = int(os.getenv("BATCH_MAX_QUESTIONS", "100"))  # Questions per batch request
+    BATCH_GENERATION_CONCURRENCY = int(os.getenv("BATCH_GENERATION_CONCURRENCY", "2"))  # Concurrent generations per batch (within QUERY_WORKERS)
+    
     # Logging
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
     LOG_FILE = BASE_DIR / "rag_system.log"
@@ -47,11 +91,43 @@ class Config:
     # Hybrid Search: Combines vector search (semantic) with BM25 (keyword)
     ENABLE_HYBRID_SEARCH = os.getenv("ENABLE_HYBRID_SEARCH", "false").lower() == "true"
     HYBRID_SEARCH_ALPHA = float(os.getenv("HYBRID_SEARCH_ALPHA", "0.5"))  # 0.5 = equal weight
+    # BM25 snapshot: persisted index loaded at startup instead of re-tokenizing the collection
+    ENABLE_BM25_SNAPSHOT = os.getenv("ENABLE_BM25_SNAPSHOT", "false").lower() == "true"
+    BM25_SNAPSHOT_DIR = DATA_DIR / "bm25_index"
+    # Cross-encoder re-ranking of fused hybrid candidates (falls back to RRF order over budget)
+    ENABLE_RERANKER = os.getenv("ENABLE_RERANKER", "false").lower() == "true"
+    RERANKER_MODEL = os.getenv("RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+    RERANKER_BACKEND = os.getenv("RERANKER_BACKEND", "torch").lower()  # "torch", "onnx" or "openvino"
+    RERANKER_QUANTIZE = os.getenv("RERANKER_QUANTIZE", "false").lower() == "true"  # Dynamic int8 (torch backend)
+    RERANKER_CANDIDATES = int(os.getenv("RERANKER_CANDIDATES", "15"))  # Fused candidates scored per query
+    RERANKER_BUDGET_MS = float(os.getenv("RERANKER_BUDGET_MS", "300"))
+    RERANKER_BATCH_SIZE = int(os.getenv("RERANKER_BATCH_SIZE", "8"))
+    RERANKER_CACHE_SIZE = int(os.getenv("RERANKER_CACHE_SIZE", "5000"))  # Cached (query, chunk) scores
+    # Spec table store: normalized (product, attribute, value, unit, page) rows from ingested tables,
+    # answering spec lookups / product comparisons before retrieval
+    ENABLE_SPEC_STORE = os.getenv("ENABLE_SPEC_STORE", "false").lower() == "true"
+    SPEC_STORE_PATH = DATA_DIR / "spec_store" / "specs.sqlite3"
     
     # Query Caching: Cache results for repeated queries
     ENABLE_QUERY_CACHE = os.getenv("ENABLE_QUERY_CACHE", "false").lower() == "true"
     CACHE_MAX_SIZE = int(os.getenv("CACHE_MAX_SIZE", "100"))
     CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "3600"))  # 1 hour
+    # Semantic tier: serve paraphrased queries whose embeddings are this similar (cosine)
+    ENABLE_SEMANTIC_CACHE = os.getenv("ENABLE_SEMANTIC_CACHE", "false").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+    SEMANTIC_CACHE_NEAR_MARGIN = float(os.getenv("SEMANTIC_CACHE_NEAR_MARGIN", "0.05"))  # Near-hit reporting band
+    # Persistent tier: SQLite (WAL) answer store shared by REST/MCP processes and kept across restarts
+    ENABLE_PERSISTENT_CACHE = os.getenv("ENABLE_PERSISTENT_CACHE", "false").lower() == "true"
+    PERSISTENT_CACHE_PATH = DATA_DIR / "cache" / "answers.sqlite3"
+    PERSISTENT_CACHE_TTL_SECONDS = int(os.getenv("PERSISTENT_CACHE_TTL_SECONDS", "86400"))  # 1 day
+    PERSISTENT_CACHE_MAX_ENTRIES = int(os.getenv("PERSISTENT_CACHE_MAX_ENTRIES", "10000"))
+    PERSISTENT_CACHE_MAX_MB = int(os.getenv("PERSISTENT_CACHE_MAX_MB", "256"))
+    # Cache invalidation on ingestion: "collection" drops every answer when chunks are added;
+    # "source" only drops answers citing a re-ingested PDF (allows long TTLs across content updates)
+    CACHE_INVALIDATION = os.getenv("CACHE_INVALIDATION", "collection").lower()
+    # Retrieval cache: ranked chunk IDs + scores per (query, k, alpha, collection version)
+    ENABLE_RETRIEVAL_CACHE = os.getenv("ENABLE_RETRIEVAL_CACHE", "false").lower() == "true"
+    RETRIEVAL_CACHE_MAX_SIZE = int(os.getenv("RETRIEVAL_CACHE_MAX_SIZE", "1000"))
     
     # Confidence Scoring: Reliability indicators for answers
     ENABLE_CONFIDENCE_SCORING = os.getenv("ENABLE_CONFIDENCE_SCORING", "false").lower() == "true"
@@ -3,8 +3,10 @@ MCP (Model Context Protocol) Server for Bose RAG System
 A simple FastAPI-based MCP server that exposes RAG functionality as MCP tools
 """
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, AsyncIterator
+import json
 import sys
 from pathlib import Path
 
@@ -12,7 +14,9 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.interfaces.rag_phi import BoseRAGPhi
+from src.interfaces.query_executor import QueryExecutor, QueueFullError
 from src.error_handling.logger import logger
+from config.settings import config
 
 # Initialize MCP FastAPI app (separate from main app)
 mcp_app = FastAPI(
@@ -24,6 +28,12 @@ mcp_app = FastAPI(
 # Initialize RAG system
 rag_system: Optional[BoseRAGPhi] = None
 
+# Blocking RAG work runs here, never on the event loop
+executor = QueryExecutor(
+    max_concurrent=config.QUERY_WORKERS,
+    max_queue=config.QUERY_MAX_QUEUE
+)
+
 
 class MCPToolRequest(BaseModel):
     """MCP Tool Request - standard MCP format"""
@@ -55,6 +65,14 @@ async def startup_event():
         raise
 
 
+@mcp_app.on_event("shutdown")
+async def shutdown_event():
+    """Stop worker pool and persist index state"""
+    executor.shutdown()
+    if rag_system:
+        rag_system.close()
+
+
 @mcp_app.get("/")
 async def root():
     """MCP Server info"""
@@ -94,6 +112,26 @@ async def list_tools():
                 "required": ["question"]
             }
         },
+        {
+            "name": "query_bose_documentation_batch",
+            "description": "Answer several questions about Bose Professional Audio equipment in one call. Retrieval is shared across the questions, so this is faster than calling query_bose_documentation repeatedly.",
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "questions": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": f"Technical questions (at most {config.BATCH_MAX_QUESTIONS})"
+                    },
+                    "verbose": {
+                        "type": "boolean",
+                        "description": "Include intermediate steps and source documents in response",
+                        "default": False
+                    }
+                },
+                "required": ["questions"]
+            }
+        },
         {
             "name": "get_system_metrics",
             "description": "Get performance metrics and statistics from the RAG system including query latency, cache hit rate, and confidence scores.",
@@ -135,6 +173,8 @@ async def call_tool(request: MCPToolRequest):
         # Route to appropriate tool handler
         if tool_name == "query_bose_documentation":
             return await handle_query_tool(arguments)
+        elif tool_name == "query_bose_documentation_batch":
+            return await handle_batch_query_tool(arguments)
         elif tool_name == "get_system_metrics":
             return await handle_metrics_tool(arguments)
         elif tool_name == "clear_cache":
@@ -153,6 +193,92 @@ async def call_tool(request: MCPToolRequest):
         )
 
 
+@mcp_app.post("/mcp/tools/call/stream")
+async def call_tool_stream(request: MCPToolRequest):
+    """
+    Call a query tool with streamed results (Server-Sent Events)
+    
+    query_bose_documentation emits 'sources', 'token' and a final 'done'
+    event whose data is the same MCPToolResponse that /mcp/tools/call
+    would return.
+    
+    query_bose_documentation_batch emits one 'result' event per question
+    as soon as it is answered ({"index": i, "response": MCPToolResponse}),
+    then 'done'.
+    """
+    if not rag_system:
+        raise HTTPException(status_code=503, detail="RAG system not initialized")
+    
+    if request.name == "query_bose_documentation_batch":
+        questions = batch_questions(request.arguments)
+        return StreamingResponse(
+            batch_event_stream(questions, request.arguments.get("verbose", False)),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache"}
+        )
+    
+    if request.name != "query_bose_documentation":
+        raise HTTPException(status_code=400, detail=f"Tool '{request.name}' does not support streaming")
+    
+    question = request.arguments.get("question")
+    verbose = request.arguments.get("verbose", False)
+    
+    if not question:
+        raise HTTPException(status_code=400, detail="Missing required argument: question")
+    
+    logger.info(f"MCP streaming tool call: {request.name} with args: {request.arguments}")
+    
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            async for event in executor.stream(rag_system.answer_query_stream, question, verbose=verbose):
+                data = event['data']
+                if event['event'] == 'done':
+                    data = format_query_result(data).dict()
+                yield f"event: {event['event']}\ndata: {json.dumps(data)}\n\n"
+        except QueueFullError as e:
+            logger.warning(f"Streaming tool call rejected: {e}")
+            data = MCPToolResponse(content=[{"type": "text", "text": str(e)}], isError=True).dict()
+            yield f"event: done\ndata: {json.dumps(data)}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+
+def batch_questions(arguments: Dict[str, Any]) -> List[str]:
+    """Validated question list of a query_bose_documentation_batch call"""
+    questions = arguments.get("questions")
+    
+    if not questions or not isinstance(questions, list):
+        raise HTTPException(status_code=400, detail="Missing required argument: questions")
+    
+    if len(questions) > config.BATCH_MAX_QUESTIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many questions ({len(questions)} > {config.BATCH_MAX_QUESTIONS})"
+        )
+    
+    return [str(question) for question in questions]
+
+
+async def batch_event_stream(questions: List[str], verbose: bool = False) -> AsyncIterator[str]:
+    """SSE events for a streamed query_bose_documentation_batch call"""
+    logger.info(f"MCP streaming batch tool call: {len(questions)} questions")
+    
+    try:
+        async for event in executor.stream(rag_system.answer_queries, questions, verbose=verbose):
+            data = {'index': event['index'], 'response': format_query_result(event['result']).dict()}
+            yield f"event: result\ndata: {json.dumps(data)}\n\n"
+    except QueueFullError as e:
+        logger.warning(f"Streaming batch tool call rejected: {e}")
+        data = MCPToolResponse(content=[{"type": "text", "text": str(e)}], isError=True).dict()
+        yield f"event: done\ndata: {json.dumps(data)}\n\n"
+        return
+    yield f"event: done\ndata: {json.dumps({'count': len(questions)})}\n\n"
+
+
 async def handle_query_tool(arguments: Dict[str, Any]) -> MCPToolResponse:
     """Handle query_bose_documentation tool"""
     question = arguments.get("question")
@@ -161,10 +287,36 @@ async def handle_query_tool(arguments: Dict[str, Any]) -> MCPToolResponse:
     if not question:
         raise HTTPException(status_code=400, detail="Missing required argument: question")
     
-    # Execute RAG query
-    result = rag_system.answer_query(question, verbose=verbose)
+    # Execute RAG query (in-memory cache hits inline, everything else on the worker pool)
+    result = rag_system.get_cached(question)
+    if result is None:
+        result = await executor.run(rag_system.answer_query, question, verbose=verbose)
+    
+    return format_query_result(result)
+
+
+async def handle_batch_query_tool(arguments: Dict[str, Any]) -> MCPToolResponse:
+    """Handle query_bose_documentation_batch tool (answers in question order)"""
+    questions = batch_questions(arguments)
+    verbose = arguments.get("verbose", False)
+    
+    results: Dict[int, Dict[str, Any]] = {}
+    async for event in executor.stream(rag_system.answer_queries, questions, verbose=verbose):
+        results[event['index']] = event['result']
     
-    # Format as MCP response
+    content = []
+    for i, question in enumerate(questions):
+        content.append({
+            "type": "text",
+            "text": ("\n\n" if i else "") + f"### Question {i + 1}: {question}\n\n"
+        })
+        content.extend(format_query_result(results[i]).content)
+    
+    return MCPToolResponse(content=content, isError=False)
+
+
+def format_query_result(result: Dict[str, Any]) -> MCPToolResponse:
+    """Format an answer_query result as an MCP tool response"""
     content = []
     
     # Main answer
@@ -223,8 +375,10 @@ async def handle_metrics_tool(arguments: Dict[str, Any]) -> MCPToolResponse:
         )
     
     summary = metrics.get('summary', {})
+    executor_stats = executor.get_stats()
     overview = summary.get('overview', {})
     cache = summary.get('cache', {})
+    coalescing = summary.get('coalescing', {})
     latency = summary.get('latency', {})
     
     metrics_text = f"""**System Metrics**
@@ -243,6 +397,12 @@ async def handle_metrics_tool(arguments: Dict[str, Any]) -> MCPToolResponse:
 - Hit Rate: {cache.get('hit_rate', 0):.1f}%
 - Hits: {cache.get('hits', 0)}
 - Misses: {cache.get('misses', 0)}
+
+**Concurrency:**
+- Running: {executor_stats['active']}/{executor_stats['max_concurrent']}
+- Queue Depth: {executor_stats['queue_depth']} (max {executor_stats['max_queue']})
+- Rejected: {executor_stats['rejected']}
+- Coalesced (identical in-flight): {coalescing.get('coalesced_requests', 0)}
 """
     
     return MCPToolResponse(
@@ -274,6 +434,7 @@ if __name__ == "__main__":
     print("  GET  /              - Server info")
     print("  GET  /mcp/tools     - List available tools")
     print("  POST /mcp/tools/call - Call a tool")
+    print("  POST /mcp/tools/call/stream - Call query tool with streamed answer (SSE)")
     print("=" * 70)
     
     uvicorn.run(mcp_app, host="0.0.0.0", port=8001, log_level="info")
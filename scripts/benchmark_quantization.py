@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Recall@k of the quantized dense index against exact float32 search
+
+Exports the current collection to temporary dense indexes (float32 and
+int8 at several re-rank factors) and compares their top-k results with
+brute-force float32 search, for sample questions and stored chunks.
+"""
+import sys
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+# Add project to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.vector_store.chromadb_manager import EnhancedChromaDB
+from src.vector_store.mmap_index import MmapVectorIndex, build_index
+from config.settings import config
+
+
+SAMPLE_QUESTIONS = [
+    "What is the maximum input level of the EX-1280C?",
+    "How many channels does the ControlSpace EX-1280C have?",
+    "What is the frequency response of the DesignMax DM8SE?",
+    "How do I install the DM6PE ceiling loudspeaker?",
+    "What is the power consumption of the PowerMatch PM8500?",
+    "What is the impedance of the FreeSpace FS2SE?",
+    "How do I reset the ControlSpace processor to factory defaults?",
+    "What is the net weight of the DM8SE?",
+]
+
+
+def recall_at_k(reference: List[List[str]], candidate: List[List[str]], k: int) -> float:
+    """Mean fraction of the reference top-k found in the candidate top-k"""
+    hits = [len(set(ref[:k]) & set(cand[:k])) / len(ref[:k]) for ref, cand in zip(reference, candidate) if ref]
+    return float(np.mean(hits)) if hits else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sample", type=int, default=200, help="Stored chunks used as extra queries")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 5, 10], help="Cut-offs to report")
+    parser.add_argument("--rerank", type=int, nargs="+", default=[1, 2, 4, 8], help="int8 re-rank factors")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("Dense Index Quantization Benchmark")
+    print("=" * 80)
+
+    vector_store = EnhancedChromaDB()
+    count = vector_store.collection.count()
+    print(f"\nTotal documents: {count}")
+    if count == 0:
+        print("\nWARNING: Database is empty!")
+        print("Run demo.py to process documents first.")
+        return
+
+    max_k = max(args.k)
+    version_key = vector_store.version.key
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Reference: exact float32 (never IVF-partitioned)
+        build_index(vector_store.collection, Path(tmp_dir) / "exact", version_key, ann_threshold=count + 1)
+        exact = MmapVectorIndex(Path(tmp_dir) / "exact")
+
+        rng = np.random.default_rng(0)
+        sample_rows = rng.choice(count, min(args.sample, count), replace=False)
+        queries = vector_store.embed_queries(SAMPLE_QUESTIONS) + [exact.vectors[row].tolist() for row in sample_rows]
+        print(f"Queries: {len(SAMPLE_QUESTIONS)} sample questions + {len(sample_rows)} stored chunks")
+
+        reference = exact.query(queries, max_k)['ids']
+
+        variants = [("float32", "none", 1)] + [(f"int8 rerank x{factor}", "int8", factor) for factor in args.rerank]
+        built = {}
+
+        print("\n" + "-" * 80)
+        header = f"{'Index':<20}{'bytes/vec':>10}{'disk/vec':>10}" + "".join(f"{'R@' + str(k):>8}" for k in args.k) + f"{'ms/query':>10}"
+        print(header)
+        print("-" * 80)
+
+        for label, quantization, factor in variants:
+            if quantization not in built:
+                path = Path(tmp_dir) / quantization
+                build_index(vector_store.collection, path, version_key,
+                            ann_threshold=config.DENSE_INDEX_ANN_THRESHOLD, quantization=quantization)
+                built[quantization] = path
+            index = MmapVectorIndex(built[quantization], n_probe=config.DENSE_INDEX_NPROBE, rerank_factor=factor)
+
+            start = time.time()
+            results = index.query(queries, max_k)['ids']
+            elapsed_ms = (time.time() - start) / len(queries) * 1000
+
+            stats = index.memory_stats()
+            row = f"{label:<20}{stats['scan_bytes_per_vector']:>10}{stats['disk_bytes_per_vector']:>10}"
+            row += "".join(f"{recall_at_k(reference, results, k):>8.3f}" for k in args.k)
+            print(row + f"{elapsed_ms:>10.2f}")
+
+        print("-" * 80)
+        print("Reference: brute-force float32 search over the same collection")
+
+
+if __name__ == "__main__":
+    main()
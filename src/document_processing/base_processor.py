@@ -2,7 +2,7 @@
 Base processor class
 """
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional, Tuple
 from langchain_core.documents import Document
 from config.settings import config
 
@@ -15,6 +15,12 @@ class BaseProcessor(ABC):
         self.chunk_overlap = config.CHUNK_OVERLAP
     
     @abstractmethod
-    def process(self, pdf_path: str) -> List[Document]:
-        """Process PDF document"""
+    def process(self, pdf_path: str, pages: Optional[Tuple[int, int]] = None) -> List[Document]:
+        """
+        Process PDF document
+        
+        Args:
+            pdf_path: Path to PDF
+            pages: Optional (first, last) 1-based inclusive page range; None = all pages
+        """
         pass
@@ -1,7 +1,7 @@
 """
 Image processor - OCR
 """
-from typing import List
+from typing import List, Optional, Tuple
 import pytesseract
 from pdf2image import convert_from_path
 from langchain_core.documents import Document
@@ -12,16 +12,20 @@ from src.error_handling.logger import logger
 class ImageProcessor(BaseProcessor):
     """Process image content with OCR"""
     
-    def process(self, pdf_path: str) -> List[Document]:
-        """Extract text from images in PDF"""
+    def process(self, pdf_path: str, pages: Optional[Tuple[int, int]] = None) -> List[Document]:
+        """Extract text from images in PDF (or a page range of it)"""
         
         try:
             logger.info(f"Processing images (OCR): {pdf_path}")
             
-            images = convert_from_path(pdf_path)
+            if pages:
+                images = convert_from_path(pdf_path, first_page=pages[0], last_page=pages[1])
+            else:
+                images = convert_from_path(pdf_path)
+            first_idx = pages[0] - 1 if pages else 0
             chunks = []
             
-            for page_idx, image in enumerate(images):
+            for page_idx, image in enumerate(images, first_idx):
                 try:
                     text = pytesseract.image_to_string(image)
                     
@@ -0,0 +1,196 @@
+"""
+Parallel ingestion pipeline
+Fans PDFs (and page ranges of large PDFs) out across a process pool and
+streams extracted chunks into a single embedding/writer stage
+"""
+from typing import List, Dict, Optional, Set, Tuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import os
+import time
+
+import PyPDF2
+from langchain_core.documents import Document
+
+from src.retrieval.spec_store import pop_spec_rows
+from src.error_handling.logger import logger
+from config.settings import config
+
+
+# Per-process router (created once by the pool initializer)
+_worker_router = None
+
+
+def _init_worker():
+    """Create the processing router once per worker process"""
+    global _worker_router
+    from src.document_processing.router import ProcessingRouter
+    _worker_router = ProcessingRouter()
+
+
+def _process_task(pdf_path: str, pages: Optional[Tuple[int, int]]) -> List[Document]:
+    """Worker entry point: parse one PDF or page range"""
+    return _worker_router.process_pdf(pdf_path, pages)
+
+
+def plan_tasks(pdf_paths: List[str], pages_per_task: int) -> List[Tuple[str, Optional[Tuple[int, int]]]]:
+    """
+    Split PDFs into (pdf_path, page_range) tasks
+
+    PDFs longer than pages_per_task are split into consecutive ranges;
+    shorter PDFs (or ones whose page count cannot be read) are one task.
+    """
+    tasks = []
+    for pdf_path in pdf_paths:
+        try:
+            with open(pdf_path, 'rb') as f:
+                total_pages = len(PyPDF2.PdfReader(f).pages)
+        except Exception as e:
+            logger.warning(f"Could not count pages of {pdf_path}, processing as one task: {str(e)}")
+            total_pages = 0
+
+        if pages_per_task <= 0 or total_pages <= pages_per_task:
+            tasks.append((pdf_path, None))
+            continue
+
+        for first in range(1, total_pages + 1, pages_per_task):
+            tasks.append((pdf_path, (first, min(first + pages_per_task - 1, total_pages))))
+
+    return tasks
+
+
+class ParallelIngestionPipeline:
+    """
+    Process-pool ingestion
+
+    Stages:
+    - Parse (N worker processes): PyPDF text, camelot tables, Tesseract OCR
+    - Embed + write (main process): chunks are buffered as tasks complete
+      and flushed through EnhancedChromaDB.add_documents in batches, so
+      embedding overlaps with parsing of the remaining PDFs; table spec
+      rows go to the spec table store in the same flush
+    """
+
+    def __init__(
+        self,
+        vector_store,
+        max_workers: Optional[int] = None,
+        pages_per_task: Optional[int] = None,
+        write_batch_size: Optional[int] = None,
+        spec_store=None
+    ):
+        """
+        Initialize pipeline
+
+        Args:
+            vector_store: EnhancedChromaDB used by the writer stage
+            max_workers: Parser processes (default: config.INGESTION_WORKERS)
+            pages_per_task: Split PDFs longer than this (default: config.INGESTION_PAGES_PER_TASK)
+            write_batch_size: Chunks buffered per writer flush (default: config.VECTOR_DB_WRITE_BATCH_SIZE)
+            spec_store: Optional SpecTableStore receiving rows of extracted tables
+        """
+        self.vector_store = vector_store
+        self.max_workers = max_workers or config.INGESTION_WORKERS or os.cpu_count() or 1
+        self.pages_per_task = pages_per_task if pages_per_task is not None else config.INGESTION_PAGES_PER_TASK
+        self.write_batch_size = write_batch_size or config.VECTOR_DB_WRITE_BATCH_SIZE
+        self.spec_store = spec_store
+
+    def run(self, pdf_paths: List[str]) -> Dict:
+        """
+        Ingest PDFs in parallel
+
+        Args:
+            pdf_paths: PDF file paths
+
+        Returns:
+            Dict with per-document counts, new chunk IDs/documents, IDs of
+            outdated chunks removed from re-ingested files and throughput
+        """
+        start_time = time.time()
+        tasks = plan_tasks(pdf_paths, self.pages_per_task)
+        logger.info(
+            f"Parallel ingestion: {len(pdf_paths)} PDF(s) -> {len(tasks)} task(s) "
+            f"on {self.max_workers} worker(s)"
+        )
+
+        failed_paths = set()
+        chunk_counts: Dict[str, int] = {path: 0 for path in pdf_paths}
+        buffer: List[Document] = []
+        added_ids: List[str] = []
+        added_chunks: List[Document] = []
+        current_ids: Dict[str, Set[str]] = {}
+        total_chunks = 0
+        skipped = 0
+
+        def flush():
+            nonlocal skipped
+            if not buffer:
+                return
+            spec_rows = pop_spec_rows(buffer)
+            if self.spec_store:
+                self.spec_store.add_rows(spec_rows)
+            stats = self.vector_store.add_documents(list(buffer))
+            added_ids.extend(stats['ids'])
+            by_id = self._by_id(buffer)
+            added_chunks.extend(by_id[doc_id] for doc_id in stats['ids'])
+            for doc_id, chunk in by_id.items():
+                current_ids.setdefault(chunk.metadata.get('source', ''), set()).add(doc_id)
+            skipped += stats.get('chunks_skipped', 0)
+            buffer.clear()
+
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker) as executor:
+            futures = {
+                executor.submit(_process_task, pdf_path, pages): (pdf_path, pages)
+                for pdf_path, pages in tasks
+            }
+
+            for future in as_completed(futures):
+                pdf_path, pages = futures[future]
+                try:
+                    chunks = future.result()
+                except Exception as e:
+                    failed_paths.add(pdf_path)
+                    logger.error(f"ERROR: Failed to process {pdf_path} (pages {pages}): {str(e)}")
+                    continue
+
+                chunk_counts[pdf_path] += len(chunks)
+                total_chunks += len(chunks)
+                buffer.extend(chunks)
+
+                if len(buffer) >= self.write_batch_size:
+                    flush()
+
+            flush()
+
+        # Chunks of an earlier version of a re-ingested file are dropped, but
+        # only for files whose every page range was processed
+        removed_ids = self.vector_store.remove_stale_chunks({
+            source: ids for source, ids in current_ids.items() if source not in failed_paths
+        })
+
+        elapsed = time.time() - start_time
+        logger.info(
+            f"Parallel ingestion finished in {elapsed:.2f}s: {total_chunks} chunks "
+            f"({total_chunks / elapsed if elapsed > 0 else 0.0:.1f} chunks/s end-to-end)"
+        )
+
+        return {
+            'documents_processed': len([path for path in pdf_paths if path not in failed_paths]),
+            'documents_failed': len(failed_paths),
+            'failed_paths': sorted(failed_paths),
+            'chunk_counts': chunk_counts,
+            'total_chunks': total_chunks,
+            'chunks_added': len(added_ids),
+            'chunks_skipped': skipped,
+            'ids': added_ids,
+            'documents': added_chunks,
+            'removed_ids': removed_ids,
+            'elapsed_seconds': round(elapsed, 3),
+            'chunks_per_second': round(total_chunks / elapsed, 1) if elapsed > 0 else 0.0
+        }
+
+    @staticmethod
+    def _by_id(chunks: List[Document]) -> Dict[str, Document]:
+        """Chunks keyed by their vector store ID"""
+        # Imported here so worker processes don't load chromadb/embeddings
+        from src.vector_store.chromadb_manager import chunk_id
+        return {chunk_id(chunk): chunk for chunk in chunks}
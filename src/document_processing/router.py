@@ -1,7 +1,7 @@
 """
 Route documents to appropriate processors
 """
-from typing import List
+from typing import List, Optional, Tuple
 from langchain_core.documents import Document
 from src.content_detection.detector import ContentDetector
 from .text_processor import TextProcessor
@@ -20,8 +20,14 @@ class ProcessingRouter:
         self.table_processor = TableProcessor()
         self.image_processor = ImageProcessor()
     
-    def process_pdf(self, pdf_path: str) -> List[Document]:
-        """Process PDF based on content type"""
+    def process_pdf(self, pdf_path: str, pages: Optional[Tuple[int, int]] = None) -> List[Document]:
+        """
+        Process PDF based on content type
+        
+        Args:
+            pdf_path: Path to PDF
+            pages: Optional (first, last) 1-based inclusive page range; None = all pages
+        """
         
         try:
             # Detect content type
@@ -32,19 +38,19 @@ class ProcessingRouter:
             
             # Route to processor
             if content_type == ContentType.TABLE:
-                return self.table_processor.process(pdf_path)
+                return self.table_processor.process(pdf_path, pages)
             elif content_type == ContentType.IMAGE:
-                return self.image_processor.process(pdf_path)
+                return self.image_processor.process(pdf_path, pages)
             elif content_type == ContentType.MIXED:
                 # Process with all processors
-                text_chunks = self.text_processor.process(pdf_path)
-                table_chunks = self.table_processor.process(pdf_path)
-                image_chunks = self.image_processor.process(pdf_path)
+                text_chunks = self.text_processor.process(pdf_path, pages)
+                table_chunks = self.table_processor.process(pdf_path, pages)
+                image_chunks = self.image_processor.process(pdf_path, pages)
                 return text_chunks + table_chunks + image_chunks
             else:
-                return self.text_processor.process(pdf_path)
+                return self.text_processor.process(pdf_path, pages)
         
         except Exception as e:
             logger.error(f"Routing failed for {pdf_path}: {str(e)}")
             # Fallback to text processing
-            return self.text_processor.process(pdf_path)
+            return self.text_processor.process(pdf_path, pages)
@@ -1,38 +1,55 @@
 """
 Table processor - structured extraction
 """
-from typing import List
+from typing import Dict, List, Optional, Tuple
 import camelot
 from langchain_core.documents import Document
 from .base_processor import BaseProcessor
+from src.retrieval.spec_store import SPEC_ROWS_KEY, spec_rows_from_table
 from src.error_handling.logger import logger
 
 
 class TableProcessor(BaseProcessor):
     """Process table content"""
     
-    def process(self, pdf_path: str) -> List[Document]:
-        """Extract tables from PDF"""
+    def process(self, pdf_path: str, pages: Optional[Tuple[int, int]] = None) -> List[Document]:
+        """Extract tables from PDF (or a page range of it)"""
         
         try:
             logger.info(f"Extracting tables: {pdf_path}")
             
-            tables = camelot.read_pdf(pdf_path, pages='all')
+            page_spec = f"{pages[0]}-{pages[1]}" if pages else 'all'
+            tables = camelot.read_pdf(pdf_path, pages=page_spec)
             chunks = []
+            per_page: Dict[Optional[int], int] = {}
             
             for table_idx, table in enumerate(tables):
                 content = table.df.to_string()
+                page = self._table_page(table)
+                # Position on the page: the same whichever page range the table was read with
+                index_on_page = per_page.get(page, 0)
+                per_page[page] = index_on_page + 1
                 
                 doc = Document(
                     page_content=content,
                     metadata={
                         'source': pdf_path,
-                        'page': table_idx + 1,
+                        'page': page if page is not None else table_idx + 1,
                         'content_type': 'TABLE',
-                        'chunk_id': table_idx,
+                        'chunk_id': index_on_page,
                         'processor': 'TableProcessor'
                     }
                 )
+                
+                # Normalized rows for the spec table store (taken off before vector storage)
+                spec_rows = spec_rows_from_table(
+                    table.df.values.tolist(),
+                    pdf_path,
+                    page,
+                    index_on_page
+                )
+                if spec_rows:
+                    doc.metadata[SPEC_ROWS_KEY] = spec_rows
                 chunks.append(doc)
             
             logger.info(f"Extracted {len(chunks)} tables")
@@ -41,3 +58,11 @@ class TableProcessor(BaseProcessor):
         except Exception as e:
             logger.error(f"Table processing failed: {str(e)}")
             return []
+    
+    @staticmethod
+    def _table_page(table) -> Optional[int]:
+        """1-based PDF page of a camelot table"""
+        try:
+            return int(table.page)
+        except (AttributeError, TypeError, ValueError):
+            return None
@@ -1,8 +1,8 @@
 """
 Text processor - standard chunking
 """
-from typing import List
-from langchain_community.document_loaders import PyPDFLoader
+from typing import Dict, List, Optional, Tuple
+import pypdf
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 from .base_processor import BaseProcessor
@@ -12,14 +12,13 @@ from src.error_handling.logger import logger
 class TextProcessor(BaseProcessor):
     """Process text content"""
     
-    def process(self, pdf_path: str) -> List[Document]:
-        """Process entire PDF as text"""
+    def process(self, pdf_path: str, pages: Optional[Tuple[int, int]] = None) -> List[Document]:
+        """Process PDF (or a page range of it) as text"""
         
         try:
-            logger.info(f"Processing text: {pdf_path}")
+            logger.info(f"Processing text: {pdf_path}" + (f" (pages {pages[0]}-{pages[1]})" if pages else ""))
             
-            loader = PyPDFLoader(pdf_path)
-            documents = loader.load()
+            documents = self._load_pages(pdf_path, pages)
             
             splitter = RecursiveCharacterTextSplitter(
                 chunk_size=self.chunk_size,
@@ -27,11 +26,14 @@ class TextProcessor(BaseProcessor):
             )
             chunks = splitter.split_documents(documents)
             
-            # Add metadata
-            for i, chunk in enumerate(chunks):
+            # Add metadata; chunk_id counts within the page, so it does not depend on the page range
+            per_page: Dict[int, int] = {}
+            for chunk in chunks:
+                page = chunk.metadata.get('page', 0)
                 chunk.metadata['content_type'] = 'TEXT'
-                chunk.metadata['chunk_id'] = i
+                chunk.metadata['chunk_id'] = per_page.get(page, 0)
                 chunk.metadata['processor'] = 'TextProcessor'
+                per_page[page] = chunk.metadata['chunk_id'] + 1
             
             logger.info(f"Extracted {len(chunks)} text chunks")
             return chunks
@@ -39,3 +41,22 @@ class TextProcessor(BaseProcessor):
         except Exception as e:
             logger.error(f"Text processing failed: {str(e)}")
             raise
+    
+    def _load_pages(self, pdf_path: str, pages: Optional[Tuple[int, int]] = None) -> List[Document]:
+        """
+        Extract the requested pages (all when pages is None)
+
+        Whole-file and page-range ingest share this pypdf extraction (the same
+        one PyPDFLoader uses, 0-based 'page' metadata), so both produce the
+        same text and therefore the same content-digest chunk IDs.
+        """
+        documents = []
+        with open(pdf_path, 'rb') as f:
+            reader = pypdf.PdfReader(f)
+            first, last = (pages[0] - 1, min(pages[1], len(reader.pages))) if pages else (0, len(reader.pages))
+            for page_idx in range(first, last):
+                documents.append(Document(
+                    page_content=reader.pages[page_idx].extract_text() or "",
+                    metadata={'source': pdf_path, 'page': page_idx}
+                ))
+        return documents
@@ -2,13 +2,46 @@
 Confidence scoring for RAG responses
 Provides reliability indicators to users
 """
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, FrozenSet, List, Optional, Sequence, Tuple
+from collections import OrderedDict
+import hashlib
 import re
+import threading
 
 from langchain_core.documents import Document
 from src.error_handling.logger import logger
 
 
+# Patterns are compiled once at import, not per answer
+_ANSWER_TERM_PATTERN = re.compile(r'\b\w{4,}\b')
+_CHUNK_TERM_PATTERN = re.compile(r'\w+')
+_MODEL_PATTERN = re.compile(r'[A-Z]{2,}\d+|[A-Z]+-\d+')
+_TECH_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    r'\d+\s*(hz|khz|mhz|ghz)',  # Frequency
+    r'\d+\s*(db|dba|dbc)',       # Decibels
+    r'\d+\s*(ohm|Ω)',            # Impedance
+    r'\d+\s*(watt|w|kw)',        # Power
+    r'\d+\s*(volt|v|mv)',        # Voltage
+    r'\d+\s*(amp|a|ma)',         # Current
+    r'\d+\s*(meter|m|cm|mm|feet|ft|inch|in)',  # Distance
+    r'\d+\s*(channel|ch)',       # Channels
+    r'\d+\s*(bit|kbps|mbps)',   # Data rate
+))
+
+# Very common words ignored when checking grounding
+_COMMON_WORDS = frozenset({
+    'that', 'this', 'with', 'from', 'have', 'been', 'were',
+    'their', 'there', 'which', 'would', 'could', 'should',
+    'about', 'when', 'what', 'where', 'your', 'does', 'only'
+})
+_SEVERE_PHRASES = ("i don't know", "i cannot find", "no information available",
+                   "not mentioned in", "insufficient information")
+_MILD_PHRASES = ("may be", "might be", "possibly", "perhaps", "could be")
+
+# (query, answer, docs, retrieval_scores) for calculate_confidence_batch
+ScoringItem = Tuple[str, str, List[Document], Optional[List[float]]]
+
+
 class ConfidenceScorer:
     """
     Calculate confidence scores for RAG answers
@@ -19,6 +52,9 @@ class ConfidenceScorer:
     3. Technical specificity (numbers, units, models)
     4. Uncertainty indicators in answer
     
+    Patterns are precompiled and retrieved chunks are tokenized once into
+    term sets (cached by chunk ID), so grounding is a set intersection.
+    
     Score ranges:
     - 0.85-1.0: High confidence (reliable answer)
     - 0.70-0.85: Medium confidence (good but verify)
@@ -26,14 +62,18 @@ class ConfidenceScorer:
     - 0.0-0.50: Very low confidence (unreliable, insufficient info)
     """
     
-    def __init__(self, enable_scoring: bool = True):
+    def __init__(self, enable_scoring: bool = True, chunk_cache_size: int = 4096):
         """
         Initialize confidence scorer
         
         Args:
             enable_scoring: If False, always returns neutral confidence
+            chunk_cache_size: Retrieved chunks whose term sets are kept (by chunk ID)
         """
         self.enable_scoring = enable_scoring
+        self.chunk_cache_size = chunk_cache_size
+        self._chunk_terms: OrderedDict[str, Tuple[FrozenSet[str], str]] = OrderedDict()
+        self._lock = threading.Lock()
         
         if enable_scoring:
             logger.info("Confidence scorer initialized")
@@ -60,16 +100,62 @@ class ConfidenceScorer:
             Dict with overall score, breakdown, and explanation
         """
         if not self.enable_scoring:
-            return {
-                'overall': 0.75,
-                'label': 'medium',
-                'enabled': False
-            }
+            return self._neutral()
+        chunks = [self._chunk_terms_for(doc) for doc in retrieved_docs]
+        return self._score(answer, retrieved_docs, retrieval_scores, chunks)
+    
+    def calculate_confidence_batch(self, items: Sequence[ScoringItem]) -> List[Dict[str, Any]]:
+        """
+        Score many answers at once
+        
+        The union of retrieved chunks is tokenized up front, once per
+        distinct chunk, and every item is scored against those shared term
+        sets; items retrieving the same top-k (or overlapping ones) do not
+        re-tokenize, and batches larger than the chunk cache do not evict
+        their own chunks.
+        
+        Args:
+            items: (query, answer, retrieved_docs, retrieval_scores) tuples
+        
+        Returns:
+            calculate_confidence result per item, in order
+        """
+        if not self.enable_scoring:
+            return [self._neutral() for _ in items]
         
+        item_keys = [[self._chunk_key(doc) for doc in docs] for _, _, docs, _ in items]
+        chunk_terms: Dict[str, Tuple[FrozenSet[str], str]] = {}
+        for (_, _, docs, _), keys in zip(items, item_keys):
+            for doc, key in zip(docs, keys):
+                if key not in chunk_terms:
+                    chunk_terms[key] = self._chunk_terms_for(doc, key)
+        
+        return [
+            self._score(answer, docs, retrieval_scores, [chunk_terms[key] for key in keys])
+            for (_, answer, docs, retrieval_scores), keys in zip(items, item_keys)
+        ]
+    
+    @staticmethod
+    def _neutral() -> Dict[str, Any]:
+        """Result when scoring is disabled"""
+        return {
+            'overall': 0.75,
+            'label': 'medium',
+            'enabled': False
+        }
+    
+    def _score(
+        self,
+        answer: str,
+        retrieved_docs: List[Document],
+        retrieval_scores: Optional[List[float]],
+        chunks: List[Tuple[FrozenSet[str], str]]
+    ) -> Dict[str, Any]:
+        """Combine the component scores (chunks: _chunk_terms_for of retrieved_docs)"""
         # Component scores (0-1)
         scores = {
             'retrieval': self._score_retrieval(retrieved_docs, retrieval_scores),
-            'grounding': self._score_answer_grounding(answer, retrieved_docs),
+            'grounding': self._score_answer_grounding(answer, chunks),
             'specificity': self._score_specificity(answer),
             'uncertainty': self._score_uncertainty(answer)
         }
@@ -97,6 +183,34 @@ class ConfidenceScorer:
             'enabled': True
         }
     
+    @staticmethod
+    def _chunk_key(doc: Document) -> str:
+        """Chunk ID, or a digest of the text for chunks without one"""
+        return doc.metadata.get('doc_id') or hashlib.sha1(doc.page_content.encode('utf-8')).hexdigest()
+    
+    def _chunk_terms_for(self, doc: Document, key: Optional[str] = None) -> Tuple[FrozenSet[str], str]:
+        """
+        Term set of a chunk and its terms joined by newlines, cached by chunk ID
+        
+        Answer terms are word characters only, so a substring of the chunk
+        text is always a substring of one of its terms: searching the
+        joined vocabulary gives the same result as the full text.
+        """
+        key = key or self._chunk_key(doc)
+        with self._lock:
+            entry = self._chunk_terms.get(key)
+            if entry is not None:
+                self._chunk_terms.move_to_end(key)
+                return entry
+        
+        terms = frozenset(_CHUNK_TERM_PATTERN.findall(doc.page_content.lower()))
+        entry = (terms, "\n".join(terms))
+        with self._lock:
+            self._chunk_terms[key] = entry
+            while len(self._chunk_terms) > self.chunk_cache_size:
+                self._chunk_terms.popitem(last=False)
+        return entry
+    
     def _score_retrieval(
         self, 
         docs: List[Document], 
@@ -130,31 +244,35 @@ class ConfidenceScorer:
         else:
             return 0.80  # One source can still be definitive
     
-    def _score_answer_grounding(self, answer: str, docs: List[Document]) -> float:
+    def _score_answer_grounding(self, answer: str, chunks: List[Tuple[FrozenSet[str], str]]) -> float:
         """
         Score how well the answer is grounded in retrieved documents
         High score = answer content appears in source docs
+        
+        Args:
+            answer: Generated answer
+            chunks: Term sets of the retrieved chunks (_chunk_terms_for)
         """
-        if not docs or not answer:
+        if not chunks or not answer:
             return 0.5
         
         # Extract meaningful terms from answer (4+ chars, not common words)
-        answer_lower = answer.lower()
-        answer_terms = set(re.findall(r'\b\w{4,}\b', answer_lower))
-        
-        # Remove very common words
-        common_words = {'that', 'this', 'with', 'from', 'have', 'been', 'were', 
-                       'their', 'there', 'which', 'would', 'could', 'should', 
-                       'about', 'when', 'what', 'where', 'your', 'does', 'only'}
-        answer_terms = answer_terms - common_words
+        answer_terms = set(_ANSWER_TERM_PATTERN.findall(answer.lower())) - _COMMON_WORDS
         
         if not answer_terms:
             return 0.7  # Answer too short to judge, assume reasonable
         
-        # Count how many answer terms appear in source documents
-        doc_text = ' '.join([doc.page_content.lower() for doc in docs])
+        # Count how many answer terms appear in source documents: whole-word
+        # matches by set intersection, then substring matches ("watt" in
+        # "watts") for the few terms left over
+        unmatched = answer_terms.difference(*(terms for terms, _ in chunks))
+        if unmatched:
+            unmatched = {
+                term for term in unmatched
+                if not any(term in vocabulary for _, vocabulary in chunks)
+            }
         
-        matched_terms = sum(1 for term in answer_terms if term in doc_text)
+        matched_terms = len(answer_terms) - len(unmatched)
         match_ratio = matched_terms / len(answer_terms)
         
         # High grounding = high confidence
@@ -178,20 +296,8 @@ class ConfidenceScorer:
         score = 0.5  # Base score
         
         # Technical specifications with units
-        tech_patterns = [
-            r'\d+\s*(hz|khz|mhz|ghz)',  # Frequency
-            r'\d+\s*(db|dba|dbc)',       # Decibels
-            r'\d+\s*(ohm|Ω)',            # Impedance
-            r'\d+\s*(watt|w|kw)',        # Power
-            r'\d+\s*(volt|v|mv)',        # Voltage
-            r'\d+\s*(amp|a|ma)',         # Current
-            r'\d+\s*(meter|m|cm|mm|feet|ft|inch|in)',  # Distance
-            r'\d+\s*(channel|ch)',       # Channels
-            r'\d+\s*(bit|kbps|mbps)',   # Data rate
-        ]
-        
-        spec_count = sum(1 for pattern in tech_patterns 
-                        if re.search(pattern, answer.lower()))
+        answer_lower = answer.lower()
+        spec_count = sum(1 for pattern in _TECH_PATTERNS if pattern.search(answer_lower))
         
         # More specs = higher confidence (technical details suggest grounded answer)
         if spec_count >= 3:
@@ -202,7 +308,7 @@ class ConfidenceScorer:
             score = 0.85
         else:
             # Check for model numbers or specific product names
-            has_model = bool(re.search(r'[A-Z]{2,}\d+|[A-Z]+-\d+', answer))
+            has_model = bool(_MODEL_PATTERN.search(answer))
             if has_model:
                 score = 0.80
         
@@ -213,15 +319,12 @@ class ConfidenceScorer:
         answer_lower = answer.lower()
         
         # Severe uncertainty (definite lack of knowledge)
-        severe_phrases = ["i don't know", "i cannot find", "no information available", 
-                         "not mentioned in", "insufficient information"]
-        has_severe = any(phrase in answer_lower for phrase in severe_phrases)
+        has_severe = any(phrase in answer_lower for phrase in _SEVERE_PHRASES)
         if has_severe:
             return 0.3  # Low confidence if admitting lack of knowledge
         
         # Mild hedging (being cautious, not necessarily uncertain)
-        mild_phrases = ["may be", "might be", "possibly", "perhaps", "could be"]
-        mild_count = sum(1 for phrase in mild_phrases if phrase in answer_lower)
+        mild_count = sum(1 for phrase in _MILD_PHRASES if phrase in answer_lower)
         
         if mild_count == 0:
             return 1.0  # No hedging = full confidence
@@ -0,0 +1,203 @@
+"""
+Token-budgeted context packing
+Fills a fixed prompt-token budget with the most query-relevant sentences
+and table rows across all retrieved chunks, instead of fixed-size
+prefixes of the first few chunks
+"""
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import math
+import re
+
+from langchain_core.documents import Document
+from src.error_handling.logger import logger
+
+
+# BPE-ish pieces: words, digit runs, single punctuation marks
+_PIECE_PATTERN = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+_TERM_PATTERN = re.compile(r"[a-z0-9]+(?:[-.][a-z0-9]+)*")
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?;])\s+(?=[A-Z0-9(\"'])|\n{2,}")
+# Flattened table rows (DataFrame.to_string, pipes, tabs): several columns on one line
+_TABLE_ROW = re.compile(r"\S(\s{2,}|\t|\s*\|\s*)\S.*(\s{2,}|\t|\s*\|\s*)\S")
+_VALUE_PATTERN = re.compile(r"\d")
+
+# Units sharing no query term are only taken from this many top-ranked chunks
+# (semantic matches without lexical overlap); elsewhere they are filler
+UNMATCHED_CHUNKS = 2
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it its of on or the this to what "
+    "when where which who why with you your".split()
+)
+
+
+def approximate_tokens(text: str) -> int:
+    """Token count estimate for BPE tokenizers (errs slightly high on long words)"""
+    return sum(1 + (len(piece) - 1) // 5 for piece in _PIECE_PATTERN.findall(text))
+
+
+def load_token_counter(tokenizer_name: Optional[str]) -> Callable[[str], int]:
+    """
+    Token counter for a Hugging Face tokenizer, or the approximation
+
+    Args:
+        tokenizer_name: e.g. "microsoft/phi-2"; empty/None uses approximate_tokens
+    """
+    if not tokenizer_name:
+        return approximate_tokens
+    try:
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+        logger.info(f"Context packer using tokenizer: {tokenizer_name}")
+        return lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+    except Exception as e:
+        logger.warning(f"Tokenizer '{tokenizer_name}' unavailable, approximating token counts: {str(e)}")
+        return approximate_tokens
+
+
+def _terms(text: str) -> List[str]:
+    return [term for term in _TERM_PATTERN.findall(text.lower()) if term not in _STOPWORDS]
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+class ContextPacker:
+    """
+    Select context units for a prompt within a token budget
+
+    Chunks are split into units (table rows, sentences). Units are scored
+    by IDF-weighted overlap with the query plus a prior from the chunk's
+    retrieval rank, de-duplicated (chunk overlap repeats text), and added
+    greedily while they fit. Selected units are emitted per source in
+    their original order.
+    """
+
+    def __init__(self, count_tokens: Callable[[str], int] = approximate_tokens, rank_weight: float = 0.3):
+        """
+        Initialize packer
+
+        Args:
+            count_tokens: Token counter (see load_token_counter)
+            rank_weight: Weight of the retrieval-rank prior vs query overlap
+        """
+        self.count_tokens = count_tokens
+        self.rank_weight = rank_weight
+
+    @staticmethod
+    def split_units(doc: Document) -> List[str]:
+        """Table rows for table chunks/lines, sentences otherwise"""
+        units = []
+        is_table = str(doc.metadata.get('content_type', '')).upper() == 'TABLE'
+        for block in doc.page_content.split("\n"):
+            block = block.strip()
+            if not block:
+                continue
+            if is_table or _TABLE_ROW.search(block):
+                units.append(" ".join(block.split()))
+            else:
+                units.extend(part.strip() for part in _SENTENCE_SPLIT.split(block) if part.strip())
+        return units
+
+    def pack(self, query: str, docs: List[Document], token_budget: int) -> Tuple[str, int]:
+        """
+        Build the context block
+
+        Args:
+            query: User query
+            docs: Retrieved documents, best first
+            token_budget: Maximum tokens for the returned context
+
+        Returns:
+            (context text, its token count)
+        """
+        query_terms = set(_terms(query))
+        candidates: List[Dict] = []
+        for rank, doc in enumerate(docs):
+            for position, unit in enumerate(self.split_units(doc)):
+                candidates.append({
+                    'rank': rank,
+                    'position': position,
+                    'text': unit,
+                    'normalized': _normalize(unit),
+                    'terms': set(_terms(unit))
+                })
+        if not candidates:
+            return "", 0
+
+        # IDF over units: terms found everywhere carry little signal
+        document_frequency: Dict[str, int] = {}
+        for candidate in candidates:
+            for term in candidate['terms'] & query_terms:
+                document_frequency[term] = document_frequency.get(term, 0) + 1
+        idf = {term: math.log(1 + len(candidates) / (1 + count)) for term, count in document_frequency.items()}
+        max_overlap = sum(idf.get(term, 0.0) for term in query_terms) or 1.0
+
+        candidates = [
+            c for c in candidates
+            if c['rank'] < UNMATCHED_CHUNKS or c['terms'] & query_terms
+        ]
+        if not candidates:
+            return "", 0
+        for candidate in candidates:
+            overlap = sum(idf[term] for term in candidate['terms'] & query_terms) / max_overlap
+            prior = 1.0 / (1 + candidate['rank'])
+            # Spec answers live in units with values; give them a small edge when relevant
+            value_bonus = 0.1 if overlap and _VALUE_PATTERN.search(candidate['text']) else 0.0
+            candidate['score'] = (1 - self.rank_weight) * overlap + self.rank_weight * prior + value_bonus
+            candidate['tokens'] = self.count_tokens(candidate['text'])
+
+        headers = {rank: self._header(rank, doc) for rank, doc in enumerate(docs)}
+        header_tokens = {rank: self.count_tokens(header) + 2 for rank, header in headers.items()}
+
+        selected: List[Dict] = []
+        seen: Set[str] = set()
+        used = 0
+        opened: Set[int] = set()
+        for candidate in sorted(candidates, key=lambda c: (-c['score'], c['rank'], c['position'])):
+            normalized = candidate['normalized']
+            if normalized in seen or any(normalized in other['normalized'] for other in selected):
+                continue
+            cost = candidate['tokens'] + (0 if candidate['rank'] in opened else header_tokens[candidate['rank']])
+            if used + cost > token_budget:
+                continue
+            selected.append(candidate)
+            seen.add(normalized)
+            opened.add(candidate['rank'])
+            used += cost
+
+        if not selected:
+            # Budget smaller than any unit: truncate the best one
+            best = max(candidates, key=lambda c: c['score'])
+            text = self._truncate(best['text'], max(1, token_budget - header_tokens[best['rank']]))
+            context = f"{headers[best['rank']]}\n{text}"
+            return context, self.count_tokens(context)
+
+        parts = []
+        for rank in sorted(opened):
+            units = sorted((c for c in selected if c['rank'] == rank), key=lambda c: c['position'])
+            parts.append(headers[rank] + "\n" + "\n".join(c['text'] for c in units))
+        context = "\n\n".join(parts)
+
+        logger.debug(
+            f"Packed {len(selected)}/{len(candidates)} units from {len(opened)}/{len(docs)} chunks "
+            f"({used}/{token_budget} tokens)"
+        )
+        return context, used
+
+    @staticmethod
+    def _header(rank: int, doc: Document) -> str:
+        source = doc.metadata.get('source', 'Unknown')
+        page = doc.metadata.get('page', '?')
+        return f"[Source {rank + 1}] {source} (Page {page})"
+
+    def _truncate(self, text: str, token_budget: int) -> str:
+        words = text.split()
+        low, high = 0, len(words)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.count_tokens(" ".join(words[:middle])) <= token_budget:
+                low = middle
+            else:
+                high = middle - 1
+        return " ".join(words[:low])
@@ -0,0 +1,209 @@
+"""
+Extractive answers for specification lookups
+Answers "what is the <attribute> (in <unit>) of <product>" questions
+directly from table cells and "key: value" lines of the retrieved chunks,
+so confident spec lookups skip LLM generation
+"""
+from typing import Dict, List, Optional, Set, Tuple
+import os
+import re
+
+from langchain_core.documents import Document
+from src.error_handling.logger import logger
+
+
+# Unit classes: query pattern (unit or attribute word) -> pattern a value must contain
+UNIT_CLASSES = {
+    'dBu': (r"\bdbu\b", r"dBu\b"),
+    'dB': (r"\b(db|spl|snr|sensitivity|dynamic range|crosstalk)\b", r"dB"),
+    'Hz': (r"\b(k?hz|frequency|sample rate|sampling rate)\b", r"\d\s*[kKM]?Hz\b"),
+    'W': (r"\b(w|watts?|power)\b", r"\d\s*[kK]?W\b|\bwatts?\b"),
+    'Ω': (r"\b(ohms?|impedance)\b|Ω", r"Ω|\bohms?\b"),
+    'V': (r"\b(v|volts?|voltage)\b", r"\d\s*[mk]?V\b|\bvolts?\b"),
+    'mass': (r"\b(weight|kg|lbs?)\b", r"\d\s*(kg|lbs?|g)\b"),
+    'length': (r"\b(dimensions?|mm|height|width|depth|diameter|cutout)\b", r"\d\s*(mm|cm|m|in)\b|\d\s*(\"|”|inch)"),
+    'time': (r"\b(latency|delay|ms)\b", r"\d\s*(ms|µs|us)\b"),
+    '%': (r"\b(thd|distortion)\b", r"\d\s*%"),
+}
+_UNIT_CLASSES = {
+    name: (re.compile(query_pattern, re.IGNORECASE), re.compile(value_pattern))
+    for name, (query_pattern, value_pattern) in UNIT_CLASSES.items()
+}
+
+# Product/model identifiers: letters and digits in one token (EX-1280C, DM8SE)
+_ENTITY_PATTERN = re.compile(r"\b(?=[A-Za-z0-9-]*\d)(?=[A-Za-z0-9-]*[A-Za-z])[A-Za-z0-9]+(?:-[A-Za-z0-9]+)*\b")
+_QUANTITY_PATTERN = re.compile(r"^\d+(\.\d+)?[a-z%]*$", re.IGNORECASE)
+_TERM_PATTERN = re.compile(r"[a-z0-9]+")
+_COLUMN_SPLIT = re.compile(r"\s{2,}|\t|\s*\|\s*")
+_KEY_VALUE = re.compile(r"^\s*([A-Za-z][^:=.!?]{1,60}?)\s*[:=]\s*(.+?)\s*$")
+_DIGIT = re.compile(r"\d")
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it its me of on or the this to what "
+    "when where which who why with you your tell give much many there".split()
+)
+# Query words that name the kind of question or product line, not the attribute
+_GENERIC_TERMS = frozenset(
+    "spec specs specification specifications value rated rating bose professional controlspace "
+    "designmax powermatch freespace edgemax panaray loudspeaker loudspeakers speaker speakers "
+    "processor amplifier unit device model product".split()
+)
+_UNIT_TERMS = frozenset(
+    "db dbu dbv hz khz w watt watts ohm ohms v volt volts kg lb lbs g mm cm in inch inches ms us".split()
+)
+
+
+def _compact(text: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", text.lower())
+
+
+def _entity_ids(text: str) -> Set[str]:
+    """Compacted product identifiers in text, whole tokens only (EX-1280C never yields ex1280)"""
+    return {_compact(match.group()) for match in _ENTITY_PATTERN.finditer(text.replace('_', ' '))}
+
+
+def _stem(term: str) -> str:
+    return term[:-1] if len(term) > 3 and term.endswith('s') else term
+
+
+def _stems(text: str) -> Set[str]:
+    return {
+        _stem(term) for term in _TERM_PATTERN.findall(text.lower())
+        if term not in _STOPWORDS and term not in _UNIT_TERMS
+    }
+
+
+class ExtractiveAnswerer:
+    """
+    Template answers for spec lookups, when one retrieved value clearly matches
+
+    A candidate is a (key, value) pair: a table row (first cell as key,
+    the single value cell carrying a requested unit) or a "key: value"
+    line. The value must carry a unit the query asks for, and the chunk
+    must mention the queried product (if one is named); confidence is the
+    coverage of the query's attribute words by the key. Returns None (use
+    the LLM) when no unit is asked for, several products are compared, the
+    best candidate is below the threshold, or a different value scores
+    almost as high.
+    """
+
+    def __init__(self, min_confidence: float = 0.85, ambiguity_margin: float = 0.05):
+        """
+        Initialize answerer
+
+        Args:
+            min_confidence: Minimum candidate confidence for an extractive answer
+            ambiguity_margin: Give up if a different value scores within this margin
+        """
+        self.min_confidence = min_confidence
+        self.ambiguity_margin = ambiguity_margin
+
+    def answer(self, query: str, docs: List[Document]) -> Optional[Dict]:
+        """
+        Extract an answer
+
+        Args:
+            query: Specification query
+            docs: Retrieved documents, best first
+
+        Returns:
+            {'answer', 'confidence', 'key', 'value', 'source_index'} or None
+        """
+        units = [name for name, (query_pattern, _) in _UNIT_CLASSES.items() if query_pattern.search(query)]
+        if not units:
+            return None
+
+        entities = {}
+        for match in _ENTITY_PATTERN.finditer(query):
+            if not _QUANTITY_PATTERN.match(match.group()):
+                entities.setdefault(_compact(match.group()), match.group())
+        if len(entities) > 1:
+            return None
+
+        attribute = _stems(query) - _GENERIC_TERMS
+        for original in entities.values():
+            attribute -= _stems(original)
+        if not attribute:
+            return None
+
+        candidates = []
+        for rank, doc in enumerate(docs):
+            source = os.path.basename(str(doc.metadata.get('source', '')))
+            mentioned = _entity_ids(doc.page_content) | _entity_ids(source)
+            if any(entity not in mentioned for entity in entities):
+                continue
+            for key, value in self._pairs(doc, units):
+                key_terms = _stems(key)
+                matched = attribute & key_terms
+                if not matched:
+                    continue
+                coverage = len(matched) / len(attribute)
+                precision = len(matched) / len(key_terms)
+                confidence = 0.2 + 0.7 * coverage + 0.1 * precision
+                candidates.append({
+                    'confidence': confidence,
+                    'rank': rank,
+                    'key': key,
+                    'value': value
+                })
+
+        if not candidates:
+            return None
+        candidates.sort(key=lambda c: (-c['confidence'], c['rank']))
+        best = candidates[0]
+        if best['confidence'] < self.min_confidence:
+            logger.debug(f"Extractive answer below threshold ({best['confidence']:.2f}): {best['key']}")
+            return None
+        for other in candidates[1:]:
+            if other['confidence'] < best['confidence'] - self.ambiguity_margin:
+                break
+            if _compact(other['value']) != _compact(best['value']):
+                logger.debug(f"Extractive answer ambiguous: '{best['value']}' vs '{other['value']}'")
+                return None
+
+        entity = next(iter(entities.values()), None)
+        answer = self._render(best['key'], best['value'], entity, best['rank'], docs[best['rank']])
+        logger.info(f"Extractive answer ({best['confidence']:.2f}): {best['key']} = {best['value']}")
+        return {
+            'answer': answer,
+            'confidence': round(best['confidence'], 3),
+            'key': best['key'],
+            'value': best['value'],
+            'source_index': best['rank']
+        }
+
+    @staticmethod
+    def _pairs(doc: Document, units: List[str]) -> List[Tuple[str, str]]:
+        """(key, value) pairs whose value carries one of the requested units"""
+        value_patterns = [_UNIT_CLASSES[name][1] for name in units]
+
+        def has_unit(text: str) -> bool:
+            return bool(_DIGIT.search(text)) and any(pattern.search(text) for pattern in value_patterns)
+
+        is_table = str(doc.metadata.get('content_type', '')).upper() == 'TABLE'
+        pairs = []
+        for line in doc.page_content.split("\n"):
+            if not line.strip():
+                continue
+            cells = [cell.strip() for cell in _COLUMN_SPLIT.split(line.strip()) if cell.strip()]
+            if len(cells) >= 3 and cells[0].isdigit():
+                cells = cells[1:]  # DataFrame row index
+            if len(cells) >= 2 and (is_table or len(cells) <= 4):
+                values = [cell for cell in cells[1:] if has_unit(cell)]
+                # Several unit cells: a comparison row, the column is unknown
+                if len(values) == 1 and not _DIGIT.fullmatch(cells[0]) and re.search(r"[A-Za-z]", cells[0]):
+                    pairs.append((cells[0].rstrip(':'), values[0]))
+                    continue
+            match = _KEY_VALUE.match(line)
+            if match and has_unit(match.group(2)):
+                pairs.append((match.group(1), match.group(2)))
+        return pairs
+
+    @staticmethod
+    def _render(key: str, value: str, entity: Optional[str], rank: int, doc: Document) -> str:
+        if len(key) > 1 and not key[:2].isupper():
+            key = key[0].lower() + key[1:]
+        subject = f"The {key} of the {entity}" if entity else f"The {key}"
+        source = os.path.basename(str(doc.metadata.get('source', 'Unknown')))
+        page = doc.metadata.get('page', '?')
+        return f"{subject} is {value.rstrip('.;,')} [Source {rank + 1}: {source}, page {page}]."
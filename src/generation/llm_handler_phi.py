@@ -3,11 +3,14 @@ LLM Handler for Phi-2 via Ollama
 Optimized for speed and memory efficiency
 """
 import requests
+import json
+import threading
 import time
-from typing import Optional
+from typing import Optional, Iterator, Dict
 from langchain_community.llms import Ollama
 from config.settings import config
 from config.constants import ErrorType
+from src.generation.ollama_client import OllamaClient
 from src.error_handling.handlers import error_handler
 from src.error_handling.logger import logger
 
@@ -34,6 +37,20 @@ class Phi2Handler:
         self.model = None
         self.retry_count = 0
         self.max_retries = 3
+        self.keep_alive = config.OLLAMA_KEEP_ALIVE
+        
+        # Ollama prompt/eval timings per prompt template
+        self._timings_lock = threading.Lock()
+        self.prompt_stats: Dict[str, Dict[str, float]] = {}
+        
+        # Pooled keep-alive connections for all Ollama traffic
+        self.client = OllamaClient(
+            self.base_url,
+            pool_size=config.OLLAMA_POOL_SIZE,
+            connect_timeout=config.OLLAMA_CONNECT_TIMEOUT,
+            read_timeout=self.timeout,
+            tags_ttl=config.OLLAMA_TAGS_CACHE_SECONDS
+        )
         
         logger.info(f"Initializing {self.model_name} handler...")
         self._initialize()
@@ -89,11 +106,8 @@ class Phi2Handler:
     def _check_ollama_running(self) -> bool:
         """Check if Ollama server is running"""
         try:
-            response = requests.get(
-                f"{self.base_url}/api/tags",
-                timeout=2
-            )
-            return response.status_code == 200
+            self.client.tags(max_age=0)
+            return True
         except Exception as e:
             logger.warning(f"Ollama check failed: {str(e)}")
             return False
@@ -101,11 +115,7 @@ class Phi2Handler:
     def _check_model_exists(self) -> bool:
         """Check if Phi-2 model is downloaded"""
         try:
-            response = requests.get(
-                f"{self.base_url}/api/tags",
-                timeout=5
-            )
-            data = response.json()
+            data = self.client.tags()
             model_names = [m['name'] for m in data.get('models', [])]
             
             # Check if model exists with or without :latest tag
@@ -133,13 +143,14 @@ class Phi2Handler:
         logger.info(f"TIP: To pull {self.model_name}, run: ollama pull {self.model_name}")
         return False
     
-    def generate(self, prompt: str, retries: int = 0) -> str:
+    def generate(self, prompt: str, retries: int = 0, template: Optional[str] = None) -> str:
         """
         Generate response using Phi-2 via direct Ollama API
         
         Args:
             prompt: Input prompt
             retries: Retry count (internal)
+            template: Prompt template name (for per-template prompt timings)
         
         Returns:
             Generated response
@@ -156,26 +167,9 @@ class Phi2Handler:
             start_time = time.time()
             
             # Call Ollama API directly for better parameter control
-            payload = {
-                "model": self.model_name,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": self.temperature,
-                    "num_predict": self.max_tokens,
-                    "top_p": 0.9,
-                    "top_k": 40,
-                    "repeat_penalty": 1.1,
-                    "num_ctx": 1024,  # Reduce context window for speed
-                    "stop": ["\n\n", "User:", "Question:", "QUESTION:", "\nQ:", "DOCUMENTATION:", "INSTRUCTIONS:"]
-                }
-            }
+            payload = self._build_payload(prompt, stream=False)
             
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json=payload,
-                timeout=self.timeout
-            )
+            response = self.client.post("/api/generate", payload)
             response.raise_for_status()
             
             result = response.json()
@@ -189,6 +183,7 @@ class Phi2Handler:
             
             logger.info(f"Response generated in {elapsed:.2f}s")
             logger.info(f"Tokens - Prompt: {prompt_eval_count}, Generated: {eval_count}")
+            self._record_timings(template, result)
             
             if eval_count != 'unknown' and eval_count > self.max_tokens:
                 logger.warning(f"Model generated {eval_count} tokens, exceeded limit of {self.max_tokens}!")
@@ -198,7 +193,7 @@ class Phi2Handler:
         except requests.Timeout:
             logger.warning(f"Timeout on attempt {retries + 1}, retrying...")
             time.sleep(2)  # Wait before retry
-            return self.generate(prompt, retries + 1)
+            return self.generate(prompt, retries + 1, template)
         
         except Exception as e:
             logger.error(f"Generation error: {str(e)}")
@@ -212,18 +207,174 @@ class Phi2Handler:
             if retries < self.max_retries:
                 logger.info(f"Retrying... (attempt {retries + 2})")
                 time.sleep(2)
-                return self.generate(prompt, retries + 1)
+                return self.generate(prompt, retries + 1, template)
             
             return (
                 "I encountered an error generating a response. "
                 "Please check if Ollama is running and try again."
             )
     
+    def _build_payload(self, prompt: str, stream: bool) -> Dict:
+        """Build Ollama /api/generate payload"""
+        return {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": stream,
+            # Keep the model (and its prompt KV cache) resident between requests
+            "keep_alive": self.keep_alive,
+            "options": {
+                "temperature": self.temperature,
+                "num_predict": self.max_tokens,
+                "top_p": 0.9,
+                "top_k": 40,
+                "repeat_penalty": 1.1,
+                "num_ctx": config.OLLAMA_NUM_CTX,  # Small context window for speed
+                "stop": ["\n\n", "User:", "Question:", "QUESTION:", "\nQ:", "DOCUMENTATION:", "INSTRUCTIONS:"]
+            }
+        }
+    
+    def generate_stream(self, prompt: str, template: Optional[str] = None) -> Iterator[str]:
+        """
+        Stream response tokens from Ollama's NDJSON /api/generate stream
+        
+        Args:
+            prompt: Input prompt
+            template: Prompt template name (for per-template prompt timings)
+        
+        Yields:
+            Text fragments as they are generated (leading whitespace stripped)
+        
+        Raises:
+            RuntimeError: If the stream fails after fragments were yielded
+                          (the answer so far is truncated and must not be used)
+        """
+        
+        start_time = time.time()
+        first_token_time = None
+        started = False
+        
+        try:
+            logger.debug("Generating streamed response...")
+            
+            with self.client.post("/api/generate", self._build_payload(prompt, stream=True), stream=True) as response:
+                response.raise_for_status()
+                
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise RuntimeError(chunk["error"])
+                    
+                    text = chunk.get("response", "")
+                    if not started:
+                        text = text.lstrip()
+                    if text:
+                        if first_token_time is None:
+                            first_token_time = time.time() - start_time
+                            logger.info(f"First token in {first_token_time:.2f}s")
+                        started = True
+                        yield text
+                    
+                    if chunk.get("done"):
+                        logger.info(f"Streamed response generated in {time.time() - start_time:.2f}s")
+                        logger.info(
+                            f"Tokens - Prompt: {chunk.get('prompt_eval_count', 'unknown')}, "
+                            f"Generated: {chunk.get('eval_count', 'unknown')}"
+                        )
+                        self._record_timings(template, chunk)
+                        break
+                else:
+                    raise RuntimeError("Ollama stream ended before the response was done")
+        
+        except Exception as e:
+            logger.error(f"Streaming generation error: {str(e)}")
+            
+            error_handler.handle_error(
+                ErrorType.LLM_ERROR,
+                e,
+                context={"stream": True}
+            )
+            
+            # Nothing sent yet: fall back to the retrying blocking path
+            if not started:
+                yield self.generate(prompt, template=template)
+                return
+            # Fragments already sent: a fallback would repeat them, so surface the failure
+            raise
+    
+    def warm_up(self, prefixes: Dict[str, str]):
+        """
+        Load the model and evaluate each static prompt prefix once
+        
+        Ollama keeps the model resident for keep_alive and reuses the KV
+        cache of the longest matching prompt prefix, so requests that
+        start with a warmed prefix only evaluate their variable suffix.
+        
+        Args:
+            prefixes: Template name -> fixed prompt prefix
+        """
+        for template, prefix in prefixes.items():
+            try:
+                payload = self._build_payload(prefix, stream=False)
+                payload["options"]["num_predict"] = 1
+                start_time = time.time()
+                response = self.client.post("/api/generate", payload)
+                response.raise_for_status()
+                result = response.json()
+                logger.info(
+                    f"Warmed '{template}' prompt prefix: {result.get('prompt_eval_count', '?')} tokens "
+                    f"in {time.time() - start_time:.2f}s"
+                )
+            except Exception as e:
+                logger.warning(f"Prompt prefix warm-up failed for '{template}': {str(e)}")
+    
+    def _record_timings(self, template: Optional[str], result: Dict):
+        """Accumulate Ollama's prompt/eval counts and durations (ns) for a template"""
+        if 'prompt_eval_duration' not in result and 'prompt_eval_count' not in result:
+            return
+        with self._timings_lock:
+            stats = self.prompt_stats.setdefault(template or 'unknown', {
+                'requests': 0,
+                'prompt_eval_count': 0,
+                'prompt_eval_duration': 0,
+                'eval_count': 0,
+                'eval_duration': 0,
+                'load_duration': 0
+            })
+            stats['requests'] += 1
+            for name in ('prompt_eval_count', 'prompt_eval_duration', 'eval_count', 'eval_duration', 'load_duration'):
+                stats[name] += result.get(name) or 0
+    
+    def get_prompt_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Per-template averages of Ollama prompt processing and generation
+        
+        With prefix reuse, prompt_eval_count counts only re-evaluated
+        tokens, so avg_prompt_eval_tokens drops below the prompt length.
+        """
+        with self._timings_lock:
+            summary = {}
+            for template, stats in self.prompt_stats.items():
+                requests_count = stats['requests']
+                prompt_seconds = stats['prompt_eval_duration'] / 1e9
+                eval_seconds = stats['eval_duration'] / 1e9
+                summary[template] = {
+                    'requests': requests_count,
+                    'avg_prompt_eval_tokens': round(stats['prompt_eval_count'] / requests_count, 1),
+                    'avg_prompt_eval_ms': round(prompt_seconds / requests_count * 1000, 1),
+                    'prompt_tokens_per_second': round(stats['prompt_eval_count'] / prompt_seconds, 1) if prompt_seconds else 0.0,
+                    'avg_eval_tokens': round(stats['eval_count'] / requests_count, 1),
+                    'avg_eval_ms': round(eval_seconds / requests_count * 1000, 1),
+                    'avg_load_ms': round(stats['load_duration'] / 1e9 / requests_count * 1000, 1)
+                }
+            return summary
+    
     def get_model_info(self) -> dict:
         """Get model information"""
         try:
-            response = requests.get(f"{self.base_url}/api/tags")
-            data = response.json()
+            data = self.client.tags()
             
             for model in data.get('models', []):
                 if self.model_name in model['name']:
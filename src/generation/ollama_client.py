@@ -0,0 +1,97 @@
+"""
+Pooled HTTP client for Ollama
+Keep-alive connections for all Ollama traffic and a short-lived
+cache for /api/tags metadata
+"""
+from typing import Dict, Optional, Tuple
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.error_handling.logger import logger
+
+
+class OllamaClient:
+    """
+    Thin wrapper around a pooled requests.Session
+
+    Features:
+    - Connection pool with keep-alive (no TCP setup per query)
+    - Separate connect/read timeouts
+    - /api/tags responses cached for tags_ttl seconds
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        pool_size: int = 10,
+        connect_timeout: float = 2.0,
+        read_timeout: float = 60.0,
+        tags_ttl: float = 30.0
+    ):
+        """
+        Initialize client
+
+        Args:
+            base_url: Ollama server URL
+            pool_size: Maximum pooled connections to Ollama
+            connect_timeout: Seconds to establish a connection
+            read_timeout: Seconds to wait for response data
+            tags_ttl: Seconds to reuse a /api/tags response (0 = no caching)
+        """
+        self.base_url = base_url.rstrip('/')
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        self.tags_ttl = tags_ttl
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._tags: Optional[Dict] = None
+        self._tags_time = 0.0
+        self._tags_lock = threading.Lock()
+
+        logger.debug(f"Ollama client: pool={pool_size}, timeout={self.timeout}, tags_ttl={tags_ttl}s")
+
+    def post(self, path: str, payload: Dict, stream: bool = False,
+             timeout: Optional[Tuple[float, float]] = None) -> requests.Response:
+        """POST JSON to an Ollama endpoint over a pooled connection"""
+        return self.session.post(
+            f"{self.base_url}{path}",
+            json=payload,
+            timeout=timeout or self.timeout,
+            stream=stream
+        )
+
+    def get(self, path: str, timeout: Optional[Tuple[float, float]] = None) -> requests.Response:
+        """GET an Ollama endpoint over a pooled connection"""
+        return self.session.get(f"{self.base_url}{path}", timeout=timeout or self.timeout)
+
+    def tags(self, max_age: Optional[float] = None) -> Dict:
+        """
+        List local models (/api/tags), cached for tags_ttl seconds
+
+        Args:
+            max_age: Override cache age limit (0 forces a fresh request)
+
+        Raises:
+            requests.RequestException: If Ollama cannot be reached
+        """
+        max_age = self.tags_ttl if max_age is None else max_age
+
+        with self._tags_lock:
+            if self._tags is not None and time.time() - self._tags_time < max_age:
+                return self._tags
+
+            response = self.get("/api/tags")
+            response.raise_for_status()
+            self._tags = response.json()
+            self._tags_time = time.time()
+            return self._tags
+
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
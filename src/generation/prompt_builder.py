@@ -1,14 +1,55 @@
 """
 Prompt building for Phi-2 (optimized for local models)
 """
-from typing import List
+from typing import Callable, Dict, List, Optional
+from functools import partial
 from langchain_core.documents import Document
+from src.generation.context_packer import ContextPacker, load_token_counter
 from src.error_handling.logger import logger
+from config.settings import config
+
+
+# Fixed instruction text of each template. Prompts start with the prefix so
+# consecutive requests share it and Ollama can reuse its KV cache entries;
+# everything request-specific (documentation, question) comes after it.
+PROMPT_PREFIXES = {
+    'specification': """You are a technical specification expert for Bose Professional Audio.
+
+INSTRUCTIONS: Answer in 1-2 sentences maximum. Be direct and technical. Include units. Use ONLY the documentation below. If the documentation does not contain this information, respond with: "I cannot find this specification in the available documentation."
+
+""",
+    'procedure': """You are a technical support specialist for Bose Professional Audio.
+
+INSTRUCTIONS: Provide numbered steps using ONLY the documentation below. Maximum 5 steps. Be brief and clear. If the documentation does not contain this procedure, respond with: "I cannot find this procedure in the available documentation."
+
+""",
+    'general': """You are an expert about Bose Professional Audio products.
+
+INSTRUCTIONS:
+1. Answer ONLY questions about Bose audio equipment using the documentation below
+2. If the question is not about Bose audio products, respond: "I can only assist with Bose Professional Audio equipment."
+3. Answer in 2-3 sentences maximum. Be direct and accurate.
+4. If the documentation does not contain enough information, respond: "I cannot find sufficient information about this in the available documentation."
+
+"""
+}
 
 
 class PromptBuilder:
     """Build prompts optimized for Phi-2 model"""
     
+    def __init__(self, token_budget: Optional[int] = None, count_tokens: Optional[Callable[[str], int]] = None):
+        """
+        Initialize prompt builder
+        
+        Args:
+            token_budget: Maximum context tokens (default: config.CONTEXT_TOKEN_BUDGET)
+            count_tokens: Token counter (default: config.CONTEXT_TOKENIZER or the approximation)
+        """
+        self.token_budget = token_budget or config.CONTEXT_TOKEN_BUDGET
+        self.count_tokens = count_tokens or load_token_counter(config.CONTEXT_TOKENIZER)
+        self.packer = ContextPacker(self.count_tokens)
+    
     def build_prompt(self,
                      query: str,
                      retrieved_docs: List[Document]) -> str:
@@ -29,31 +70,15 @@ class PromptBuilder:
             )
             logger.debug(f"Building prompt with content types: {content_types}")
             
-            # Build context - LIMIT TO TOP 2 DOCS AND TRUNCATE AGGRESSIVELY
-            context_parts = []
-            for i, doc in enumerate(retrieved_docs[:2], 1):  # Only use top 2 docs
-                content_type = doc.metadata.get('content_type', 'TEXT')
-                source = doc.metadata.get('source', 'Unknown')
-                page = doc.metadata.get('page', '?')
-                
-                # Truncate to 200 chars per doc for speed
-                content = doc.page_content[:200] if len(doc.page_content) > 200 else doc.page_content
-                
-                context_parts.append(
-                    f"[Source {i}] {source} (Page {page})\n{content}"
-                )
-            
-            context = "\n\n---\n\n".join(context_parts)
-            
             # Select prompt based on query intent
-            if self._is_specification_query(query):
-                prompt = self._spec_prompt(query, context)
-            elif self._is_procedure_query(query):
-                prompt = self._procedure_prompt(query, context)
-            else:
-                prompt = self._general_prompt(query, context)
+            template = self.template_name(query)
+            render = partial(self._render, template)
+            
+            # Build context - best sentences / table rows across all docs, within the token budget
+            context, context_tokens = self.packer.pack(query, retrieved_docs, self.context_budget(query, render))
+            prompt = render(query, context)
             
-            logger.debug("Prompt built successfully")
+            logger.debug(f"Prompt built successfully ({context_tokens} context tokens)")
             return prompt
         
         except Exception as e:
@@ -62,6 +87,25 @@ class PromptBuilder:
 
     
     
+    def template_name(self, query: str) -> str:
+        """Template used for a query: 'specification', 'procedure' or 'general'"""
+        if self._is_specification_query(query):
+            return 'specification'
+        if self._is_procedure_query(query):
+            return 'procedure'
+        return 'general'
+    
+    @staticmethod
+    def static_prefixes() -> Dict[str, str]:
+        """Fixed prompt prefix of each template (for warming the model's prompt cache)"""
+        return dict(PROMPT_PREFIXES)
+    
+    def context_budget(self, query: str, template: Callable[[str, str], str]) -> int:
+        """Context tokens that fit: configured budget, capped by num_ctx minus template, query and answer"""
+        overhead = self.count_tokens(template(query, ""))
+        available = config.OLLAMA_NUM_CTX - config.CONTEXT_ANSWER_RESERVE - overhead
+        return max(32, min(self.token_budget, available))
+    
     def _is_specification_query(self, query: str) -> bool:
         """Detect specification queries"""
         keywords = [
@@ -96,45 +140,24 @@ class PromptBuilder:
     
     def _spec_prompt(self, query: str, context: str) -> str:
         """Prompt for specification queries"""
-        return f"""You are a technical specification expert for Bose Professional Audio.
-
-DOCUMENTATION:
-{context}
-
-QUESTION: {query}
-
-INSTRUCTIONS: Answer in 1-2 sentences maximum. Be direct and technical. Include units. Use ONLY the documentation above. If the documentation does not contain this information, respond with: "I cannot find this specification in the available documentation."
-
-ANSWER:"""
+        return self._render('specification', query, context)
     
     def _procedure_prompt(self, query: str, context: str) -> str:
         """Prompt for procedure queries"""
-        return f"""You are a technical support specialist for Bose Professional Audio.
-
-DOCUMENTATION:
-{context}
-
-QUESTION: {query}
-
-INSTRUCTIONS: Provide numbered steps using ONLY the documentation above. Maximum 5 steps. Be brief and clear. If the documentation does not contain this procedure, respond with: "I cannot find this procedure in the available documentation."
-
-ANSWER:"""
+        return self._render('procedure', query, context)
     
     def _general_prompt(self, query: str, context: str) -> str:
         """Prompt for general queries"""
-        return f"""You are an expert about Bose Professional Audio products.
-
-DOCUMENTATION:
+        return self._render('general', query, context)
+    
+    @staticmethod
+    def _render(template: str, query: str, context: str) -> str:
+        """Static prefix first, then the per-request documentation and question"""
+        return f"""{PROMPT_PREFIXES[template]}DOCUMENTATION:
 {context}
 
 QUESTION: {query}
 
-INSTRUCTIONS: 
-1. Answer ONLY questions about Bose audio equipment using the documentation above
-2. If the question is not about Bose audio products, respond: "I can only assist with Bose Professional Audio equipment."
-3. Answer in 2-3 sentences maximum. Be direct and accurate.
-4. If the documentation does not contain enough information, respond: "I cannot find sufficient information about this in the available documentation."
-
 ANSWER:"""
     
     def _fallback_prompt(self, query: str, docs: List[Document]) -> str:
@@ -0,0 +1,142 @@
+"""
+Bounded execution of blocking RAG work for async servers
+Keeps the event loop free for health checks and cache hits under load
+"""
+from typing import Any, Callable, Dict, Iterator, AsyncIterator, Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import time
+
+from src.error_handling.logger import logger
+
+
+class QueueFullError(Exception):
+    """Raised when the executor queue is at capacity"""
+
+
+class QueryExecutor:
+    """
+    Run blocking RAG calls (embedding, Chroma, Ollama) on a bounded worker pool
+
+    Admission control:
+    - At most max_concurrent calls run at once (pool size)
+    - At most max_queue calls wait for a worker; beyond that, QueueFullError
+      is raised immediately so the server can shed load (HTTP 503)
+
+    Must be used from a single event loop (one per server process).
+    """
+
+    def __init__(self, max_concurrent: int = 4, max_queue: int = 32):
+        """
+        Initialize executor
+
+        Args:
+            max_concurrent: Worker threads / concurrent RAG calls
+            max_queue: Maximum calls waiting for a worker
+        """
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.pool = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix="rag-worker")
+
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+        self._active = 0
+
+        self.stats = {
+            'completed': 0,
+            'failed': 0,
+            'rejected': 0,
+            'max_queue_depth_seen': 0,
+            'total_wait_time': 0.0
+        }
+
+        logger.info(f"Query executor initialized (workers={self.max_concurrent}, max_queue={self.max_queue})")
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running server loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        return self._semaphore
+
+    async def _acquire(self):
+        """Wait for a worker slot, or reject if the queue is full"""
+        semaphore = self._get_semaphore()
+
+        if semaphore.locked() and self._waiting >= self.max_queue:
+            self.stats['rejected'] += 1
+            raise QueueFullError(
+                f"Server busy: {self._active} running, {self._waiting} queued (max {self.max_queue})"
+            )
+
+        self._waiting += 1
+        self.stats['max_queue_depth_seen'] = max(self.stats['max_queue_depth_seen'], self._waiting)
+        wait_start = time.time()
+        try:
+            await semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        self.stats['total_wait_time'] += time.time() - wait_start
+        self._active += 1
+
+    def _release(self, success: bool):
+        self._active -= 1
+        self._get_semaphore().release()
+        self.stats['completed' if success else 'failed'] += 1
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a blocking call on the worker pool
+
+        Raises:
+            QueueFullError: If max_queue calls are already waiting
+        """
+        await self._acquire()
+        success = False
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self.pool, lambda: fn(*args, **kwargs))
+            success = True
+            return result
+        finally:
+            self._release(success)
+
+    async def stream(self, iterator_fn: Callable[..., Iterator[Any]], *args, **kwargs) -> AsyncIterator[Any]:
+        """
+        Drive a blocking iterator on the worker pool, holding one slot throughout
+
+        Raises:
+            QueueFullError: If max_queue calls are already waiting
+        """
+        await self._acquire()
+        success = False
+        try:
+            loop = asyncio.get_running_loop()
+            iterator = await loop.run_in_executor(self.pool, lambda: iter(iterator_fn(*args, **kwargs)))
+            sentinel = object()
+            while True:
+                item = await loop.run_in_executor(self.pool, next, iterator, sentinel)
+                if item is sentinel:
+                    break
+                yield item
+            success = True
+        finally:
+            self._release(success)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Concurrency and queue-depth statistics"""
+        finished = self.stats['completed'] + self.stats['failed']
+        return {
+            'max_concurrent': self.max_concurrent,
+            'max_queue': self.max_queue,
+            'active': self._active,
+            'queue_depth': self._waiting,
+            'max_queue_depth_seen': self.stats['max_queue_depth_seen'],
+            'completed': self.stats['completed'],
+            'failed': self.stats['failed'],
+            'rejected': self.stats['rejected'],
+            'avg_wait_seconds': round(self.stats['total_wait_time'] / finished, 3) if finished else 0.0
+        }
+
+    def shutdown(self):
+        """Stop worker threads"""
+        self.pool.shutdown(wait=False)
@@ -2,14 +2,24 @@
 Complete RAG system using Phi-2
 Main orchestrator class with optional enhancements (Phase 1)
 """
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple, Iterator
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from langchain_core.documents import Document
 from src.document_processing.router import ProcessingRouter
-from src.vector_store.chromadb_manager import EnhancedChromaDB
+from src.document_processing.parallel_ingest import ParallelIngestionPipeline
+from src.vector_store.chromadb_manager import EnhancedChromaDB, chunk_id
 from src.retrieval.content_aware_retriever import ContentAwareRetriever
 from src.retrieval.hybrid_retriever import HybridRetriever
 from src.retrieval.query_cache import cache_manager
+from src.retrieval.persistent_cache import PersistentAnswerCache
+from src.retrieval.retrieval_cache import RetrievalCache
+from src.retrieval.reranker import CrossEncoderReranker
+from src.retrieval.spec_store import SpecTableStore, pop_spec_rows
+from src.interfaces.single_flight import SingleFlight
 from src.generation.prompt_builder import PromptBuilder
+from src.generation.extractive_answerer import ExtractiveAnswerer
 from src.generation.llm_handler_phi import Phi2Handler
 from src.generation.confidence_scorer import confidence_manager
 from src.monitoring.metrics_collector import metrics_manager
@@ -46,8 +56,15 @@ class BoseRAGPhi:
             self.prompt_builder = PromptBuilder()
             logger.info("SUCCESS: Prompt builder initialized")
             
+            self.extractive_answerer = (
+                ExtractiveAnswerer(min_confidence=config.EXTRACTIVE_MIN_CONFIDENCE)
+                if config.ENABLE_EXTRACTIVE_ANSWERS else None
+            )
+            
             self.llm = Phi2Handler()
             logger.info("SUCCESS: Phi-2 LLM initialized")
+            if config.OLLAMA_WARM_PREFIXES:
+                self.llm.warm_up(self.prompt_builder.static_prefixes())
             
             self.router = ProcessingRouter()
             
@@ -62,7 +79,8 @@ class BoseRAGPhi:
                     self.retriever = HybridRetriever(
                         self.vector_store,
                         alpha=config.HYBRID_SEARCH_ALPHA,
-                        enable_hybrid=True
+                        enable_hybrid=True,
+                        reranker=self.reranker
                     )
                     logger.info(f"SUCCESS: Hybrid retriever initialized (alpha={config.HYBRID_SEARCH_ALPHA})")
                 else:
@@ -90,13 +108,60 @@ class BoseRAGPhi:
     def _init_enhancements(self):
         """Initialize optional enhancement features"""
         # Query caching
+        store = None
+        if config.ENABLE_QUERY_CACHE and config.ENABLE_PERSISTENT_CACHE:
+            store = PersistentAnswerCache(
+                config.PERSISTENT_CACHE_PATH,
+                ttl_seconds=config.PERSISTENT_CACHE_TTL_SECONDS,
+                max_entries=config.PERSISTENT_CACHE_MAX_ENTRIES,
+                max_bytes=config.PERSISTENT_CACHE_MAX_MB * 1024 * 1024
+            )
         cache_manager.initialize(
             max_size=config.CACHE_MAX_SIZE,
             ttl_seconds=config.CACHE_TTL_SECONDS,
-            enable_cache=config.ENABLE_QUERY_CACHE
+            enable_cache=config.ENABLE_QUERY_CACHE,
+            similarity_threshold=config.SEMANTIC_CACHE_THRESHOLD if config.ENABLE_SEMANTIC_CACHE else None,
+            near_hit_margin=config.SEMANTIC_CACHE_NEAR_MARGIN,
+            store=store,
+            validator=self._is_cached_answer_current if config.CACHE_INVALIDATION == "source" else None
         )
         self.cache = cache_manager.get_query_cache()
         
+        # Identical concurrent queries share one retrieve + generate
+        self.single_flight = SingleFlight()
+        
+        # LLM generations in flight across single, streaming and batch queries
+        self.generation_slots = threading.BoundedSemaphore(max(1, config.QUERY_WORKERS))
+        
+        # Retrieval caching (independent of the answer cache)
+        self.retrieval_cache = (
+            RetrievalCache(max_size=config.RETRIEVAL_CACHE_MAX_SIZE) if config.ENABLE_RETRIEVAL_CACHE else None
+        )
+        
+        # Cross-encoder re-ranking after hybrid fusion
+        self.reranker = None
+        if config.ENABLE_HYBRID_SEARCH and config.ENABLE_RERANKER:
+            try:
+                self.reranker = CrossEncoderReranker(
+                    config.RERANKER_MODEL,
+                    max_candidates=config.RERANKER_CANDIDATES,
+                    latency_budget_ms=config.RERANKER_BUDGET_MS,
+                    batch_size=config.RERANKER_BATCH_SIZE,
+                    backend=config.RERANKER_BACKEND,
+                    quantize=config.RERANKER_QUANTIZE,
+                    cache_size=config.RERANKER_CACHE_SIZE
+                )
+            except Exception as e:
+                logger.warning(f"Cross-encoder re-ranker unavailable, using RRF order: {str(e)}")
+        
+        # Structured spec rows from ingested tables (direct lookups before retrieval)
+        self.spec_store = None
+        if config.ENABLE_SPEC_STORE:
+            try:
+                self.spec_store = SpecTableStore(config.SPEC_STORE_PATH)
+            except Exception as e:
+                logger.warning(f"Spec table store unavailable: {str(e)}")
+        
         # Confidence scoring
         confidence_manager.initialize(
             enable_scoring=config.ENABLE_CONFIDENCE_SCORING
@@ -110,11 +175,67 @@ class BoseRAGPhi:
         )
         self.metrics = metrics_manager.get_collector()
     
+    def cache_context(self, state: Optional[Dict] = None) -> Dict:
+        """
+        Cache key context: answers are only reused for the same corpus and model
+        
+        Persistent entries are shared across processes and deploys, so the
+        key must change whenever the documents or the LLM change. With
+        source-level invalidation the key only pins the collection epoch and
+        stale answers are rejected by _is_cached_answer_current instead.
+        
+        Args:
+            state: Collection version state to key on (default: re-read the version file)
+        """
+        version = self.vector_store.version
+        if state is None:
+            collection = version.epoch if config.CACHE_INVALIDATION == "source" else version.key
+        else:
+            collection = state.get('epoch', '') if config.CACHE_INVALIDATION == "source" else version.state_key(state)
+        return {'collection': collection, 'model': config.OLLAMA_MODEL}
+    
+    def _is_cached_answer_current(self, result: Dict, state: Optional[Dict] = None) -> bool:
+        """False if a source cited by a cached answer was re-ingested after it was cached"""
+        sources = [source.get('source') for source in result.get('sources', [])]
+        return not self.vector_store.version.is_stale(result.get('collection_version', 0), sources, state)
+    
+    def get_cached(self, query: str) -> Optional[Dict]:
+        """
+        Cached answer from the in-memory tier, or None (never blocks)
+        
+        For async servers: no file, SQLite or single-flight access, so it
+        can run on the event loop. Keys and validates against the last
+        loaded collection version; on None, run answer_query on a worker.
+        """
+        if not config.ENABLE_QUERY_CACHE or not self.retriever:
+            return None
+        
+        start_time = time.time()
+        state = self.vector_store.version.peek()
+        validator = None
+        if config.CACHE_INVALIDATION == "source":
+            validator = lambda result: self._is_cached_answer_current(result, state)
+        cached_result = self.cache.get_memory(query, self.cache_context(state), validator)
+        if cached_result is None:
+            return None
+        
+        cache_hit_time = time.time() - start_time
+        cached_result['cache_hit'] = True
+        cached_result['time'] = f"{cache_hit_time:.2f}s"
+        self.metrics.record_query(query, True, cache_hit_time, cache_hit=True)
+        return cached_result
+    
     def _log_enhancement_status(self):
         """Log status of optional enhancements"""
         enhancements = []
         if config.ENABLE_HYBRID_SEARCH:
             enhancements.append(f"Hybrid Search (α={config.HYBRID_SEARCH_ALPHA})")
+        if self.reranker:
+            enhancements.append(f"Re-ranking ({config.RERANKER_MODEL})")
+        if self.spec_store:
+            enhancements.append("Spec Table Store")
+        if self.extractive_answerer:
+            enhancements.append(f"Extractive Spec Answers (min={config.EXTRACTIVE_MIN_CONFIDENCE})")
         if config.ENABLE_QUERY_CACHE:
             enhancements.append(f"Query Cache (size={config.CACHE_MAX_SIZE})")
         if config.ENABLE_CONFIDENCE_SCORING:
@@ -140,6 +261,9 @@ class BoseRAGPhi:
         
         logger.info(f"Processing {len(pdf_paths)} document(s)...")
         
+        if config.ENABLE_PARALLEL_INGESTION:
+            return self._process_documents_parallel(pdf_paths)
+        
         all_chunks = []
         processed_count = 0
         failed_count = 0
@@ -175,21 +299,27 @@ class BoseRAGPhi:
             }
         
         try:
+            # Table rows go to the spec store, not the vector DB metadata
+            spec_rows = pop_spec_rows(all_chunks)
+            if self.spec_store:
+                self.spec_store.add_rows(spec_rows)
+            
             # Store in vector DB
             logger.info(f"Storing {len(all_chunks)} chunks...")
-            self.vector_store.add_documents(all_chunks)
+            ingest_stats = self.vector_store.add_documents(all_chunks)
             
-            # Initialize/rebuild retriever (hybrid if enabled)
-            if config.ENABLE_HYBRID_SEARCH:
-                self.retriever = HybridRetriever(
-                    self.vector_store,
-                    alpha=config.HYBRID_SEARCH_ALPHA,
-                    enable_hybrid=True
-                )
-                logger.info("SUCCESS: Hybrid retriever rebuilt with new documents")
-            else:
-                self.retriever = ContentAwareRetriever(self.vector_store)
-                logger.info("SUCCESS: Standard retriever initialized with new documents")
+            # Chunks of an earlier version of a re-ingested file are dropped
+            chunks_by_id = {chunk_id(chunk): chunk for chunk in all_chunks}
+            current_ids: Dict[str, List[str]] = {}
+            for doc_id, chunk in chunks_by_id.items():
+                current_ids.setdefault(chunk.metadata.get('source', ''), []).append(doc_id)
+            removed_ids = self.vector_store.remove_stale_chunks(current_ids)
+            
+            self._update_retriever(
+                ingest_stats['ids'],
+                [chunks_by_id[doc_id] for doc_id in ingest_stats['ids']],
+                removed_ids
+            )
             
             logger.info(f"SUCCESS: Processing complete: {len(all_chunks)} chunks stored")
             
@@ -197,7 +327,10 @@ class BoseRAGPhi:
                 'status': 'success',
                 'total_chunks': len(all_chunks),
                 'documents_processed': processed_count,
-                'documents_failed': failed_count
+                'documents_failed': failed_count,
+                'chunks_added': ingest_stats.get('chunks_added'),
+                'chunks_skipped': ingest_stats.get('chunks_skipped'),
+                'chunks_per_second': ingest_stats.get('chunks_per_second')
             }
         
         except Exception as e:
@@ -216,10 +349,174 @@ class BoseRAGPhi:
                 'storage_error': str(e)
             }
     
+    def _process_documents_parallel(self, pdf_paths: List[str]) -> Dict:
+        """Process PDFs with the process-pool ingestion pipeline"""
+        
+        try:
+            pipeline = ParallelIngestionPipeline(self.vector_store, spec_store=self.spec_store)
+            stats = pipeline.run(pdf_paths)
+        except Exception as e:
+            logger.error(f"ERROR: Parallel ingestion failed: {str(e)}")
+            error_handler.handle_error(
+                ErrorType.PROCESSING_ERROR,
+                e,
+                context={"stage": "parallel_ingestion", "files": len(pdf_paths)}
+            )
+            return {
+                'status': 'failed',
+                'total_chunks': 0,
+                'documents_processed': 0,
+                'documents_failed': len(pdf_paths),
+                'error': str(e)
+            }
+        
+        for pdf_path in stats['failed_paths']:
+            error_handler.handle_error(
+                ErrorType.PROCESSING_ERROR,
+                Exception("Parallel processing failed"),
+                context={"file": pdf_path}
+            )
+        
+        if not stats['total_chunks']:
+            logger.warning("WARNING: No chunks extracted from any document")
+            return {
+                'status': 'failed',
+                'total_chunks': 0,
+                'documents_processed': stats['documents_processed'],
+                'documents_failed': stats['documents_failed'],
+                'error': 'No content extracted from documents'
+            }
+        
+        self._update_retriever(stats['ids'], stats['documents'], stats['removed_ids'])
+        logger.info(f"SUCCESS: Processing complete: {stats['total_chunks']} chunks stored")
+        
+        return {
+            'status': 'success',
+            'total_chunks': stats['total_chunks'],
+            'documents_processed': stats['documents_processed'],
+            'documents_failed': stats['documents_failed'],
+            'chunks_added': stats['chunks_added'],
+            'chunks_skipped': stats['chunks_skipped'],
+            'chunks_per_second': stats['chunks_per_second']
+        }
+    
+    def _update_retriever(self, new_ids: List[str], new_chunks: List, removed_ids: Optional[List[str]] = None):
+        """Initialize/update retriever after ingestion (hybrid if enabled)"""
+        if config.ENABLE_HYBRID_SEARCH:
+            if isinstance(self.retriever, HybridRetriever):
+                # Only the new chunks are tokenized; existing postings are kept
+                self.retriever.add_documents(new_ids, new_chunks)
+                if removed_ids:
+                    self.retriever.remove_documents(removed_ids)
+                logger.info("SUCCESS: Hybrid retriever updated incrementally with new documents")
+            else:
+                self.retriever = HybridRetriever(
+                    self.vector_store,
+                    alpha=config.HYBRID_SEARCH_ALPHA,
+                    enable_hybrid=True,
+                    reranker=self.reranker
+                )
+                logger.info("SUCCESS: Hybrid retriever built with new documents")
+        else:
+            self.retriever = ContentAwareRetriever(self.vector_store)
+            logger.info("SUCCESS: Standard retriever initialized with new documents")
+    
+    def retrieve(self, query: str, k: int = 5, query_embedding: Optional[List[float]] = None) -> List:
+        """
+        Retrieve documents, reusing cached rankings for the current collection version
+        
+        Args:
+            query: User query
+            k: Number of documents
+            query_embedding: Precomputed query embedding (used on a cache miss)
+        """
+        if not self.retrieval_cache:
+            return self.retriever.retrieve(query, k=k, query_embedding=query_embedding)
+        
+        key = self._retrieval_key(query, k)
+        docs = self._cached_retrieval(key)
+        if docs is not None:
+            return docs
+        
+        docs = self.retriever.retrieve(query, k=k, query_embedding=query_embedding)
+        if docs:
+            self.retrieval_cache.set(key, docs)
+        return docs
+    
+    def retrieve_batch(
+        self,
+        queries: List[str],
+        k: int = 5,
+        query_embeddings: Optional[List[List[float]]] = None
+    ) -> List[List]:
+        """
+        Retrieve documents for several queries; cache misses share one batched retrieval
+        
+        Args:
+            queries: User queries
+            k: Number of documents per query
+            query_embeddings: Precomputed query embeddings (same order as queries)
+        
+        Returns:
+            Document lists in query order
+        """
+        results: List[Optional[List]] = [None] * len(queries)
+        keys = [self._retrieval_key(query, k) for query in queries] if self.retrieval_cache else []
+        misses = []
+        for i in range(len(queries)):
+            docs = self._cached_retrieval(keys[i]) if self.retrieval_cache else None
+            if docs is None:
+                misses.append(i)
+            else:
+                results[i] = docs
+        
+        if misses:
+            fetched = self.retriever.retrieve_batch(
+                [queries[i] for i in misses],
+                k=k,
+                query_embeddings=[query_embeddings[i] for i in misses] if query_embeddings else None
+            )
+            for i, docs in zip(misses, fetched):
+                results[i] = docs
+                if self.retrieval_cache and docs:
+                    self.retrieval_cache.set(keys[i], docs)
+        
+        return results
+    
+    def _retrieval_key(self, query: str, k: int) -> str:
+        hybrid = isinstance(self.retriever, HybridRetriever) and self.retriever.enable_hybrid
+        alpha = self.retriever.alpha if hybrid else None
+        reranker = self.reranker.model_name if hybrid and self.reranker else None
+        return RetrievalCache.make_key(query, k, alpha, self.vector_store.version.key, reranker=reranker)
+    
+    def _cached_retrieval(self, key: str) -> Optional[List]:
+        """Documents of a cached ranking, or None"""
+        ranking = self.retrieval_cache.get(key)
+        if ranking is None:
+            return None
+        
+        stored = self.vector_store.get_documents([doc_id for doc_id, _ in ranking])
+        if len(stored) != len(ranking):
+            # Chunks deleted underneath the cache entry
+            self.retrieval_cache.discard(key)
+            return None
+        
+        logger.info(f"Retrieval cache HIT: {len(ranking)} documents")
+        return [
+            Document(
+                page_content=stored[doc_id].page_content,
+                metadata={**stored[doc_id].metadata, 'doc_id': doc_id, **scores}
+            )
+            for doc_id, scores in ranking
+        ]
+    
     def answer_query(self, query: str, verbose: bool = False) -> Dict:
         """
         Answer user query with comprehensive error handling and optional enhancements
         
+        Identical queries arriving while one is being answered wait for that
+        answer instead of recomputing it (request coalescing).
+        
         Args:
             query: User question
             verbose: Show intermediate steps
@@ -227,198 +524,601 @@ class BoseRAGPhi:
         Returns:
             Result dictionary with answer, sources, metadata, and optional confidence
         """
+        if not config.ENABLE_REQUEST_COALESCING:
+            return self._answer_query(query, verbose)
+        
+        start_time = time.time()
+        key = self.cache.cache_key(query, self.cache_context())
+        call, is_leader = self.single_flight.begin(key)
+        if not is_leader:
+            return self._coalesced_result(query, call, start_time, verbose)
+        
+        result = None
+        try:
+            result = self._answer_query(query, verbose)
+        finally:
+            self.single_flight.finish(key, call, result=result)
+        return result
+    
+    def _coalesced_result(self, query: str, call, start_time: float, verbose: bool) -> Dict:
+        """Result of an identical in-flight query (computed here if the leader gave none)"""
+        logger.info(f"Coalesced with in-flight identical query: {query[:50]}...")
+        try:
+            shared = self.single_flight.wait(call, timeout=config.RESPONSE_TIMEOUT * 2)
+        except Exception as e:
+            logger.warning(f"In-flight query unavailable ({str(e)}), answering independently")
+            shared = None
+        if shared is None:
+            return self._answer_query(query, verbose)
+        
+        elapsed = time.time() - start_time
+        result = {**shared, 'query': query, 'time': f"{elapsed:.2f}s", 'coalesced': True}
+        self.metrics.record_query(query, result.get('status') != 'error', elapsed,
+                                  cache_hit=result.get('cache_hit', False), coalesced=True)
+        return result
+    
+    def _answer_query(self, query: str, verbose: bool = False) -> Dict:
+        """Retrieve, generate and finalize one query (no coalescing)"""
         
         start_time = time.time()
-        cache_hit = False
         component_times = {}
         
         try:
-            logger.debug(f"Query: {query}")
-            
-            # Check initialization
-            if not self.retriever:
-                logger.warning("WARNING: No documents processed yet")
-                result = {
-                    'status': 'error',
-                    'query': query,
-                    'answer': 'Please process documents first using process_documents()',
-                    'sources': [],
-                    'time': f"{time.time() - start_time:.2f}s",
-                    'error': 'No documents loaded'
-                }
-                self.metrics.record_query(query, False, time.time() - start_time, error='No documents loaded')
-                return result
-            
-            # Detect off-topic queries (before retrieval to save time)
-            if self._is_off_topic(query):
-                logger.info(f"Off-topic query detected: {query}")
-                result = {
-                    'status': 'success',
-                    'query': query,
-                    'answer': 'I am a technical assistant for Bose Professional Audio equipment. I can only answer questions about Bose audio products, specifications, installation, and troubleshooting. Please ask me about Bose audio systems.',
-                    'sources': [],
-                    'model': 'phi-2',
-                    'time': f"{time.time() - start_time:.2f}s"
-                }
-                if config.ENABLE_CONFIDENCE_SCORING:
-                    result['confidence'] = {
-                        'overall': 0.0,
-                        'label': 'very_low',
-                        'breakdown': {'retrieval': 0.0, 'grounding': 0.0, 'specificity': 0.0, 'uncertainty': 0.0},
-                        'explanation': 'Off-topic query - not related to Bose audio equipment.',
-                        'enabled': True
-                    }
-                self.metrics.record_query(query, True, time.time() - start_time)
-                return result
-            
-            # Check cache first (if enabled)
-            cached_result = self.cache.get(query)
-            if cached_result:
-                cache_hit = True
-                cache_hit_time = time.time() - start_time
-                # Update cache indicators and timing
-                cached_result['cache_hit'] = True
-                cached_result['time'] = f"{cache_hit_time:.2f}s"
-                self.metrics.record_query(query, True, cache_hit_time, cache_hit=True)
-                logger.info(f"Cache HIT: Query answered in {cache_hit_time:.2f}s")
-                return cached_result
-            
-            if verbose:
-                logger.info(f"Step 1: Retrieving documents...")
-            
-            # Retrieve documents
-            retrieval_start = time.time()
-            docs = self.retriever.retrieve(query, k=5)
-            retrieval_time = time.time() - retrieval_start
-            component_times['retrieval'] = retrieval_time
-            logger.info(f"Retrieval completed in {retrieval_time:.2f}s")
-            
-            if not docs:
-                logger.warning(f"WARNING: No relevant documents found for query: {query}")
-                result = {
-                    'status': 'no_context',
-                    'query': query,
-                    'answer': (
-                        "No relevant information found in the documents. "
-                        "Try rephrasing your question or ask about: "
-                        "specifications, installation, configuration, or features."
-                    ),
-                    'sources': [],
-                    'time': f"{time.time() - start_time:.2f}s",
-                    'cache_hit': False
-                }
-                self.metrics.record_query(query, False, time.time() - start_time, 
-                                         component_times=component_times)
-                return result
-            
-            # Extract retrieval scores for confidence calculation
-            retrieval_scores = [doc.metadata.get('vector_score', 0.5) for doc in docs]
-            
-            if verbose:
-                logger.info(f"SUCCESS: Retrieved {len(docs)} relevant documents in {retrieval_time:.2f}s")
-                logger.info(f"Step 2: Building prompt...")
-            
-            # Build prompt
-            prompt_start = time.time()
-            prompt = self.prompt_builder.build_prompt(query, docs)
-            prompt_time = time.time() - prompt_start
-            component_times['prompt'] = prompt_time
-            logger.info(f"Prompt built in {prompt_time:.2f}s")
+            early_result, context = self._prepare_answer(query, start_time, component_times, verbose)
+            if early_result is not None:
+                return early_result
+            return self._generate_answer(query, context, start_time, component_times, verbose)
+        
+        except Exception as e:
+            return self._query_error(query, e, start_time, component_times)
+    
+    def _generate_answer(
+        self,
+        query: str,
+        context: Tuple[List, str, List[float], Optional[List[float]]],
+        start_time: float,
+        component_times: Dict[str, float],
+        verbose: bool = False
+    ) -> Dict:
+        """Generate the answer for a prepared context and finalize the result"""
+        docs, prompt, retrieval_scores, query_embedding = context
+        
+        if verbose:
+            logger.info(f"Step 3: Generating answer with Phi-2...")
+        
+        # Generate answer
+        generation_start = time.time()
+        with self.generation_slots:
+            answer = self.llm.generate(prompt, template=self.prompt_builder.template_name(query))
+        generation_time = time.time() - generation_start
+        component_times['llm_generation'] = generation_time
+        logger.info(f"LLM generation completed in {generation_time:.2f}s")
+        
+        if verbose:
+            logger.info(f"SUCCESS: Answer generated")
+        
+        return self._finalize_answer(query, answer, docs, retrieval_scores, start_time,
+                                     component_times, query_embedding)
+    
+    def answer_query_stream(self, query: str, verbose: bool = False) -> Iterator[Dict]:
+        """
+        Answer user query, streaming the generated answer token by token
+        
+        Same pipeline as answer_query; cache hits, off-topic and
+        no-context answers are returned immediately as a single 'done' event,
+        as are answers shared from an identical in-flight query.
+        
+        Args:
+            query: User question
+            verbose: Show intermediate steps
+        
+        Yields:
+            Events: {'event': 'sources', 'data': {...}}, then
+            {'event': 'token', 'data': {'text': ...}} per fragment, then
+            {'event': 'done', 'data': <answer_query result dict>}
+        """
+        if not config.ENABLE_REQUEST_COALESCING:
+            yield from self._stream_answer(query, verbose)
+            return
+        
+        start_time = time.time()
+        key = self.cache.cache_key(query, self.cache_context())
+        call, is_leader = self.single_flight.begin(key)
+        if not is_leader:
+            yield {'event': 'done', 'data': self._coalesced_result(query, call, start_time, verbose)}
+            return
+        
+        # Followers get the final result; an abandoned stream leaves them None
+        result = None
+        try:
+            for event in self._stream_answer(query, verbose):
+                if event['event'] == 'done':
+                    result = event['data']
+                yield event
+        finally:
+            self.single_flight.finish(key, call, result=result)
+    
+    def _stream_answer(self, query: str, verbose: bool = False) -> Iterator[Dict]:
+        """Streaming pipeline for one query (no coalescing)"""
+        
+        start_time = time.time()
+        component_times = {}
+        
+        try:
+            early_result, context = self._prepare_answer(query, start_time, component_times, verbose)
+            if early_result is not None:
+                yield {'event': 'done', 'data': early_result}
+                return
+            docs, prompt, retrieval_scores, query_embedding = context
             
-            if verbose:
-                logger.info(f"Step 3: Generating answer with Phi-2...")
+            yield {'event': 'sources', 'data': {'sources': self._build_sources(docs)}}
             
-            # Generate answer
+            # Stream answer
             generation_start = time.time()
-            answer = self.llm.generate(prompt)
+            pieces = []
+            with self.generation_slots:
+                for text in self.llm.generate_stream(prompt, template=self.prompt_builder.template_name(query)):
+                    if not pieces:
+                        component_times['time_to_first_token'] = time.time() - generation_start
+                    pieces.append(text)
+                    yield {'event': 'token', 'data': {'text': text}}
+            
             generation_time = time.time() - generation_start
             component_times['llm_generation'] = generation_time
-            logger.info(f"LLM generation completed in {generation_time:.2f}s")
+            logger.info(f"LLM streamed generation completed in {generation_time:.2f}s")
             
-            if verbose:
-                logger.info(f"SUCCESS: Answer generated")
+            answer = "".join(pieces).strip()
+            yield {
+                'event': 'done',
+                'data': self._finalize_answer(query, answer, docs, retrieval_scores, start_time,
+                                              component_times, query_embedding)
+            }
+        
+        except Exception as e:
+            yield {'event': 'done', 'data': self._query_error(query, e, start_time, component_times)}
+    
+    def answer_queries(
+        self,
+        queries: List[str],
+        verbose: bool = False,
+        max_concurrency: Optional[int] = None
+    ) -> Iterator[Dict]:
+        """
+        Answer a set of questions, yielding each result as soon as it is ready
+        
+        Retrieval is shared across the set: one embedding call, one vector
+        query and one BM25 pass for all questions that miss the caches.
+        Generation then runs with bounded concurrency, each generation
+        holding one of the shared generation slots (QUERY_WORKERS) like
+        single queries do. Repeated questions are answered once, and
+        questions already in flight elsewhere wait for that answer.
+        
+        Args:
+            queries: User questions
+            verbose: Show intermediate steps
+            max_concurrency: Concurrent generations (default: BATCH_GENERATION_CONCURRENCY)
+        
+        Yields:
+            {'index': i, 'result': <answer_query result dict>} in completion order
+        """
+        start_time = time.time()
+        max_concurrency = max(1, max_concurrency or config.BATCH_GENERATION_CONCURRENCY)
+        
+        # Single-flight calls this batch leads, finished as results are published
+        leading = {}
+        
+        def results_for(key: str, indices: List[int], result: Dict) -> Iterator[Dict]:
+            call = leading.pop(key, None)
+            if call is not None:
+                self.single_flight.finish(key, call, result=result)
+            for n, i in enumerate(indices):
+                yield {'index': i, 'result': result if n == 0 else {**result, 'query': queries[i]}}
+        
+        # Duplicates (same cache key) share one answer
+        groups: Dict[str, List[int]] = {}
+        context_key = self.cache_context()
+        for i, query in enumerate(queries):
+            groups.setdefault(self.cache.cache_key(query, context_key), []).append(i)
+        
+        pending = []
+        followers = []
+        pool = None
+        try:
+            for key, indices in groups.items():
+                query = queries[indices[0]]
+                if config.ENABLE_REQUEST_COALESCING:
+                    call, is_leader = self.single_flight.begin(key)
+                    if not is_leader:
+                        followers.append((key, indices, call))
+                        continue
+                    leading[key] = call
+                try:
+                    early_result = self._early_answer(query, start_time)
+                except Exception as e:
+                    early_result = self._query_error(query, e, start_time, {})
+                if early_result is not None:
+                    yield from results_for(key, indices, early_result)
+                else:
+                    pending.append((key, indices))
             
-            # Format response
-            elapsed_time = time.time() - start_time
+            jobs = []
+            if pending:
+                jobs = yield from self._batch_contexts(queries, pending, start_time, verbose, results_for)
+            if not jobs and not followers:
+                return
             
-            # Build sources
-            sources = []
-            for doc in docs:
-                sources.append({
-                    'page': doc.metadata.get('page'),
-                    'content_type': doc.metadata.get('content_type'),
-                    'source': doc.metadata.get('source')
-                })
+            # Generation: bounded concurrency, results in completion order
+            pool = ThreadPoolExecutor(max_workers=min(max_concurrency, len(jobs) + len(followers)),
+                                      thread_name_prefix="rag-batch")
+            futures = {
+                pool.submit(self._generate_answer, queries[indices[0]], context, start_time,
+                            component_times, verbose): (key, indices, component_times)
+                for key, indices, context, component_times in jobs
+            }
+            futures.update({
+                pool.submit(self._coalesced_result, queries[indices[0]], call, start_time, verbose):
+                    (key, indices, {})
+                for key, indices, call in followers
+            })
+            for future in as_completed(futures):
+                key, indices, component_times = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = self._query_error(queries[indices[0]], e, start_time, component_times)
+                yield from results_for(key, indices, result)
+        finally:
+            # An abandoned batch must not keep generating or leave followers waiting
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+            for key, call in list(leading.items()):
+                self.single_flight.finish(key, call, result=None)
+    
+    def _batch_contexts(self, queries: List[str], pending: List[Tuple[str, List[int]]], start_time: float,
+                        verbose: bool, results_for) -> Iterator[Dict]:
+        """
+        Shared retrieval and prompt building for answer_queries
+        
+        Yields results answered without generation; returns the generation
+        jobs as (key, indices, context, component_times).
+        """
+        if verbose:
+            logger.info(f"Step 1: Retrieving documents for {len(pending)} queries...")
+        
+        # Shared retrieval stage
+        retrieval_start = time.time()
+        try:
+            pending_queries = [queries[indices[0]] for _, indices in pending]
+            query_embeddings = self.vector_store.embed_queries(pending_queries)
             
-            # Calculate confidence score (if enabled)
-            confidence = None
-            if config.ENABLE_CONFIDENCE_SCORING:
-                logger.info("Calculating confidence score...")
-                confidence = self.confidence_scorer.calculate_confidence(
-                    query, answer, docs, retrieval_scores
-                )
-                logger.info(f"Confidence calculated: {confidence}")
-            else:
-                logger.debug("Confidence scoring disabled in config")
+            if self.cache.semantic_enabled:
+                remaining = []
+                for (key, indices), query_embedding in zip(pending, query_embeddings):
+                    cached_result = self._semantic_cache_answer(queries[indices[0]], query_embedding, start_time)
+                    if cached_result:
+                        yield from results_for(key, indices, cached_result)
+                    else:
+                        remaining.append(((key, indices), query_embedding))
+                pending = [group for group, _ in remaining]
+                query_embeddings = [query_embedding for _, query_embedding in remaining]
+                if not pending:
+                    return []
             
+            pending_queries = [queries[indices[0]] for _, indices in pending]
+            docs_lists = self.retrieve_batch(pending_queries, k=5, query_embeddings=query_embeddings)
+        except Exception as e:
+            for key, indices in pending:
+                yield from results_for(key, indices, self._query_error(queries[indices[0]], e, start_time, {}))
+            return []
+        
+        retrieval_time = time.time() - retrieval_start
+        logger.info(f"Batch retrieval for {len(pending)} queries completed in {retrieval_time:.2f}s")
+        
+        # Prompts; the shared retrieval time is amortized over the queries
+        jobs = []
+        for (key, indices), query_embedding, docs in zip(pending, query_embeddings, docs_lists):
+            query = queries[indices[0]]
+            component_times = {'retrieval': retrieval_time / len(pending)}
+            try:
+                early_result, context = self._build_context(query, docs, query_embedding, start_time,
+                                                            component_times, verbose)
+            except Exception as e:
+                early_result = self._query_error(query, e, start_time, component_times)
+            if early_result is not None:
+                yield from results_for(key, indices, early_result)
+            else:
+                jobs.append((key, indices, context, component_times))
+        return jobs
+    
+    def _prepare_answer(
+        self,
+        query: str,
+        start_time: float,
+        component_times: Dict[str, float],
+        verbose: bool = False
+    ) -> Tuple[Optional[Dict], Optional[Tuple[List, str, List[float], Optional[List[float]]]]]:
+        """
+        Run everything before generation: checks, cache lookup, retrieval, prompt
+        
+        Returns:
+            (early_result, None) when the query is answered without the LLM,
+            otherwise (None, (docs, prompt, retrieval_scores, query_embedding))
+        """
+        logger.debug(f"Query: {query}")
+        
+        early_result = self._early_answer(query, start_time)
+        if early_result is not None:
+            return early_result, None
+        
+        if verbose:
+            logger.info(f"Step 1: Retrieving documents...")
+        
+        retrieval_start = time.time()
+        
+        # Semantic cache tier: embed once, reuse the vector for retrieval on a miss
+        query_embedding = None
+        if self.cache.semantic_enabled:
+            query_embedding = self.vector_store.embed_query(query)
+            cached_result = self._semantic_cache_answer(query, query_embedding, start_time)
+            if cached_result:
+                return cached_result, None
+        
+        # Retrieve documents
+        docs = self.retrieve(query, k=5, query_embedding=query_embedding)
+        retrieval_time = time.time() - retrieval_start
+        component_times['retrieval'] = retrieval_time
+        logger.info(f"Retrieval completed in {retrieval_time:.2f}s")
+        
+        return self._build_context(query, docs, query_embedding, start_time, component_times, verbose)
+    
+    def _early_answer(self, query: str, start_time: float) -> Optional[Dict]:
+        """Answers that need no retrieval: not initialized, off-topic, cache hit"""
+        # Check initialization
+        if not self.retriever:
+            logger.warning("WARNING: No documents processed yet")
+            result = {
+                'status': 'error',
+                'query': query,
+                'answer': 'Please process documents first using process_documents()',
+                'sources': [],
+                'time': f"{time.time() - start_time:.2f}s",
+                'error': 'No documents loaded'
+            }
+            self.metrics.record_query(query, False, time.time() - start_time, error='No documents loaded')
+            return result
+        
+        # Detect off-topic queries (before retrieval to save time)
+        if self._is_off_topic(query):
+            logger.info(f"Off-topic query detected: {query}")
             result = {
                 'status': 'success',
                 'query': query,
-                'answer': answer,
-                'sources': sources,
+                'answer': 'I am a technical assistant for Bose Professional Audio equipment. I can only answer questions about Bose audio products, specifications, installation, and troubleshooting. Please ask me about Bose audio systems.',
+                'sources': [],
                 'model': 'phi-2',
-                'time': f"{elapsed_time:.2f}s",
-                'cache_hit': False
+                'time': f"{time.time() - start_time:.2f}s"
             }
-            
-            # Add confidence if calculated
-            if confidence:
-                logger.info(f"Adding confidence to result: {confidence}")
-                result['confidence'] = confidence
-                result['confidence_recommendation'] = self.confidence_scorer.get_recommendation(confidence)
-            else:
-                logger.warning("No confidence score to add to result")
-            
-            # Cache result (if enabled)
-            if config.ENABLE_QUERY_CACHE:
-                self.cache.set(query, result)
-            
-            # Record metrics (if enabled)
-            self.metrics.record_query(
-                query, 
-                True, 
-                elapsed_time,
-                cache_hit=False,
-                retrieval_scores=retrieval_scores,
-                confidence=confidence.get('overall') if confidence else None,
-                component_times=component_times
-            )
-            
-            logger.info(f"SUCCESS: Query answered in {elapsed_time:.2f}s")
-            
+            if config.ENABLE_CONFIDENCE_SCORING:
+                result['confidence'] = {
+                    'overall': 0.0,
+                    'label': 'very_low',
+                    'breakdown': {'retrieval': 0.0, 'grounding': 0.0, 'specificity': 0.0, 'uncertainty': 0.0},
+                    'explanation': 'Off-topic query - not related to Bose audio equipment.',
+                    'enabled': True
+                }
+            self.metrics.record_query(query, True, time.time() - start_time)
             return result
         
-        except Exception as e:
-            logger.error(f"ERROR: Query processing failed: {str(e)}")
-            
-            error_handler.handle_error(
-                ErrorType.RETRIEVAL_ERROR,
-                e,
-                context={'query': query}
+        # Check cache first (if enabled)
+        cached_result = self.cache.get(query, self.cache_context())
+        if cached_result:
+            cache_hit_time = time.time() - start_time
+            # Update cache indicators and timing
+            cached_result['cache_hit'] = True
+            cached_result['time'] = f"{cache_hit_time:.2f}s"
+            self.metrics.record_query(query, True, cache_hit_time, cache_hit=True)
+            logger.info(f"Cache HIT: Query answered in {cache_hit_time:.2f}s")
+            return cached_result
+        
+        # Spec lookups / comparisons read straight from the spec table store
+        if self.spec_store and self.prompt_builder.template_name(query) != 'procedure':
+            return self._spec_store_answer(query, start_time)
+        
+        return None
+    
+    def _spec_store_answer(self, query: str, start_time: float) -> Optional[Dict]:
+        """Answer from stored spec table rows, or None to retrieve and generate"""
+        lookup_start = time.time()
+        found = self.spec_store.answer(query)
+        if found is None:
+            return None
+        
+        component_times = {'spec_lookup': time.time() - lookup_start}
+        # Rows stand in for retrieved chunks (sources, confidence, cache invalidation)
+        docs = [
+            Document(
+                page_content=f"{row['product_label']} {row['attribute_label']}: {row['value']}",
+                metadata={'source': row['source'], 'page': row['page'], 'content_type': 'TABLE'}
             )
-            
-            self.metrics.record_query(query, False, time.time() - start_time, 
-                                     error=str(e), component_times=component_times)
-            
-            return {
-                'status': 'error',
+            for row in found['rows']
+        ]
+        logger.info(f"Spec table store answered: {query}")
+        return self._finalize_answer(query, found['answer'], docs, [1.0] * len(docs), start_time,
+                                     component_times, model='spec_table')
+    
+    def _semantic_cache_answer(self, query: str, query_embedding: List[float], start_time: float) -> Optional[Dict]:
+        """Cached answer for a paraphrase of an earlier query (semantic tier)"""
+        cached_result = self.cache.get_similar(query, query_embedding, self.cache_context())
+        if cached_result:
+            cache_hit_time = time.time() - start_time
+            cached_result['cache_hit'] = True
+            cached_result['time'] = f"{cache_hit_time:.2f}s"
+            self.metrics.record_query(query, True, cache_hit_time, cache_hit=True)
+            logger.info(f"Cache SEMANTIC HIT: Query answered in {cache_hit_time:.2f}s")
+        return cached_result
+    
+    def _build_context(
+        self,
+        query: str,
+        docs: List,
+        query_embedding: Optional[List[float]],
+        start_time: float,
+        component_times: Dict[str, float],
+        verbose: bool = False
+    ) -> Tuple[Optional[Dict], Optional[Tuple[List, str, List[float], Optional[List[float]]]]]:
+        """No-context answer, or (docs, prompt, retrieval_scores, query_embedding) for generation"""
+        if not docs:
+            logger.warning(f"WARNING: No relevant documents found for query: {query}")
+            result = {
+                'status': 'no_context',
                 'query': query,
-                'answer': f"Error processing query: {str(e)}",
+                'answer': (
+                    "No relevant information found in the documents. "
+                    "Try rephrasing your question or ask about: "
+                    "specifications, installation, configuration, or features."
+                ),
                 'sources': [],
                 'time': f"{time.time() - start_time:.2f}s",
-                'error': str(e),
                 'cache_hit': False
             }
+            self.metrics.record_query(query, False, time.time() - start_time, 
+                                     component_times=component_times)
+            return result, None
+        
+        # Extract retrieval scores for confidence calculation
+        retrieval_scores = [doc.metadata.get('vector_score', 0.5) for doc in docs]
+        
+        if verbose:
+            logger.info(f"SUCCESS: Retrieved {len(docs)} relevant documents in {component_times.get('retrieval', 0.0):.2f}s")
+        
+        # Spec lookups with one clearly matching value skip generation
+        if self.extractive_answerer and self.prompt_builder.template_name(query) == 'specification':
+            extract_start = time.time()
+            extracted = self.extractive_answerer.answer(query, docs)
+            component_times['extraction'] = time.time() - extract_start
+            if extracted is not None:
+                return self._finalize_answer(query, extracted['answer'], docs, retrieval_scores, start_time,
+                                             component_times, query_embedding, model='extractive'), None
+        
+        if verbose:
+            logger.info(f"Step 2: Building prompt...")
+        
+        # Build prompt
+        prompt_start = time.time()
+        prompt = self.prompt_builder.build_prompt(query, docs)
+        prompt_time = time.time() - prompt_start
+        component_times['prompt'] = prompt_time
+        logger.info(f"Prompt built in {prompt_time:.2f}s")
+        
+        return None, (docs, prompt, retrieval_scores, query_embedding)
+    
+    def _build_sources(self, docs: List) -> List[Dict]:
+        """Source citations for retrieved documents"""
+        sources = []
+        for doc in docs:
+            sources.append({
+                'page': doc.metadata.get('page'),
+                'content_type': doc.metadata.get('content_type'),
+                'source': doc.metadata.get('source')
+            })
+        return sources
+    
+    def _finalize_answer(
+        self,
+        query: str,
+        answer: str,
+        docs: List,
+        retrieval_scores: List[float],
+        start_time: float,
+        component_times: Dict[str, float],
+        query_embedding: Optional[List[float]] = None,
+        model: str = 'phi-2'
+    ) -> Dict:
+        """Build result dict, score confidence, cache and record metrics"""
+        
+        # Format response
+        elapsed_time = time.time() - start_time
+        
+        # Build sources
+        sources = self._build_sources(docs)
+        
+        # Calculate confidence score (if enabled)
+        confidence = None
+        if config.ENABLE_CONFIDENCE_SCORING:
+            logger.info("Calculating confidence score...")
+            confidence = self.confidence_scorer.calculate_confidence(
+                query, answer, docs, retrieval_scores
+            )
+            logger.info(f"Confidence calculated: {confidence}")
+        else:
+            logger.debug("Confidence scoring disabled in config")
+        
+        result = {
+            'status': 'success',
+            'query': query,
+            'answer': answer,
+            'sources': sources,
+            'model': model,
+            'time': f"{elapsed_time:.2f}s",
+            'cache_hit': False,
+            'collection_version': self.vector_store.version.version
+        }
+        
+        # Add confidence if calculated
+        if confidence:
+            logger.info(f"Adding confidence to result: {confidence}")
+            result['confidence'] = confidence
+            result['confidence_recommendation'] = self.confidence_scorer.get_recommendation(confidence)
+        else:
+            logger.warning("No confidence score to add to result")
+        
+        # Cache result (if enabled)
+        if config.ENABLE_QUERY_CACHE:
+            self.cache.set(query, result, self.cache_context(), query_embedding=query_embedding)
+        
+        # Record metrics (if enabled)
+        self.metrics.record_query(
+            query, 
+            True, 
+            elapsed_time,
+            cache_hit=False,
+            retrieval_scores=retrieval_scores,
+            confidence=confidence.get('overall') if confidence else None,
+            component_times=component_times
+        )
+        
+        logger.info(f"SUCCESS: Query answered in {elapsed_time:.2f}s")
+        
+        return result
+    
+    def _query_error(
+        self,
+        query: str,
+        error: Exception,
+        start_time: float,
+        component_times: Dict[str, float]
+    ) -> Dict:
+        """Handle a failed query: log, record metrics and build error result"""
+        logger.error(f"ERROR: Query processing failed: {str(error)}")
+        
+        error_handler.handle_error(
+            ErrorType.RETRIEVAL_ERROR,
+            error,
+            context={'query': query}
+        )
+        
+        self.metrics.record_query(query, False, time.time() - start_time, 
+                                 error=str(error), component_times=component_times)
+        
+        return {
+            'status': 'error',
+            'query': query,
+            'answer': f"Error processing query: {str(error)}",
+            'sources': [],
+            'time': f"{time.time() - start_time:.2f}s",
+            'error': str(error),
+            'cache_hit': False
+        }
     
     def interactive_session(self):
         """Interactive Q&A session with error handling"""
@@ -525,6 +1225,8 @@ class BoseRAGPhi:
             'retriever_type': 'hybrid' if config.ENABLE_HYBRID_SEARCH else 'standard',
             'enhancements': {
                 'hybrid_search': config.ENABLE_HYBRID_SEARCH,
+                'reranker': self.reranker is not None,
+                'spec_store': self.spec_store is not None,
                 'query_cache': config.ENABLE_QUERY_CACHE,
                 'confidence_scoring': config.ENABLE_CONFIDENCE_SCORING,
                 'metrics': config.ENABLE_METRICS
@@ -546,16 +1248,29 @@ class BoseRAGPhi:
             'enabled': True,
             'summary': self.metrics.get_summary(),
             'recent_queries': self.metrics.get_recent_queries(limit=10),
-            'time_series': self.metrics.get_time_series(interval_minutes=5)
+            'time_series': self.metrics.get_time_series(interval_minutes=5),
+            'single_flight': self.single_flight.get_stats(),
+            'embedding_batcher': (
+                self.vector_store.embedding_batcher.get_stats() if self.vector_store.embedding_batcher else None
+            ),
+            'reranker': self.reranker.get_stats() if self.reranker else None,
+            'spec_store': self.spec_store.get_stats() if self.spec_store else None,
+            'prompt_eval': self.llm.get_prompt_stats()
         }
     
     def get_cache_stats(self) -> Dict:
         """Get cache statistics (if enabled)"""
+        embedding_cache = self.vector_store.embedding_cache
+        embedding_stats = embedding_cache.get_stats() if embedding_cache else None
+        retrieval_stats = self.retrieval_cache.get_stats() if self.retrieval_cache else None
+        
         if not config.ENABLE_QUERY_CACHE:
-            return {'enabled': False}
+            return {'enabled': False, 'embedding_cache': embedding_stats, 'retrieval_cache': retrieval_stats}
         
         stats = self.cache.get_stats()
         stats['recent_queries'] = self.cache.get_recent_queries(limit=10)
+        stats['embedding_cache'] = embedding_stats
+        stats['retrieval_cache'] = retrieval_stats
         return stats
     
     def clear_cache(self):
@@ -563,3 +1278,12 @@ class BoseRAGPhi:
         if config.ENABLE_QUERY_CACHE:
             self.cache.clear()
             logger.info("Cache cleared by user request")
+        if self.retrieval_cache:
+            self.retrieval_cache.clear()
+    
+    def close(self):
+        """Persist pending index state and stop background workers on shutdown"""
+        if isinstance(self.retriever, HybridRetriever):
+            self.retriever.flush_snapshot()
+        if self.vector_store.embedding_batcher:
+            self.vector_store.embedding_batcher.close()
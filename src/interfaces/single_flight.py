@@ -0,0 +1,85 @@
+"""
+Single-flight request coalescing
+Concurrent calls with the same key share one computation
+"""
+from typing import Any, Dict, Optional, Tuple
+import threading
+
+from src.error_handling.logger import logger
+
+
+class _Call:
+    """One in-flight computation and its outcome"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """
+    Deduplicate identical in-flight work
+
+    The first caller for a key (the leader) runs the computation; callers
+    arriving before it finishes block and receive the leader's result (or
+    exception). Nothing is retained after completion - caching is separate.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            'leaders': 0,
+            'coalesced': 0
+        }
+
+    def begin(self, key: str) -> Tuple[_Call, bool]:
+        """
+        Join or start the flight for key
+
+        Returns:
+            (call, is_leader). The leader must call finish(); followers wait().
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.followers += 1
+                self.stats['coalesced'] += 1
+                return call, False
+
+            call = _Call()
+            self._calls[key] = call
+            self.stats['leaders'] += 1
+            return call, True
+
+    def finish(self, key: str, call: _Call, result: Any = None, error: Optional[BaseException] = None):
+        """Publish the leader's outcome and release followers"""
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.result = result
+        call.error = error
+        call.done.set()
+        if call.followers:
+            logger.info(f"Single-flight: {call.followers} coalesced request(s) served by one computation")
+
+    @staticmethod
+    def wait(call: _Call, timeout: Optional[float] = None) -> Any:
+        """
+        Block until the leader finishes
+
+        Raises:
+            The leader's exception, or TimeoutError
+        """
+        if not call.done.wait(timeout):
+            raise TimeoutError("Timed out waiting for in-flight identical query")
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def get_stats(self) -> Dict[str, int]:
+        """Leader/coalesced counts and current in-flight keys"""
+        with self._lock:
+            return {**self.stats, 'in_flight': len(self._calls)}
@@ -45,6 +45,7 @@ class MetricsCollector:
             'failed_queries': 0,
             'cache_hits': 0,
             'cache_misses': 0,
+            'coalesced_requests': 0,
             'total_latency': 0.0,
             'total_tokens': 0,
             'errors_by_type': defaultdict(int)
@@ -55,6 +56,7 @@ class MetricsCollector:
             'retrieval': [],
             'embedding': [],
             'llm_generation': [],
+            'time_to_first_token': [],
             'total': []
         }
         
@@ -76,7 +78,8 @@ class MetricsCollector:
         tokens_used: Optional[int] = None,
         confidence: Optional[float] = None,
         error: Optional[str] = None,
-        component_times: Optional[Dict[str, float]] = None
+        component_times: Optional[Dict[str, float]] = None,
+        coalesced: bool = False
     ):
         """
         Record a query execution
@@ -91,6 +94,7 @@ class MetricsCollector:
             confidence: Confidence score (0-1)
             error: Error message if failed
             component_times: Dict of component execution times
+            coalesced: Whether result was shared from an identical in-flight query
         """
         if not self.enable_metrics:
             return
@@ -109,6 +113,9 @@ class MetricsCollector:
         else:
             self.metrics['cache_misses'] += 1
         
+        if coalesced:
+            self.metrics['coalesced_requests'] += 1
+        
         self.metrics['total_latency'] += latency
         
         if tokens_used:
@@ -121,6 +128,7 @@ class MetricsCollector:
             'success': success,
             'latency': round(latency, 3),
             'cache_hit': cache_hit,
+            'coalesced': coalesced,
             'retrieval_scores': retrieval_scores,
             'tokens_used': tokens_used,
             'confidence': confidence,
@@ -209,6 +217,10 @@ class MetricsCollector:
                 'misses': self.metrics['cache_misses'],
                 'hit_rate': round(cache_hit_rate, 2)
             },
+            'coalescing': {
+                'coalesced_requests': self.metrics['coalesced_requests'],
+                'coalesced_rate': round(self.metrics['coalesced_requests'] / total * 100, 2)
+            },
             'latency': {
                 'average': round(avg_latency, 3),
                 **latency_stats
@@ -285,6 +297,7 @@ class MetricsCollector:
             'failed_queries': 0,
             'cache_hits': 0,
             'cache_misses': 0,
+            'coalesced_requests': 0,
             'total_latency': 0.0,
             'total_tokens': 0,
             'errors_by_type': defaultdict(int)
@@ -293,6 +306,7 @@ class MetricsCollector:
             'retrieval': [],
             'embedding': [],
             'llm_generation': [],
+            'time_to_first_token': [],
             'total': []
         }
         self.start_time = datetime.now()
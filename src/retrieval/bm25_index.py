@@ -0,0 +1,493 @@
+"""
+Incremental BM25 index for hybrid retrieval
+Vectorized CSR scoring over a compacted base segment, plus a small
+in-memory delta segment so adding or removing chunks costs time
+proportional to those chunks, not the corpus
+"""
+from typing import Dict, List, Optional, Tuple, Iterable
+from collections import Counter
+import heapq
+import math
+import threading
+
+import numpy as np
+from langchain_core.documents import Document
+
+
+def tokenize(text: str) -> List[str]:
+    """Tokenize text for BM25 (lowercase + whitespace split)"""
+    return text.lower().split()
+
+
+class IncrementalBM25:
+    """
+    BM25 (Okapi) index that supports add/remove by chunk ID
+
+    Two segments:
+    - Base: term-major CSR matrix (indptr / doc ordinals / term
+      frequencies as NumPy arrays). Scoring a query term is one
+      vectorized slice, and top-k uses argpartition instead of a full
+      sort. Removed base docs are tombstoned in an alive mask.
+    - Delta: dict inverted index (term -> {doc_id: tf}) for chunks added
+      since the last compaction.
+
+    compact() folds the delta and tombstones into a new base with NumPy
+    (sort by term), and runs automatically once the delta outgrows
+    merge_ratio of the base. Document frequency and average length are
+    kept exact across both segments, so scores match a fresh rebuild.
+
+    IDF uses the non-negative form log(1 + (N - df + 0.5) / (df + 0.5)),
+    which keeps scores stable without rank_bm25's corpus-wide epsilon floor.
+
+    Thread-safe: every public method holds one re-entrant lock, so
+    queries never see a half-installed segment while chunks are being
+    added, removed or compacted.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, merge_ratio: float = 0.1):
+        """
+        Initialize empty index
+
+        Args:
+            k1: Term frequency saturation
+            b: Length normalization strength
+            merge_ratio: Compact once delta docs exceed this fraction of base docs
+        """
+        self.k1 = k1
+        self.b = b
+        self.merge_ratio = merge_ratio
+        self._lock = threading.RLock()
+        # Incremented by every compaction (snapshots are written after one)
+        self.compactions = 0
+
+        # Base segment (CSR, may be memory-mapped from a snapshot)
+        self._base_terms: Dict[str, int] = {}
+        self._base_indptr = np.zeros(1, dtype=np.int64)
+        self._base_docs = np.zeros(0, dtype=np.int32)
+        self._base_tf = np.zeros(0, dtype=np.int32)
+        self._base_ids: List[str] = []
+        self._base_lengths = np.zeros(0, dtype=np.int32)
+        self._base_alive = np.zeros(0, dtype=bool)
+        self._base_ordinals: Dict[str, int] = {}
+        self._base_removed_df: Counter = Counter()
+
+        # Delta segment
+        self._delta_postings: Dict[str, Dict[str, int]] = {}
+
+        # All live chunks
+        self.doc_lengths: Dict[str, int] = {}
+        self.documents: Dict[str, Document] = {}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self.doc_lengths)
+
+    def __contains__(self, doc_id: str) -> bool:
+        with self._lock:
+            return doc_id in self.doc_lengths
+
+    @property
+    def avg_doc_length(self) -> float:
+        """Average document length in tokens"""
+        return self.total_length / len(self.doc_lengths) if self.doc_lengths else 0.0
+
+    @property
+    def delta_size(self) -> int:
+        """Number of live chunks not yet compacted into the base segment"""
+        return len(self.doc_lengths) - len(self._base_ordinals)
+
+    def add(self, doc_id: str, document: Document):
+        """
+        Add (or replace) a single chunk
+
+        Args:
+            doc_id: Stable chunk ID (same as the vector store ID)
+            document: Chunk content and metadata
+        """
+        with self._lock:
+            if doc_id in self.doc_lengths:
+                self.remove(doc_id)
+
+            tokens = tokenize(document.page_content)
+            for term, tf in Counter(tokens).items():
+                self._delta_postings.setdefault(term, {})[doc_id] = tf
+
+            self.doc_lengths[doc_id] = len(tokens)
+            self.documents[doc_id] = document
+            self.total_length += len(tokens)
+
+    def add_documents(self, doc_ids: Iterable[str], documents: Iterable[Document]) -> int:
+        """Add many chunks; returns number added"""
+        with self._lock:
+            count = 0
+            for doc_id, document in zip(doc_ids, documents):
+                self.add(doc_id, document)
+                count += 1
+            self._maybe_compact()
+            return count
+
+    def remove(self, doc_id: str) -> bool:
+        """
+        Remove a chunk and update document frequencies in place
+
+        Returns:
+            True if the chunk was indexed
+        """
+        with self._lock:
+            document = self.documents.pop(doc_id, None)
+            if document is None:
+                return False
+
+            terms = set(tokenize(document.page_content))
+            ordinal = self._base_ordinals.pop(doc_id, None)
+
+            if ordinal is not None:
+                # Tombstone in base; df correction per term
+                self._base_alive[ordinal] = False
+                self._base_removed_df.update(terms)
+            else:
+                for term in terms:
+                    term_postings = self._delta_postings.get(term)
+                    if term_postings is None:
+                        continue
+                    term_postings.pop(doc_id, None)
+                    if not term_postings:
+                        del self._delta_postings[term]
+
+            self.total_length -= self.doc_lengths.pop(doc_id)
+            return True
+
+    def remove_documents(self, doc_ids: Iterable[str]) -> int:
+        """Remove many chunks; returns number removed"""
+        with self._lock:
+            removed = sum(1 for doc_id in doc_ids if self.remove(doc_id))
+            self._maybe_compact()
+            return removed
+
+    def df(self, term: str) -> int:
+        """Number of live documents containing a term"""
+        with self._lock:
+            count = len(self._delta_postings.get(term, ()))
+            row = self._base_terms.get(term)
+            if row is not None:
+                count += int(self._base_indptr[row + 1] - self._base_indptr[row])
+                count -= self._base_removed_df.get(term, 0)
+            return count
+
+    def idf(self, term: str) -> float:
+        """Inverse document frequency for a term"""
+        with self._lock:
+            df = self.df(term)
+            if df <= 0:
+                return 0.0
+            n = len(self.doc_lengths)
+            return math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+
+    def top_k(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """
+        Top-k (doc_id, score) pairs for a query, highest score first
+
+        Only documents with a positive score are returned.
+
+        Args:
+            query: Raw query text
+            k: Number of results
+        """
+        with self._lock:
+            if k <= 0 or not self.doc_lengths:
+                return []
+
+            query_terms = Counter(tokenize(query))
+            avgdl = self.avg_doc_length or 1.0
+            k1, b = self.k1, self.b
+
+            base_scores = np.zeros(len(self._base_ids), dtype=np.float64)
+            base_norm = None
+            delta_scores: Dict[str, float] = {}
+
+            for term, query_tf in query_terms.items():
+                idf = self.idf(term)
+                if idf == 0.0:
+                    continue
+                weight = query_tf * idf * (k1 + 1.0)
+
+                row = self._base_terms.get(term)
+                if row is not None:
+                    start, end = self._base_indptr[row], self._base_indptr[row + 1]
+                    docs = self._base_docs[start:end]
+                    tf = self._base_tf[start:end].astype(np.float64)
+                    if base_norm is None:
+                        base_norm = k1 * (1.0 - b + b * self._base_lengths / avgdl)
+                    # Doc ordinals are unique within a term row, so fancy-index += is safe
+                    base_scores[docs] += weight * tf / (tf + base_norm[docs])
+
+                for doc_id, tf in self._delta_postings.get(term, {}).items():
+                    norm = k1 * (1.0 - b + b * self.doc_lengths[doc_id] / avgdl)
+                    delta_scores[doc_id] = delta_scores.get(doc_id, 0.0) + weight * tf / (tf + norm)
+
+            results: List[Tuple[str, float]] = []
+
+            if base_norm is not None:
+                base_scores[~self._base_alive] = 0.0
+                candidates = np.flatnonzero(base_scores > 0)
+                if len(candidates) > k:
+                    candidates = candidates[np.argpartition(-base_scores[candidates], k - 1)[:k]]
+                results.extend((self._base_ids[i], float(base_scores[i])) for i in candidates)
+
+            results.extend(delta_scores.items())
+            return heapq.nlargest(k, results, key=lambda item: item[1])
+
+    def top_k_batch(
+        self,
+        queries: List[str],
+        k: int,
+        max_block_cells: int = 4_000_000
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        top_k for many queries at once
+
+        Each distinct term's postings are scored once for the whole batch
+        (IDF, length normalization, saturation), then scattered into a
+        (queries x base docs) score matrix. Queries are processed in blocks
+        so the matrix stays under max_block_cells entries.
+
+        Args:
+            queries: Raw query texts
+            k: Number of results per query
+            max_block_cells: Upper bound on dense score matrix size per block
+
+        Returns:
+            One top_k result list per query, in input order
+        """
+        with self._lock:
+            if k <= 0 or not self.doc_lengths:
+                return [[] for _ in queries]
+
+            query_terms = [Counter(tokenize(query)) for query in queries]
+            avgdl = self.avg_doc_length or 1.0
+            k1, b = self.k1, self.b
+            n_base = len(self._base_ids)
+            base_norm = k1 * (1.0 - b + b * self._base_lengths / avgdl) if n_base else None
+
+            # Per-term contributions (query tf = 1), shared by every query using the term
+            base_contrib: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+            delta_contrib: Dict[str, Dict[str, float]] = {}
+            for term in set().union(*query_terms):
+                idf = self.idf(term)
+                if idf == 0.0:
+                    continue
+                weight = idf * (k1 + 1.0)
+
+                row = self._base_terms.get(term)
+                if row is not None and base_norm is not None:
+                    start, end = self._base_indptr[row], self._base_indptr[row + 1]
+                    docs = np.asarray(self._base_docs[start:end])
+                    tf = self._base_tf[start:end].astype(np.float64)
+                    base_contrib[term] = (docs, weight * tf / (tf + base_norm[docs]))
+
+                postings = self._delta_postings.get(term)
+                if postings:
+                    delta_contrib[term] = {
+                        doc_id: weight * tf / (tf + k1 * (1.0 - b + b * self.doc_lengths[doc_id] / avgdl))
+                        for doc_id, tf in postings.items()
+                    }
+
+            results: List[List[Tuple[str, float]]] = []
+            block_size = max(1, max_block_cells // max(1, n_base))
+
+            for offset in range(0, len(queries), block_size):
+                block = query_terms[offset:offset + block_size]
+                scores = np.zeros((len(block), n_base), dtype=np.float64)
+
+                # term -> (block rows using it, their query tf)
+                users: Dict[str, Tuple[List[int], List[int]]] = {}
+                for i, terms in enumerate(block):
+                    for term, query_tf in terms.items():
+                        if term in base_contrib:
+                            rows, tfs = users.setdefault(term, ([], []))
+                            rows.append(i)
+                            tfs.append(query_tf)
+
+                for term, (rows, tfs) in users.items():
+                    docs, contrib = base_contrib[term]
+                    # Rows and doc ordinals are unique per term, so fancy-index += is safe
+                    scores[np.asarray(rows)[:, None], docs[None, :]] += np.asarray(tfs, dtype=np.float64)[:, None] * contrib
+
+                if n_base:
+                    scores[:, ~self._base_alive] = 0.0
+
+                for i, terms in enumerate(block):
+                    row_results: List[Tuple[str, float]] = []
+                    if n_base:
+                        row_scores = scores[i]
+                        candidates = np.flatnonzero(row_scores > 0)
+                        if len(candidates) > k:
+                            candidates = candidates[np.argpartition(-row_scores[candidates], k - 1)[:k]]
+                        row_results.extend((self._base_ids[j], float(row_scores[j])) for j in candidates)
+
+                    delta_scores: Dict[str, float] = {}
+                    for term, query_tf in terms.items():
+                        for doc_id, contrib in delta_contrib.get(term, {}).items():
+                            delta_scores[doc_id] = delta_scores.get(doc_id, 0.0) + query_tf * contrib
+                    row_results.extend(delta_scores.items())
+
+                    results.append(heapq.nlargest(k, row_results, key=lambda item: item[1]))
+
+            return results
+
+    def get_document(self, doc_id: str) -> Optional[Document]:
+        """Get an indexed chunk by ID"""
+        with self._lock:
+            return self.documents.get(doc_id)
+
+    def _maybe_compact(self):
+        """Compact once the delta segment or tombstones outgrow merge_ratio"""
+        base_size = len(self._base_ids)
+        dirty = self.delta_size + (base_size - len(self._base_ordinals))
+        if dirty and (base_size == 0 or dirty > self.merge_ratio * base_size):
+            self.compact()
+
+    def compact(self):
+        """
+        Merge delta segment and tombstones into a new base CSR segment
+
+        Base postings are filtered and re-labelled with NumPy; only delta
+        postings are walked in Python.
+        """
+        with self._lock:
+            # Surviving base docs get new consecutive ordinals
+            alive = np.asarray(self._base_alive, dtype=bool)
+            new_ordinal = np.cumsum(alive, dtype=np.int64) - 1
+            base_ids = [doc_id for doc_id, keep in zip(self._base_ids, alive.tolist()) if keep]
+
+            # Base postings as (term_row, doc, tf) triples, dead docs dropped
+            n_base_terms = len(self._base_terms)
+            term_rows = np.repeat(np.arange(n_base_terms, dtype=np.int64), np.diff(self._base_indptr))
+            keep = alive[self._base_docs] if len(self._base_docs) else np.zeros(0, dtype=bool)
+            term_rows = term_rows[keep]
+            docs = new_ordinal[self._base_docs[keep]]
+            tfs = np.asarray(self._base_tf)[keep]
+
+            # Delta docs appended after surviving base docs
+            delta_ids = [doc_id for doc_id in self.doc_lengths if doc_id not in self._base_ordinals]
+            delta_ordinals = {doc_id: len(base_ids) + i for i, doc_id in enumerate(delta_ids)}
+
+            terms = dict(self._base_terms)
+            delta_rows, delta_docs, delta_tfs = [], [], []
+            for term, term_postings in self._delta_postings.items():
+                row = terms.setdefault(term, len(terms))
+                for doc_id, tf in term_postings.items():
+                    delta_rows.append(row)
+                    delta_docs.append(delta_ordinals[doc_id])
+                    delta_tfs.append(tf)
+
+            term_rows = np.concatenate([term_rows, np.asarray(delta_rows, dtype=np.int64)])
+            docs = np.concatenate([docs, np.asarray(delta_docs, dtype=np.int64)])
+            tfs = np.concatenate([tfs, np.asarray(delta_tfs, dtype=np.int32)])
+
+            # Drop terms with no live postings and renumber rows
+            counts = np.bincount(term_rows, minlength=len(terms))
+            live_terms = counts > 0
+            row_map = np.cumsum(live_terms, dtype=np.int64) - 1
+            term_rows = row_map[term_rows]
+
+            order = np.argsort(term_rows, kind='stable')
+            indptr = np.zeros(int(live_terms.sum()) + 1, dtype=np.int64)
+            np.cumsum(counts[live_terms], out=indptr[1:])
+
+            term_list = [None] * len(terms)
+            for term, row in terms.items():
+                term_list[row] = term
+
+            all_ids = base_ids + delta_ids
+            self._set_base(
+                terms=[term for term, live in zip(term_list, live_terms.tolist()) if live],
+                indptr=indptr,
+                docs=docs[order].astype(np.int32),
+                tfs=tfs[order].astype(np.int32),
+                doc_ids=all_ids,
+                lengths=np.asarray([self.doc_lengths[doc_id] for doc_id in all_ids], dtype=np.int32)
+            )
+            self._delta_postings = {}
+            self.compactions += 1
+
+    def _set_base(
+        self,
+        terms: List[str],
+        indptr: np.ndarray,
+        docs: np.ndarray,
+        tfs: np.ndarray,
+        doc_ids: List[str],
+        lengths: np.ndarray
+    ):
+        """Install a base CSR segment (arrays may be memory-mapped)"""
+        self._base_terms = {term: row for row, term in enumerate(terms)}
+        self._base_indptr = indptr
+        self._base_docs = docs
+        self._base_tf = tfs
+        self._base_ids = doc_ids
+        self._base_lengths = lengths
+        self._base_alive = np.ones(len(doc_ids), dtype=bool)
+        self._base_ordinals = {doc_id: i for i, doc_id in enumerate(doc_ids)}
+        self._base_removed_df = Counter()
+
+    def segment(self) -> Dict:
+        """
+        Compacted CSR view of the whole index (for snapshots)
+
+        Taken under the index lock, so it is consistent even while other
+        threads add or remove chunks.
+
+        Returns:
+            Dict with terms, indptr, docs, tfs, doc_ids, lengths and
+            documents (chunk per doc_id, same order)
+        """
+        with self._lock:
+            if self.delta_size or len(self._base_ordinals) != len(self._base_ids):
+                self.compact()
+
+            terms = [None] * len(self._base_terms)
+            for term, row in self._base_terms.items():
+                terms[row] = term
+
+            return {
+                'terms': terms,
+                'indptr': self._base_indptr,
+                'docs': self._base_docs,
+                'tfs': self._base_tf,
+                'doc_ids': self._base_ids,
+                'lengths': self._base_lengths,
+                'documents': [self.documents[doc_id] for doc_id in self._base_ids]
+            }
+
+    @classmethod
+    def from_segment(
+        cls,
+        segment: Dict,
+        documents: Dict[str, Document],
+        k1: float = 1.5,
+        b: float = 0.75
+    ) -> 'IncrementalBM25':
+        """
+        Create an index directly from CSR arrays (no tokenization)
+
+        Args:
+            segment: Dict as returned by segment()
+            documents: Chunk documents keyed by ID
+            k1: Term frequency saturation
+            b: Length normalization strength
+        """
+        index = cls(k1=k1, b=b)
+        index._set_base(
+            terms=segment['terms'],
+            indptr=segment['indptr'],
+            docs=segment['docs'],
+            tfs=segment['tfs'],
+            doc_ids=list(segment['doc_ids']),
+            lengths=segment['lengths']
+        )
+        index.doc_lengths = dict(zip(index._base_ids, np.asarray(segment['lengths']).tolist()))
+        index.total_length = int(np.asarray(segment['lengths']).sum())
+        index.documents = documents
+        return index
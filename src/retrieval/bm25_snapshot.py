@@ -0,0 +1,249 @@
+"""
+On-disk snapshot of the BM25 index
+Avoids re-tokenizing the whole collection at startup
+
+Layout: the snapshot directory holds versioned subdirectories and a
+CURRENT file naming the live one. A save writes a new uniquely named
+subdirectory and then atomically replaces CURRENT, so readers and
+concurrent writers never see a partly written snapshot.
+
+Files of one version:
+- meta.json           fingerprint, BM25 parameters, sizes
+- terms.json          term dictionary (row i of the postings arrays)
+- doc_ids.json        chunk IDs (column j of the postings arrays)
+- documents.jsonl     chunk content + metadata, one line per doc_id
+- indptr.npy          int64[n_terms + 1] postings offsets per term
+- postings_docs.npy   int32[n_postings] document ordinals
+- postings_tf.npy     int32[n_postings] term frequencies
+- doc_lengths.npy     int32[n_docs] token counts
+
+The .npy arrays are loaded with mmap_mode='r', so they are paged in
+on demand and shared through the OS page cache.
+"""
+from typing import Iterable, Optional, Tuple
+from pathlib import Path
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.retrieval.bm25_index import IncrementalBM25
+from src.vector_store.chromadb_manager import content_digest
+from src.error_handling.logger import logger
+
+
+SNAPSHOT_VERSION = 1
+POINTER_FILE = "CURRENT"
+# Unreferenced versions older than this are left-overs of crashed saves
+STALE_VERSION_SECONDS = 3600
+
+
+def content_fingerprint(entries: Iterable[Tuple[str, str]]) -> str:
+    """Fingerprint (chunk ID, content digest) pairs (count + hash of the sorted pairs)"""
+    entries = sorted(entries)
+    digest = hashlib.sha256()
+    for doc_id, content_hash in entries:
+        digest.update(doc_id.encode())
+        digest.update(b'\0')
+        digest.update(content_hash.encode())
+        digest.update(b'\0')
+    return f"{len(entries)}:{digest.hexdigest()}"
+
+
+def documents_fingerprint(doc_ids: Iterable[str], documents: Iterable[Document]) -> str:
+    """Fingerprint of indexed chunks (same value as collection_fingerprint for the same content)"""
+    return content_fingerprint(
+        (doc_id, content_digest(doc.page_content)) for doc_id, doc in zip(doc_ids, documents)
+    )
+
+
+def collection_fingerprint(collection) -> str:
+    """
+    Fingerprint a Chroma collection (count + hash of chunk IDs and content digests)
+
+    IDs alone are not enough: legacy "doc_N" IDs say nothing about the
+    text, so a re-ingest that rewrote a chunk in place would keep the ID.
+    Digests come from the content_hash metadata stored with each chunk;
+    document text is fetched only for chunks written without it.
+    """
+    results = collection.get(include=['metadatas'])
+    entries = {}
+    for doc_id, metadata in zip(results['ids'], results['metadatas']):
+        entries[doc_id] = (metadata or {}).get('content_hash')
+
+    missing = [doc_id for doc_id, content_hash in entries.items() if not content_hash]
+    if missing:
+        legacy = collection.get(ids=missing, include=['documents'])
+        for doc_id, text in zip(legacy['ids'], legacy['documents']):
+            entries[doc_id] = content_digest(text or "")
+
+    return content_fingerprint((doc_id, content_hash or "") for doc_id, content_hash in entries.items())
+
+
+def _current_version(path: Path) -> Optional[Path]:
+    """Directory of the live snapshot version (snapshots from before CURRENT live in path itself)"""
+    try:
+        name = (path / POINTER_FILE).read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return path if (path / "meta.json").exists() else None
+    return path / name if name else None
+
+
+def save_snapshot(index: IncrementalBM25, path: Path, fingerprint: Optional[str] = None):
+    """
+    Write index snapshot as a new version and switch CURRENT to it
+
+    Args:
+        index: BM25 index to persist
+        path: Snapshot directory
+        fingerprint: Collection fingerprint the index corresponds to
+                     (default: fingerprint of the indexed chunks)
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+
+    segment = index.segment()
+    terms = segment['terms']
+    doc_ids = segment['doc_ids']
+    n_postings = len(segment['docs'])
+    fingerprint = fingerprint or documents_fingerprint(doc_ids, segment['documents'])
+
+    version_path = Path(tempfile.mkdtemp(prefix="snapshot-", dir=path))
+    try:
+        _write_version(version_path, index, segment, fingerprint)
+        previous = _current_version(path)
+        pointer_tmp = path / f"{POINTER_FILE}.{version_path.name}"
+        pointer_tmp.write_text(version_path.name, encoding="utf-8")
+        os.replace(pointer_tmp, path / POINTER_FILE)
+    except BaseException:
+        shutil.rmtree(version_path, ignore_errors=True)
+        raise
+
+    # Readers that already mapped the previous version keep their open files
+    if previous is not None and previous != path and previous != version_path:
+        shutil.rmtree(previous, ignore_errors=True)
+    _remove_stale_versions(path, keep=version_path)
+
+    logger.info(f"BM25 snapshot saved: {len(doc_ids)} docs, {len(terms)} terms, {n_postings} postings")
+
+
+def _remove_stale_versions(path: Path, keep: Path):
+    """Drop unreferenced versions left by interrupted saves (not ones still being written)"""
+    cutoff = time.time() - STALE_VERSION_SECONDS
+    for version_path in path.glob("snapshot-*"):
+        try:
+            if version_path != keep and version_path.is_dir() and version_path.stat().st_mtime < cutoff:
+                shutil.rmtree(version_path, ignore_errors=True)
+        except OSError:
+            continue
+
+
+def _write_version(tmp_path: Path, index: IncrementalBM25, segment: dict, fingerprint: str):
+    """Write the files of one snapshot version"""
+    terms = segment['terms']
+    doc_ids = segment['doc_ids']
+    n_postings = len(segment['docs'])
+
+    indptr = np.asarray(segment['indptr'], dtype=np.int64)
+    postings_docs = np.asarray(segment['docs'], dtype=np.int32)
+    postings_tf = np.asarray(segment['tfs'], dtype=np.int32)
+    doc_lengths = np.asarray(segment['lengths'], dtype=np.int32)
+
+    np.save(tmp_path / "indptr.npy", indptr)
+    np.save(tmp_path / "postings_docs.npy", postings_docs)
+    np.save(tmp_path / "postings_tf.npy", postings_tf)
+    np.save(tmp_path / "doc_lengths.npy", doc_lengths)
+
+    with open(tmp_path / "terms.json", "w", encoding="utf-8") as f:
+        json.dump(terms, f)
+    with open(tmp_path / "doc_ids.json", "w", encoding="utf-8") as f:
+        json.dump(doc_ids, f)
+    with open(tmp_path / "documents.jsonl", "w", encoding="utf-8") as f:
+        for doc in segment['documents']:
+            f.write(json.dumps({'page_content': doc.page_content, 'metadata': doc.metadata}) + "\n")
+    with open(tmp_path / "meta.json", "w", encoding="utf-8") as f:
+        json.dump({
+            'version': SNAPSHOT_VERSION,
+            'fingerprint': fingerprint,
+            'k1': index.k1,
+            'b': index.b,
+            'n_docs': len(doc_ids),
+            'n_terms': len(terms),
+            'n_postings': int(n_postings)
+        }, f)
+
+
+def load_snapshot(path: Path, fingerprint: str) -> Optional[IncrementalBM25]:
+    """
+    Load index snapshot if it matches the collection fingerprint
+
+    Args:
+        path: Snapshot directory
+        fingerprint: Current collection fingerprint
+
+    Returns:
+        Loaded index, or None if missing, stale or unreadable
+    """
+    path = _current_version(Path(path))
+    if path is None:
+        return None
+    meta_file = path / "meta.json"
+    if not meta_file.exists():
+        return None
+
+    try:
+        with open(meta_file, encoding="utf-8") as f:
+            meta = json.load(f)
+
+        if meta.get('version') != SNAPSHOT_VERSION:
+            logger.info("BM25 snapshot format changed, ignoring snapshot")
+            return None
+        if meta.get('fingerprint') != fingerprint:
+            logger.info("BM25 snapshot is stale (collection changed), ignoring snapshot")
+            return None
+
+        indptr = np.load(path / "indptr.npy", mmap_mode='r')
+        postings_docs = np.load(path / "postings_docs.npy", mmap_mode='r')
+        postings_tf = np.load(path / "postings_tf.npy", mmap_mode='r')
+        doc_lengths = np.load(path / "doc_lengths.npy", mmap_mode='r')
+
+        with open(path / "terms.json", encoding="utf-8") as f:
+            terms = json.load(f)
+        with open(path / "doc_ids.json", encoding="utf-8") as f:
+            doc_ids = json.load(f)
+
+        documents = {}
+        with open(path / "documents.jsonl", encoding="utf-8") as f:
+            for doc_id, line in zip(doc_ids, f):
+                record = json.loads(line)
+                documents[doc_id] = Document(
+                    page_content=record['page_content'],
+                    metadata=record['metadata']
+                )
+
+        # Postings stay memory-mapped and are scored in place
+        index = IncrementalBM25.from_segment(
+            {
+                'terms': terms,
+                'indptr': indptr,
+                'docs': postings_docs,
+                'tfs': postings_tf,
+                'doc_ids': doc_ids,
+                'lengths': doc_lengths
+            },
+            documents,
+            k1=meta['k1'],
+            b=meta['b']
+        )
+
+        logger.info(f"BM25 snapshot loaded: {meta['n_docs']} docs, {meta['n_terms']} terms")
+        return index
+
+    except Exception as e:
+        logger.warning(f"Failed to load BM25 snapshot, rebuilding: {str(e)}")
+        return None
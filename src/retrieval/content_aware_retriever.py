@@ -1,7 +1,7 @@
 """
 Content-aware retriever with intent detection
 """
-from typing import List
+from typing import List, Optional
 from langchain_core.documents import Document
 from src.vector_store.chromadb_manager import EnhancedChromaDB
 from src.error_handling.logger import logger
@@ -13,8 +13,8 @@ class ContentAwareRetriever:
     def __init__(self, vector_store: EnhancedChromaDB):
         self.vector_store = vector_store
     
-    def retrieve(self, query: str, k: int = 5) -> List[Document]:
-        """Retrieve relevant documents"""
+    def retrieve(self, query: str, k: int = 5, query_embedding: Optional[List[float]] = None) -> List[Document]:
+        """Retrieve relevant documents (query_embedding: precomputed, skips re-embedding)"""
         
         try:
             # Detect intent
@@ -22,18 +22,19 @@ class ContentAwareRetriever:
             logger.debug(f"Query intent: {intent}")
             
             # Search
-            results = self.vector_store.search(query, k=k)
+            results = self.vector_store.search(query, k=k, query_embedding=query_embedding)
 
             # Convert to Document objects (no reranking; preserve vector order)
             documents: List[Document] = []
             if results.get('documents') and len(results['documents']) > 0:
                 docs_list = results['documents'][0]
                 metas_list = results.get('metadatas', [[]])[0] if results.get('metadatas') else [{}] * len(docs_list)
+                ids_list = results.get('ids', [[]])[0] if results.get('ids') else [None] * len(docs_list)
 
-                for doc_text, metadata in zip(docs_list, metas_list):
+                for doc_id, doc_text, metadata in zip(ids_list, docs_list, metas_list):
                     doc = Document(
                         page_content=doc_text,
-                        metadata=metadata or {}
+                        metadata={**(metadata or {}), 'doc_id': doc_id}
                     )
                     documents.append(doc)
 
@@ -46,6 +47,29 @@ class ContentAwareRetriever:
             logger.error(f"Retrieval failed: {str(e)}")
             return []
     
+    def retrieve_batch(
+        self,
+        queries: List[str],
+        k: int = 5,
+        query_embeddings: Optional[List[List[float]]] = None
+    ) -> List[List[Document]]:
+        """Retrieve for many queries with one multi-vector search"""
+        try:
+            batch_results = self.vector_store.search_batch(queries, k=k, query_embeddings=query_embeddings)
+        except Exception as e:
+            logger.error(f"Batch retrieval failed, retrieving queries one by one: {str(e)}")
+            embeddings = query_embeddings or [None] * len(queries)
+            return [self.retrieve(query, k, embedding) for query, embedding in zip(queries, embeddings)]
+
+        batch_documents = []
+        for results in batch_results:
+            documents: List[Document] = []
+            docs_list = results['documents'][0]
+            for doc_id, doc_text, metadata in zip(results['ids'][0], docs_list, results['metadatas'][0]):
+                documents.append(Document(page_content=doc_text, metadata={**(metadata or {}), 'doc_id': doc_id}))
+            batch_documents.append(documents)
+        return batch_documents
+
     def _detect_intent(self, query: str) -> str:
         """Detect query intent"""
         
@@ -4,11 +4,13 @@ Improves retrieval for exact matches (model numbers, specs) while preserving sem
 """
 from typing import List, Dict, Optional
 from langchain_core.documents import Document
-from rank_bm25 import BM25Okapi
-import numpy as np
 
-from src.vector_store.chromadb_manager import EnhancedChromaDB
+from src.vector_store.chromadb_manager import EnhancedChromaDB, content_digest
+from src.retrieval.bm25_index import IncrementalBM25
+from src.retrieval.bm25_snapshot import collection_fingerprint, save_snapshot, load_snapshot
+from src.retrieval.reranker import CrossEncoderReranker
 from src.error_handling.logger import logger
+from config.settings import config
 
 
 class HybridRetriever:
@@ -27,7 +29,9 @@ class HybridRetriever:
         self, 
         vector_store: EnhancedChromaDB,
         alpha: float = 0.5,
-        enable_hybrid: bool = True
+        enable_hybrid: bool = True,
+        enable_snapshot: Optional[bool] = None,
+        reranker: Optional[CrossEncoderReranker] = None
     ):
         """
         Initialize hybrid retriever
@@ -39,17 +43,24 @@ class HybridRetriever:
                   0.7 = prefer semantic
                   0.3 = prefer keyword
             enable_hybrid: If False, falls back to pure vector search (backward compatible)
+            enable_snapshot: Load/save the BM25 index from disk (default: config.ENABLE_BM25_SNAPSHOT)
+            reranker: Cross-encoder applied to the fused candidates (optional)
         """
         self.vector_store = vector_store
         self.alpha = alpha
         self.enable_hybrid = enable_hybrid
+        self.reranker = reranker
+        self.enable_snapshot = config.ENABLE_BM25_SNAPSHOT if enable_snapshot is None else enable_snapshot
         
-        # BM25 index (lazy initialization)
-        self.bm25_index: Optional[BM25Okapi] = None
-        self.indexed_docs: List[Document] = []
+        # BM25 index (lazy initialization, updated incrementally afterwards)
+        self.bm25_index: Optional[IncrementalBM25] = None
+        # Updates not yet in the on-disk snapshot (written at compaction or flush_snapshot)
+        self._snapshot_dirty = False
         
         if enable_hybrid:
-            self._build_bm25_index()
+            if not self._load_bm25_snapshot():
+                self._build_bm25_index()
+                self._save_bm25_snapshot()
             logger.info(f"Hybrid retriever initialized (alpha={alpha}, hybrid={enable_hybrid})")
         else:
             logger.info("Hybrid retriever initialized in vector-only mode (backward compatible)")
@@ -58,120 +69,261 @@ class HybridRetriever:
         """Build BM25 index from all documents in vector store"""
         try:
             # Get all documents from ChromaDB
-            results = self.vector_store.collection.get()
+            results = self.vector_store.collection.get(include=['documents', 'metadatas'])
             
             if not results['documents']:
                 logger.warning("No documents found in vector store for BM25 indexing")
                 return
             
-            # Create Document objects
-            self.indexed_docs = []
-            for i, doc_text in enumerate(results['documents']):
-                metadata = results['metadatas'][i] if results['metadatas'] else {}
-                self.indexed_docs.append(Document(
+            # Index chunks under their vector store IDs
+            self.bm25_index = IncrementalBM25()
+            self.bm25_index.add_documents(results['ids'], [
+                Document(
                     page_content=doc_text,
-                    metadata=metadata
-                ))
+                    metadata=(results['metadatas'][i] if results['metadatas'] else None) or {}
+                )
+                for i, doc_text in enumerate(results['documents'])
+            ])
             
-            # Tokenize for BM25
-            tokenized_docs = [doc.page_content.lower().split() for doc in self.indexed_docs]
-            self.bm25_index = BM25Okapi(tokenized_docs)
-            
-            logger.info(f"BM25 index built with {len(self.indexed_docs)} documents")
+            logger.info(f"BM25 index built with {len(self.bm25_index)} documents")
         
         except Exception as e:
             logger.error(f"Failed to build BM25 index: {str(e)}")
             self.bm25_index = None
     
-    def retrieve(self, query: str, k: int = 5) -> List[Document]:
+    def _load_bm25_snapshot(self) -> bool:
+        """Load BM25 index from disk if it matches the collection; returns True on success"""
+        if not self.enable_snapshot:
+            return False
+        
+        try:
+            fingerprint = collection_fingerprint(self.vector_store.collection)
+            index = load_snapshot(config.BM25_SNAPSHOT_DIR, fingerprint)
+        except Exception as e:
+            logger.warning(f"BM25 snapshot check failed: {str(e)}")
+            return False
+        
+        if index is None:
+            return False
+        
+        self.bm25_index = index
+        return True
+    
+    def _save_bm25_snapshot(self):
+        """Persist BM25 index to disk (errors are logged, never raised)"""
+        if not self.enable_snapshot or self.bm25_index is None:
+            return
+        
+        try:
+            # Fingerprint of the indexed chunks: no collection scan per save
+            self._snapshot_dirty = False
+            save_snapshot(self.bm25_index, config.BM25_SNAPSHOT_DIR)
+        except Exception as e:
+            self._snapshot_dirty = True
+            logger.warning(f"Failed to save BM25 snapshot: {str(e)}")
+    
+    def _after_update(self, compactions: int):
+        """
+        Persist the snapshot only when the update compacted the index
+        
+        Compaction already costs O(corpus), so writing the snapshot then is
+        amortized; smaller updates are kept in memory until flush_snapshot().
+        """
+        self._snapshot_dirty = True
+        if self.bm25_index.compactions != compactions:
+            self._save_bm25_snapshot()
+    
+    def flush_snapshot(self):
+        """Write pending BM25 updates to the snapshot (call on shutdown)"""
+        if self._snapshot_dirty:
+            self._save_bm25_snapshot()
+    
+    @property
+    def indexed_docs(self) -> Dict[str, Document]:
+        """Chunks currently in the BM25 index, keyed by ID"""
+        return self.bm25_index.documents if self.bm25_index is not None else {}
+    
+    def add_documents(self, doc_ids: List[str], documents: List[Document]):
+        """
+        Add newly ingested chunks to the BM25 index in place
+        
+        Args:
+            doc_ids: Vector store IDs of the chunks
+            documents: Chunk documents (same order as doc_ids)
+        """
+        if not self.enable_hybrid:
+            return
+        
+        if self.bm25_index is None:
+            self.bm25_index = IncrementalBM25()
+        
+        compactions = self.bm25_index.compactions
+        added = self.bm25_index.add_documents(doc_ids, documents)
+        logger.info(f"BM25 index updated: +{added} documents ({len(self.bm25_index)} total)")
+        self._after_update(compactions)
+    
+    def remove_documents(self, doc_ids: List[str]):
+        """
+        Remove chunks from the BM25 index in place
+        
+        Args:
+            doc_ids: Vector store IDs of the chunks to drop
+        """
+        if self.bm25_index is None:
+            return
+        
+        compactions = self.bm25_index.compactions
+        removed = self.bm25_index.remove_documents(doc_ids)
+        logger.info(f"BM25 index updated: -{removed} documents ({len(self.bm25_index)} total)")
+        self._after_update(compactions)
+    
+    def retrieve(self, query: str, k: int = 5, query_embedding: Optional[List[float]] = None) -> List[Document]:
         """
         Retrieve documents using hybrid search
         
         Args:
             query: User query
             k: Number of documents to retrieve
+            query_embedding: Precomputed query embedding (skips re-embedding)
         
         Returns:
             List of documents ranked by hybrid score
         """
         # If hybrid disabled or BM25 not available, use pure vector search
         if not self.enable_hybrid or self.bm25_index is None:
-            return self._vector_search(query, k)
+            return self._vector_search(query, k, query_embedding)
         
         try:
             # Get candidates from both methods (retrieve more for fusion)
-            k_candidates = min(k * 3, len(self.indexed_docs))
+            k_fused = self._fused_count(k)
+            k_candidates = min(max(k * 3, k_fused), len(self.indexed_docs))
             
-            vector_docs = self._vector_search(query, k_candidates)
+            vector_docs = self._vector_search(query, k_candidates, query_embedding)
             bm25_docs = self._bm25_search(query, k_candidates)
             
-            # Hybrid scoring and fusion
-            hybrid_docs = self._reciprocal_rank_fusion(vector_docs, bm25_docs, k)
+            # Hybrid scoring and fusion, then optional cross-encoder re-ranking
+            hybrid_docs = self._reciprocal_rank_fusion(vector_docs, bm25_docs, k_fused)
+            if self.reranker:
+                hybrid_docs = self.reranker.rerank(query, hybrid_docs, k)
             
             logger.info(f"Hybrid retrieval: {len(hybrid_docs)} documents (alpha={self.alpha})")
             return hybrid_docs
         
         except Exception as e:
             logger.error(f"Hybrid search failed, falling back to vector search: {str(e)}")
-            return self._vector_search(query, k)
+            return self._vector_search(query, k, query_embedding)
+    
+    def retrieve_batch(
+        self,
+        queries: List[str],
+        k: int = 5,
+        query_embeddings: Optional[List[List[float]]] = None
+    ) -> List[List[Document]]:
+        """
+        Hybrid retrieval for many queries
+        
+        One multi-vector Chroma query and one batched BM25 pass cover the
+        whole batch; fusion then runs per query.
+        
+        Args:
+            queries: User queries
+            k: Number of documents per query
+            query_embeddings: Precomputed query embeddings (skips re-embedding)
+        
+        Returns:
+            One ranked document list per query, in input order
+        """
+        if not queries:
+            return []
+        
+        use_bm25 = self.enable_hybrid and self.bm25_index is not None
+        k_fused = self._fused_count(k)
+        k_candidates = min(max(k * 3, k_fused), len(self.indexed_docs)) if use_bm25 else k
+        
+        try:
+            vector_results = self.vector_store.search_batch(queries, k=k_candidates, query_embeddings=query_embeddings)
+            vector_docs = [self._vector_documents(results) for results in vector_results]
+        except Exception as e:
+            logger.error(f"Batch vector search failed, retrieving queries one by one: {str(e)}")
+            embeddings = query_embeddings or [None] * len(queries)
+            return [self.retrieve(query, k, embedding) for query, embedding in zip(queries, embeddings)]
+        
+        if not use_bm25:
+            return [docs[:k] for docs in vector_docs]
+        
+        try:
+            bm25_docs = [self._bm25_documents(top_k) for top_k in self.bm25_index.top_k_batch(queries, k_candidates)]
+        except Exception as e:
+            logger.error(f"Batch BM25 search failed, falling back to vector search: {str(e)}")
+            return [docs[:k] for docs in vector_docs]
+        
+        results = [self._reciprocal_rank_fusion(vec, bm25, k_fused) for vec, bm25 in zip(vector_docs, bm25_docs)]
+        if self.reranker:
+            results = [self.reranker.rerank(query, docs, k) for query, docs in zip(queries, results)]
+        logger.info(f"Hybrid batch retrieval: {len(queries)} queries (alpha={self.alpha})")
+        return results
+    
+    def _fused_count(self, k: int) -> int:
+        """Documents kept after fusion (the re-ranker's candidate budget, if larger)"""
+        return max(k, self.reranker.max_candidates) if self.reranker else k
     
-    def _vector_search(self, query: str, k: int) -> List[Document]:
+    def _vector_search(self, query: str, k: int, query_embedding: Optional[List[float]] = None) -> List[Document]:
         """Vector similarity search"""
         try:
-            results = self.vector_store.search(query, k=k)
-            
-            documents: List[Document] = []
-            if results.get('documents') and len(results['documents']) > 0:
-                docs_list = results['documents'][0]
-                metas_list = results.get('metadatas', [[]])[0] if results.get('metadatas') else [{}] * len(docs_list)
-                distances = results.get('distances', [[]])[0] if results.get('distances') else [1.0] * len(docs_list)
-                
-                for doc_text, metadata, distance in zip(docs_list, metas_list, distances):
-                    doc = Document(
-                        page_content=doc_text,
-                        metadata={**(metadata or {}), 'vector_score': 1.0 - distance}
-                    )
-                    documents.append(doc)
-            
-            return documents
+            results = self.vector_store.search(query, k=k, query_embedding=query_embedding)
+            return self._vector_documents(results)
         
         except Exception as e:
             logger.error(f"Vector search failed: {str(e)}")
             return []
     
+    @staticmethod
+    def _vector_documents(results: Dict) -> List[Document]:
+        """Convert one query's Chroma results to Documents with vector scores"""
+        documents: List[Document] = []
+        if results.get('documents') and len(results['documents']) > 0:
+            docs_list = results['documents'][0]
+            metas_list = results.get('metadatas', [[]])[0] if results.get('metadatas') else [{}] * len(docs_list)
+            distances = results.get('distances', [[]])[0] if results.get('distances') else [1.0] * len(docs_list)
+            ids_list = results.get('ids', [[]])[0] if results.get('ids') else [None] * len(docs_list)
+            
+            for doc_id, doc_text, metadata, distance in zip(ids_list, docs_list, metas_list, distances):
+                doc = Document(
+                    page_content=doc_text,
+                    metadata={**(metadata or {}), 'doc_id': doc_id, 'vector_score': 1.0 - distance}
+                )
+                documents.append(doc)
+        
+        return documents
+    
     def _bm25_search(self, query: str, k: int) -> List[Document]:
         """BM25 keyword search"""
         try:
             if not self.bm25_index:
                 return []
             
-            # Tokenize query
-            tokenized_query = query.lower().split()
-            
-            # Get BM25 scores
-            scores = self.bm25_index.get_scores(tokenized_query)
-            
-            # Get top-k indices
-            top_k_indices = np.argsort(scores)[-k:][::-1]
-            
-            # Create documents with BM25 scores
-            documents = []
-            for idx in top_k_indices:
-                if scores[idx] > 0:  # Only include non-zero scores
-                    doc = self.indexed_docs[idx]
-                    # Add BM25 score to metadata
-                    doc_copy = Document(
-                        page_content=doc.page_content,
-                        metadata={**doc.metadata, 'bm25_score': float(scores[idx])}
-                    )
-                    documents.append(doc_copy)
-            
-            return documents
+            # Get top-k chunk IDs by BM25 score (only non-zero scores are returned)
+            return self._bm25_documents(self.bm25_index.top_k(query, k))
         
         except Exception as e:
             logger.error(f"BM25 search failed: {str(e)}")
             return []
     
+    def _bm25_documents(self, top_k: List) -> List[Document]:
+        """Create documents with BM25 scores from (doc_id, score) pairs"""
+        documents = []
+        for doc_id, score in top_k:
+            if score > 0:
+                doc = self.bm25_index.get_document(doc_id)
+                # Add BM25 score to metadata
+                doc_copy = Document(
+                    page_content=doc.page_content,
+                    metadata={**doc.metadata, 'doc_id': doc_id, 'bm25_score': float(score)}
+                )
+                documents.append(doc_copy)
+        
+        return documents
+    
     def _reciprocal_rank_fusion(
         self, 
         vector_docs: List[Document], 
@@ -185,12 +337,12 @@ class HybridRetriever:
         - Reduces impact of outlier ranks
         - Fair fusion of different scoring scales
         """
-        # Create document ID mapping (use content hash)
+        # Create document ID mapping (stable chunk IDs, content digest as fallback)
         doc_scores: Dict[str, Dict] = {}
         
         # Add vector search ranks
         for rank, doc in enumerate(vector_docs, 1):
-            doc_id = hash(doc.page_content)
+            doc_id = self._fusion_key(doc)
             if doc_id not in doc_scores:
                 doc_scores[doc_id] = {
                     'doc': doc,
@@ -202,7 +354,7 @@ class HybridRetriever:
         
         # Add BM25 ranks
         for rank, doc in enumerate(bm25_docs, 1):
-            doc_id = hash(doc.page_content)
+            doc_id = self._fusion_key(doc)
             if doc_id not in doc_scores:
                 doc_scores[doc_id] = {
                     'doc': doc,
@@ -251,6 +403,11 @@ class HybridRetriever:
         
         return result_docs
     
+    @staticmethod
+    def _fusion_key(doc: Document) -> str:
+        """Key identifying the same chunk across vector and BM25 results"""
+        return doc.metadata.get('doc_id') or content_digest(doc.page_content)
+    
     def _detect_intent(self, query: str) -> str:
         """Detect query intent (for backward compatibility with ContentAwareRetriever)"""
         spec_words = ["specification", "spec", "value", "rating", "snr", "response"]
@@ -0,0 +1,200 @@
+"""
+Persistent answer cache
+SQLite (WAL mode) store under data/ shared by every process on the host
+(uvicorn workers, MCP server) and surviving restarts
+"""
+from typing import Dict, Any, Optional
+from pathlib import Path
+import json
+import sqlite3
+import threading
+import time
+
+from src.error_handling.logger import logger
+
+
+def _json_default(value: Any) -> Any:
+    """Serialize NumPy scalars and other stragglers in result dicts"""
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+class PersistentAnswerCache:
+    """
+    Key-value store for query results backed by SQLite
+
+    Features:
+    - WAL journal: readers never block the single writer, safe across processes
+    - TTL on read (expired rows are ignored and purged on eviction)
+    - LRU eviction by entry count and total payload size
+
+    Keys are produced by QueryCache._generate_key, so they already include
+    the cache context (collection version, model name).
+    """
+
+    # Check size limits every N writes instead of on every insert
+    EVICTION_INTERVAL = 50
+
+    def __init__(
+        self,
+        path: Path,
+        ttl_seconds: int = 86400,
+        max_entries: int = 10000,
+        max_bytes: int = 256 * 1024 * 1024
+    ):
+        """
+        Initialize store
+
+        Args:
+            path: SQLite database file
+            ttl_seconds: Entry lifetime
+            max_entries: Maximum rows kept (least recently used evicted first)
+            max_bytes: Maximum total payload size
+        """
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=5.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            " key TEXT PRIMARY KEY,"
+            " query TEXT NOT NULL,"
+            " result TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " accessed REAL NOT NULL,"
+            " size INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS answers_accessed ON answers (accessed)")
+        self._conn.commit()
+
+        self._writes = 0
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'writes': 0,
+            'evictions': 0,
+            'errors': 0
+        }
+
+        logger.info(
+            f"Persistent cache at {self.path} (ttl={ttl_seconds}s, max_entries={max_entries}, "
+            f"max_mb={max_bytes // (1024 * 1024)})"
+        )
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Stored result for key, or None if missing/expired"""
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT result FROM answers WHERE key = ? AND created > ?",
+                    (key, now - self.ttl_seconds)
+                ).fetchone()
+                if row is None:
+                    self.stats['misses'] += 1
+                    return None
+                self._conn.execute("UPDATE answers SET accessed = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+                self.stats['hits'] += 1
+            return json.loads(row[0])
+        except sqlite3.Error as e:
+            self.stats['errors'] += 1
+            logger.warning(f"Persistent cache read failed: {str(e)}")
+            return None
+
+    def delete(self, key: str):
+        """Remove one entry"""
+        try:
+            with self._lock:
+                self._conn.execute("DELETE FROM answers WHERE key = ?", (key,))
+                self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Persistent cache delete failed: {str(e)}")
+
+    def set(self, key: str, query: str, result: Dict[str, Any]):
+        """Store result (replaces any existing entry for key)"""
+        payload = json.dumps(result, default=_json_default)
+        now = time.time()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO answers (key, query, result, created, accessed, size) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, query, payload, now, now, len(payload))
+                )
+                self._conn.commit()
+                self.stats['writes'] += 1
+                self._writes += 1
+                if self._writes % self.EVICTION_INTERVAL == 0:
+                    self._evict()
+        except sqlite3.Error as e:
+            self.stats['errors'] += 1
+            logger.warning(f"Persistent cache write failed: {str(e)}")
+
+    def _evict(self):
+        """Drop expired rows, then least recently used rows beyond the limits"""
+        removed = self._conn.execute(
+            "DELETE FROM answers WHERE created <= ?", (time.time() - self.ttl_seconds,)
+        ).rowcount
+
+        count, total_size = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM answers"
+        ).fetchone()
+
+        if count > self.max_entries or total_size > self.max_bytes:
+            # Walk rows oldest-access first until both limits hold
+            excess_rows = max(0, count - self.max_entries)
+            excess_bytes = max(0, total_size - self.max_bytes)
+            victims = []
+            for key, size in self._conn.execute("SELECT key, size FROM answers ORDER BY accessed"):
+                if excess_rows <= 0 and excess_bytes <= 0:
+                    break
+                victims.append((key,))
+                excess_rows -= 1
+                excess_bytes -= size
+            self._conn.executemany("DELETE FROM answers WHERE key = ?", victims)
+            removed += len(victims)
+
+        self._conn.commit()
+        if removed:
+            self.stats['evictions'] += removed
+            logger.debug(f"Persistent cache evicted {removed} entries")
+
+    def clear(self):
+        """Delete all entries"""
+        with self._lock:
+            self._conn.execute("DELETE FROM answers")
+            self._conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Entry count, payload size and hit statistics"""
+        try:
+            with self._lock:
+                count, total_size = self._conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM answers"
+                ).fetchone()
+        except sqlite3.Error:
+            count, total_size = 0, 0
+
+        total_requests = self.stats['hits'] + self.stats['misses']
+        return {
+            'path': str(self.path),
+            'entries': count,
+            'size_mb': round(total_size / (1024 * 1024), 2),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'hit_rate': round(self.stats['hits'] / total_requests * 100, 2) if total_requests else 0.0,
+            **self.stats
+        }
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
@@ -3,15 +3,40 @@ Query caching system for RAG
 Caches query results to avoid redundant processing
 Provides massive speedup for repeated or similar queries
 """
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, FrozenSet, Callable
 from collections import OrderedDict
 from datetime import datetime, timedelta
+from functools import wraps
 import hashlib
 import json
+import re
+import threading
 
+import numpy as np
+
+from src.retrieval.persistent_cache import PersistentAnswerCache
 from src.error_handling.logger import logger
 
 
+# Tokens containing a digit: model numbers (EX-1280, DM8SE) and values (70V, 8ohm)
+_KEY_TERM_PATTERN = re.compile(r"[a-z0-9][a-z0-9\-\.]*")
+
+
+def _key_terms(query: str) -> FrozenSet[str]:
+    """Model numbers / values in a query; semantic matches must agree on these"""
+    tokens = (token.strip('.-') for token in _KEY_TERM_PATTERN.findall(query.lower()))
+    return frozenset(token for token in tokens if any(ch.isdigit() for ch in token))
+
+
+def _synchronized(method):
+    """Serialize access to the cache (queries run on a worker pool)"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
 class QueryCache:
     """
     LRU (Least Recently Used) cache for query results
@@ -21,7 +46,13 @@ class QueryCache:
     - LRU eviction policy
     - TTL (time-to-live) support
     - Cache statistics
-    - Optional similarity matching for similar queries
+    - Optional persistent tier (PersistentAnswerCache) shared across
+      processes and restarts; memory misses fall through to it
+    - Optional similarity matching for similar queries (semantic tier):
+      cached query embeddings are kept in a NumPy matrix and paraphrases
+      above a cosine threshold are served from cache
+    - Optional validator: entries it rejects (e.g. answers citing a
+      re-ingested PDF) are dropped on lookup in every tier
     
     Benefits:
     - 99%+ speedup for repeated queries
@@ -33,7 +64,11 @@ class QueryCache:
         self, 
         max_size: int = 100, 
         ttl_seconds: int = 3600,
-        enable_cache: bool = True
+        enable_cache: bool = True,
+        similarity_threshold: Optional[float] = None,
+        near_hit_margin: float = 0.05,
+        store: Optional[PersistentAnswerCache] = None,
+        validator: Optional[Callable[[Dict[str, Any]], bool]] = None
     ):
         """
         Initialize query cache
@@ -42,27 +77,47 @@ class QueryCache:
             max_size: Maximum number of cached queries (LRU eviction after)
             ttl_seconds: Time-to-live for cache entries (default: 1 hour)
             enable_cache: If False, cache is disabled (backward compatible)
+            similarity_threshold: Cosine similarity for semantic hits (None = exact match only)
+            near_hit_margin: Best matches within this margin below the threshold count as near-hits
+            store: Persistent second tier (None = in-memory only)
+            validator: Returns False for cached results that must no longer be served
         """
         self.max_size = max_size
         self.ttl = timedelta(seconds=ttl_seconds)
         self.enable_cache = enable_cache
+        self.similarity_threshold = similarity_threshold
+        self.near_hit_margin = near_hit_margin
+        self.store = store if enable_cache else None
+        self.validator = validator
         
         # OrderedDict maintains insertion order for LRU
         self.cache: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self._lock = threading.RLock()
+        
+        # Semantic tier: normalized query embeddings, rebuilt lazily after changes
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_keys: List[str] = []
+        self._matrix_dirty = True
         
         # Statistics
         self.stats = {
             'hits': 0,
+            'persistent_hits': 0,
+            'semantic_hits': 0,
+            'near_hits': 0,
             'misses': 0,
             'evictions': 0,
-            'ttl_expirations': 0
+            'ttl_expirations': 0,
+            'invalidations': 0
         }
         
         if enable_cache:
-            logger.info(f"Query cache initialized (max_size={max_size}, ttl={ttl_seconds}s)")
+            semantic = f", semantic>={similarity_threshold}" if similarity_threshold is not None else ""
+            logger.info(f"Query cache initialized (max_size={max_size}, ttl={ttl_seconds}s{semantic})")
         else:
             logger.info("Query cache disabled (backward compatible mode)")
     
+    @_synchronized
     def get(self, query: str, context: Optional[Dict] = None) -> Optional[Dict[str, Any]]:
         """
         Get cached result for query
@@ -81,15 +136,18 @@ class QueryCache:
         
         # Check if key exists
         if cache_key not in self.cache:
-            self.stats['misses'] += 1
-            return None
+            return self._get_persistent(cache_key, query, context)
         
         # Check TTL
         entry = self.cache[cache_key]
         if self._is_expired(entry):
             logger.debug(f"Cache entry expired: {query[:50]}...")
-            del self.cache[cache_key]
+            self._delete(cache_key)
             self.stats['ttl_expirations'] += 1
+            return self._get_persistent(cache_key, query, context)
+        
+        if not self._is_valid(entry['result']):
+            self._invalidate(cache_key, query)
             self.stats['misses'] += 1
             return None
         
@@ -101,7 +159,133 @@ class QueryCache:
         
         return entry['result']
     
-    def set(self, query: str, result: Dict[str, Any], context: Optional[Dict] = None):
+    def _get_persistent(self, cache_key: str, query: str, context: Optional[Dict]) -> Optional[Dict[str, Any]]:
+        """Memory miss: fall through to the persistent tier and promote hits"""
+        result = self.store.get(cache_key) if self.store else None
+        if result is not None and not self._is_valid(result):
+            self._invalidate(cache_key, query)
+            result = None
+        if result is None:
+            self.stats['misses'] += 1
+            return None
+        
+        self._put(cache_key, query, result, context)
+        self.stats['persistent_hits'] += 1
+        logger.info(f"Cache HIT (persistent): {query[:50]}...")
+        return result
+    
+    @property
+    def semantic_enabled(self) -> bool:
+        """True if the semantic tier is active"""
+        return self.enable_cache and self.similarity_threshold is not None
+    
+    @_synchronized
+    def get_similar(
+        self,
+        query: str,
+        query_embedding: List[float],
+        context: Optional[Dict] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Semantic lookup: cached result for the most similar earlier query
+        
+        Call after get() missed. Candidates must share the same context and
+        the same model numbers/values (so "EX-1280" never matches "EX-1280C").
+        
+        Args:
+            query: User query
+            query_embedding: Query embedding (EnhancedChromaDB.embed_query)
+            context: Optional context, must equal the cached entry's context
+        
+        Returns:
+            Copy of the cached result with a 'semantic_match' field, or None
+        """
+        if not self.semantic_enabled or query_embedding is None:
+            return None
+        
+        self._rebuild_matrix()
+        if self._matrix is None:
+            return None
+        
+        vector = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm == 0 or vector.shape[0] != self._matrix.shape[1]:
+            return None
+        similarities = self._matrix @ (vector / norm)
+        
+        context_key = self._context_key(context)
+        key_terms = _key_terms(query)
+        best_key, best_similarity = None, -1.0
+        for row in np.argsort(similarities)[::-1]:
+            candidate_key = self._matrix_keys[row]
+            entry = self.cache.get(candidate_key)
+            if entry is None or entry['context_key'] != context_key or entry['key_terms'] != key_terms \
+                    or self._is_expired(entry):
+                continue
+            if not self._is_valid(entry['result']):
+                self._invalidate(candidate_key, entry['query'])
+                continue
+            best_key, best_similarity = candidate_key, float(similarities[row])
+            break
+        
+        if best_key is None or best_similarity < self.similarity_threshold:
+            if best_key is not None and best_similarity >= self.similarity_threshold - self.near_hit_margin:
+                self.stats['near_hits'] += 1
+                logger.debug(f"Cache near-hit ({best_similarity:.3f}): {query[:50]}...")
+            return None
+        
+        # The exact-key miss recorded by get() became a semantic hit
+        self.stats['misses'] = max(0, self.stats['misses'] - 1)
+        self.stats['semantic_hits'] += 1
+        self.cache.move_to_end(best_key)
+        entry = self.cache[best_key]
+        
+        logger.info(f"Cache SEMANTIC HIT ({best_similarity:.3f}): {query[:50]}... ~ {entry['query'][:50]}...")
+        
+        result = dict(entry['result'])
+        result['query'] = query
+        result['semantic_match'] = {'query': entry['query'], 'similarity': round(best_similarity, 4)}
+        return result
+    
+    def get_memory(
+        self,
+        query: str,
+        context: Optional[Dict] = None,
+        validator: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Memory-tier lookup that never blocks (safe on an event loop)
+        
+        Skips the persistent tier and never deletes entries. Returns None
+        if another thread holds the cache lock (it may be in SQLite I/O),
+        the entry is missing or expired, or `validator` (default: the
+        cache's validator) rejects it; callers then fall back to get().
+        """
+        if not self.enable_cache or not self._lock.acquire(blocking=False):
+            return None
+        try:
+            cache_key = self._generate_key(query, context)
+            entry = self.cache.get(cache_key)
+            if entry is None or self._is_expired(entry):
+                return None
+            if not (validator or self._is_valid)(entry['result']):
+                return None
+            
+            self.cache.move_to_end(cache_key)
+            self.stats['hits'] += 1
+            logger.info(f"Cache HIT (memory, inline): {query[:50]}...")
+            return entry['result']
+        finally:
+            self._lock.release()
+    
+    @_synchronized
+    def set(
+        self,
+        query: str,
+        result: Dict[str, Any],
+        context: Optional[Dict] = None,
+        query_embedding: Optional[List[float]] = None
+    ):
         """
         Cache query result
         
@@ -109,16 +293,32 @@ class QueryCache:
             query: User query
             result: Query result to cache
             context: Optional context to include in cache key
+            query_embedding: Query embedding for the semantic tier (optional)
         """
         if not self.enable_cache:
             return
         
         cache_key = self._generate_key(query, context)
+        self._put(cache_key, query, result, context, query_embedding)
         
+        if self.store:
+            self.store.set(cache_key, query, result)
+        
+        logger.debug(f"Cached result: {query[:50]}...")
+    
+    def _put(
+        self,
+        cache_key: str,
+        query: str,
+        result: Dict[str, Any],
+        context: Optional[Dict] = None,
+        query_embedding: Optional[List[float]] = None
+    ):
+        """Insert into the in-memory tier"""
         # Check size and evict if necessary (LRU)
         if len(self.cache) >= self.max_size and cache_key not in self.cache:
             evicted_key = next(iter(self.cache))
-            del self.cache[evicted_key]
+            self._delete(evicted_key)
             self.stats['evictions'] += 1
             logger.debug(f"Cache full, evicted LRU entry")
         
@@ -127,20 +327,27 @@ class QueryCache:
             'result': result,
             'timestamp': datetime.now(),
             'query': query,
-            'processing_time': result.get('time', 'N/A')
+            'processing_time': result.get('time', 'N/A'),
+            'context_key': self._context_key(context),
+            'key_terms': _key_terms(query),
+            'embedding': self._normalize(query_embedding) if self.semantic_enabled else None
         }
+        self._matrix_dirty = True
         
         # Move to end (most recently used)
         self.cache.move_to_end(cache_key)
-        
-        logger.debug(f"Cached result: {query[:50]}...")
     
+    @_synchronized
     def clear(self):
         """Clear all cache entries"""
         size = len(self.cache)
         self.cache.clear()
+        self._matrix_dirty = True
+        if self.store:
+            self.store.clear()
         logger.info(f"Cache cleared ({size} entries removed)")
     
+    @_synchronized
     def get_stats(self) -> Dict[str, Any]:
         """
         Get cache statistics
@@ -148,21 +355,32 @@ class QueryCache:
         Returns:
             Dict with hit rate, size, and other metrics
         """
-        total_requests = self.stats['hits'] + self.stats['misses']
-        hit_rate = self.stats['hits'] / total_requests if total_requests > 0 else 0.0
+        hits = self.stats['hits'] + self.stats['persistent_hits'] + self.stats['semantic_hits']
+        total_requests = hits + self.stats['misses']
+        hit_rate = hits / total_requests if total_requests > 0 else 0.0
         
         return {
             'enabled': self.enable_cache,
             'size': len(self.cache),
             'max_size': self.max_size,
             'hits': self.stats['hits'],
+            'persistent_hits': self.stats['persistent_hits'],
+            'semantic_hits': self.stats['semantic_hits'],
+            'near_hits': self.stats['near_hits'],
+            'semantic_threshold': self.similarity_threshold,
             'misses': self.stats['misses'],
             'hit_rate': round(hit_rate * 100, 2),
             'evictions': self.stats['evictions'],
             'ttl_expirations': self.stats['ttl_expirations'],
-            'total_requests': total_requests
+            'invalidations': self.stats['invalidations'],
+            'total_requests': total_requests,
+            'persistent': self.store.get_stats() if self.store else None
         }
     
+    def cache_key(self, query: str, context: Optional[Dict] = None) -> str:
+        """Key under which query/context is cached (also used for request coalescing)"""
+        return self._generate_key(query, context)
+    
     def _generate_key(self, query: str, context: Optional[Dict] = None) -> str:
         """Generate cache key from query and context"""
         # Normalize query (lowercase, strip whitespace)
@@ -177,11 +395,57 @@ class QueryCache:
         # Hash for consistent key length
         return hashlib.md5(key_data.encode()).hexdigest()
     
+    @staticmethod
+    def _context_key(context: Optional[Dict]) -> str:
+        return json.dumps(context, sort_keys=True) if context else ""
+    
+    @staticmethod
+    def _normalize(embedding: Optional[List[float]]) -> Optional[np.ndarray]:
+        if embedding is None:
+            return None
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else None
+    
+    def _is_valid(self, result: Dict[str, Any]) -> bool:
+        return self.validator is None or self.validator(result)
+    
+    def _invalidate(self, cache_key: str, query: str):
+        """Drop an entry the validator rejected from every tier"""
+        if cache_key in self.cache:
+            self._delete(cache_key)
+        if self.store:
+            self.store.delete(cache_key)
+        self.stats['invalidations'] += 1
+        logger.info(f"Cache entry invalidated: {query[:50]}...")
+    
+    def _delete(self, cache_key: str):
+        """Remove an entry and invalidate the similarity matrix"""
+        del self.cache[cache_key]
+        self._matrix_dirty = True
+    
+    def _rebuild_matrix(self):
+        """Stack cached query embeddings into one (n, dim) matrix"""
+        if not self._matrix_dirty:
+            return
+        
+        keys = [key for key, entry in self.cache.items() if entry.get('embedding') is not None]
+        dims = {self.cache[key]['embedding'].shape[0] for key in keys}
+        if len(dims) > 1:
+            # Embedding model changed mid-run: keep only the current dimension
+            latest = self.cache[keys[-1]]['embedding'].shape[0]
+            keys = [key for key in keys if self.cache[key]['embedding'].shape[0] == latest]
+        
+        self._matrix_keys = keys
+        self._matrix = np.vstack([self.cache[key]['embedding'] for key in keys]) if keys else None
+        self._matrix_dirty = False
+    
     def _is_expired(self, entry: Dict[str, Any]) -> bool:
         """Check if cache entry has expired"""
         age = datetime.now() - entry['timestamp']
         return age > self.ttl
     
+    @_synchronized
     def remove_expired(self) -> int:
         """
         Remove all expired entries
@@ -198,7 +462,7 @@ class QueryCache:
         ]
         
         for key in expired_keys:
-            del self.cache[key]
+            self._delete(key)
             self.stats['ttl_expirations'] += 1
         
         if expired_keys:
@@ -206,6 +470,7 @@ class QueryCache:
         
         return len(expired_keys)
     
+    @_synchronized
     def get_recent_queries(self, limit: int = 10) -> List[Dict[str, Any]]:
         """
         Get most recent cached queries
@@ -256,13 +521,21 @@ class CacheManager:
         self, 
         max_size: int = 100, 
         ttl_seconds: int = 3600,
-        enable_cache: bool = True
+        enable_cache: bool = True,
+        similarity_threshold: Optional[float] = None,
+        near_hit_margin: float = 0.05,
+        store: Optional[PersistentAnswerCache] = None,
+        validator: Optional[Callable[[Dict[str, Any]], bool]] = None
     ):
         """Initialize the query cache"""
         self.query_cache = QueryCache(
             max_size=max_size,
             ttl_seconds=ttl_seconds,
-            enable_cache=enable_cache
+            enable_cache=enable_cache,
+            similarity_threshold=similarity_threshold,
+            near_hit_margin=near_hit_margin,
+            store=store,
+            validator=validator
         )
     
     def get_query_cache(self) -> QueryCache:
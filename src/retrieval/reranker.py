@@ -0,0 +1,203 @@
+"""
+Cross-encoder re-ranking of fused retrieval candidates
+A small CPU cross-encoder scores (query, chunk) pairs jointly, which
+orders the top few chunks better than rank fusion of independent
+vector and BM25 rankings
+"""
+from typing import Dict, List, Tuple
+from collections import OrderedDict
+import threading
+import time
+
+from langchain_core.documents import Document
+
+from src.vector_store.chromadb_manager import content_digest
+from src.error_handling.logger import logger
+
+
+class CrossEncoderReranker:
+    """
+    Budgeted cross-encoder re-ranker
+
+    Features:
+    - Only the first max_candidates fused documents are scored, in batches
+    - Pair scores are cached (query + chunk), so repeats cost nothing
+    - If scoring exceeds the latency budget, the fused (RRF) order is kept
+    - Optional ONNX / OpenVINO backend or dynamic int8 quantization (torch)
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        max_candidates: int = 15,
+        latency_budget_ms: float = 300.0,
+        batch_size: int = 8,
+        backend: str = "torch",
+        quantize: bool = False,
+        cache_size: int = 5000
+    ):
+        """
+        Initialize re-ranker (loads the model)
+
+        Args:
+            model_name: sentence-transformers CrossEncoder model
+            max_candidates: Fused candidates scored per query
+            latency_budget_ms: Scoring time after which re-ranking is abandoned
+            batch_size: Pairs per forward pass
+            backend: "torch", "onnx" or "openvino" (needs sentence-transformers with backend support)
+            quantize: Dynamic int8 quantization of Linear layers (torch backend)
+            cache_size: Cached (query, chunk) scores
+        """
+        self.model_name = model_name
+        self.max_candidates = max(1, max_candidates)
+        self.latency_budget = max(0.0, latency_budget_ms) / 1000.0
+        self.batch_size = max(1, batch_size)
+        self.cache_size = cache_size
+
+        self._scores: OrderedDict[Tuple[str, str], float] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            'queries': 0,
+            'reranked': 0,
+            'budget_exceeded': 0,
+            'errors': 0,
+            'pairs_scored': 0,
+            'cache_hits': 0,
+            'total_time': 0.0
+        }
+
+        self.model = self._load_model(model_name, backend, quantize)
+        logger.info(
+            f"Cross-encoder re-ranker loaded: {model_name} "
+            f"(candidates={self.max_candidates}, budget={latency_budget_ms}ms, backend={backend})"
+        )
+
+    @staticmethod
+    def _load_model(model_name: str, backend: str, quantize: bool):
+        from sentence_transformers import CrossEncoder
+
+        model = None
+        if backend != "torch":
+            try:
+                model = CrossEncoder(model_name, device="cpu", backend=backend)
+            except TypeError:
+                logger.warning(f"sentence-transformers has no '{backend}' backend for CrossEncoder, using torch")
+        if model is None:
+            model = CrossEncoder(model_name, device="cpu")
+            if quantize:
+                import torch
+                model.model = torch.quantization.quantize_dynamic(model.model, {torch.nn.Linear}, dtype=torch.qint8)
+        return model
+
+    @staticmethod
+    def _pair_key(query: str, doc: Document) -> Tuple[str, str]:
+        chunk = doc.metadata.get('doc_id') or content_digest(doc.page_content)
+        return " ".join(query.lower().split()), chunk
+
+    def rerank(self, query: str, documents: List[Document], k: int) -> List[Document]:
+        """
+        Re-order fused candidates by cross-encoder score
+
+        Args:
+            query: User query
+            documents: Candidates in fused (RRF) order
+            k: Number of documents to return
+
+        Returns:
+            Top k documents with 'rerank_score' metadata, or the first k in
+            fused order (marked 'rerank_skipped') if the budget ran out
+        """
+        candidates = documents[:self.max_candidates]
+        if len(candidates) <= 1:
+            return documents[:k]
+
+        start_time = time.time()
+        keys = [self._pair_key(query, doc) for doc in candidates]
+        scores: Dict[Tuple[str, str], float] = {}
+        with self._lock:
+            for key in keys:
+                if key in self._scores:
+                    self._scores.move_to_end(key)
+                    scores[key] = self._scores[key]
+            self.stats['queries'] += 1
+            self.stats['cache_hits'] += len(scores)
+
+        pending = [(key, doc) for key, doc in zip(keys, candidates) if key not in scores]
+        completed = True
+        try:
+            for offset in range(0, len(pending), self.batch_size):
+                if offset and time.time() - start_time > self.latency_budget:
+                    completed = False
+                    break
+                batch = pending[offset:offset + self.batch_size]
+                batch_scores = self.model.predict(
+                    [(query, doc.page_content) for _, doc in batch],
+                    batch_size=self.batch_size,
+                    show_progress_bar=False
+                )
+                new_scores = {key: float(score) for (key, _), score in zip(batch, batch_scores)}
+                scores.update(new_scores)
+                self._remember(new_scores)
+        except Exception as e:
+            logger.error(f"Re-ranking failed, keeping fused order: {str(e)}")
+            with self._lock:
+                self.stats['errors'] += 1
+            return self._fused_order(documents, k)
+
+        elapsed = time.time() - start_time
+        if completed and elapsed > self.latency_budget:
+            completed = False
+
+        with self._lock:
+            self.stats['total_time'] += elapsed
+            self.stats['reranked' if completed else 'budget_exceeded'] += 1
+
+        if not completed:
+            logger.warning(f"Re-ranking over budget ({elapsed * 1000:.0f}ms), keeping fused order")
+            return self._fused_order(documents, k)
+
+        ranked = sorted(
+            zip(keys, candidates, range(1, len(candidates) + 1)),
+            key=lambda item: scores[item[0]],
+            reverse=True
+        )[:k]
+        logger.info(f"Re-ranked {len(candidates)} candidates in {elapsed * 1000:.0f}ms")
+        reranked = [
+            Document(
+                page_content=doc.page_content,
+                metadata={**doc.metadata, 'rerank_score': scores[key], 'fused_rank': fused_rank}
+            )
+            for key, doc, fused_rank in ranked
+        ]
+        # k beyond the candidate budget: the rest keep fused order
+        return reranked + documents[len(candidates):k]
+
+    @staticmethod
+    def _fused_order(documents: List[Document], k: int) -> List[Document]:
+        """First k in fused order, marked as not re-ranked (not cached downstream)"""
+        return [
+            Document(page_content=doc.page_content, metadata={**doc.metadata, 'rerank_skipped': True})
+            for doc in documents[:k]
+        ]
+
+    def _remember(self, scores: Dict[Tuple[str, str], float]):
+        with self._lock:
+            for key, score in scores.items():
+                self._scores[key] = score
+                self._scores.move_to_end(key)
+            while len(self._scores) > self.cache_size:
+                self._scores.popitem(last=False)
+            self.stats['pairs_scored'] += len(scores)
+
+    def get_stats(self) -> Dict:
+        """Re-rank counts, budget overruns, cache hits and average latency"""
+        with self._lock:
+            queries = self.stats['queries']
+            return {
+                'model': self.model_name,
+                'max_candidates': self.max_candidates,
+                'latency_budget_ms': round(self.latency_budget * 1000, 1),
+                'cache_size': len(self._scores),
+                **{name: value for name, value in self.stats.items() if name != 'total_time'},
+                'avg_latency_ms': round(self.stats['total_time'] / queries * 1000, 2) if queries else 0.0
+            }
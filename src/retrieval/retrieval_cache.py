@@ -0,0 +1,116 @@
+"""
+Retrieval-stage cache
+Caches ranked chunk IDs and scores per (query, k, alpha, collection version)
+so repeated retrievals skip embedding, the HNSW query and BM25 scoring
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from collections import OrderedDict
+import hashlib
+import json
+import threading
+
+from langchain_core.documents import Document
+
+from src.error_handling.logger import logger
+
+
+# Per-query ranking metadata set by the retrievers (everything else comes from the store)
+SCORE_KEYS = ('vector_score', 'bm25_score', 'hybrid_score', 'vector_rank', 'bm25_rank', 'rerank_score', 'fused_rank')
+
+
+class RetrievalCache:
+    """
+    LRU cache of retrieval results
+
+    Only chunk IDs and scores are stored; documents are re-read from the
+    vector store by ID on a hit. Keys include the collection version, so
+    entries never outlive the corpus they were computed against.
+    """
+
+    def __init__(self, max_size: int = 1000):
+        """
+        Initialize cache
+
+        Args:
+            max_size: Maximum cached retrievals (LRU eviction after)
+        """
+        self.max_size = max_size
+        self.cache: OrderedDict[str, List[Tuple[str, Dict[str, Any]]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0
+        }
+        logger.info(f"Retrieval cache initialized (max_size={max_size})")
+
+    @staticmethod
+    def make_key(
+        query: str,
+        k: int,
+        alpha: Optional[float],
+        collection_version: str,
+        reranker: Optional[str] = None
+    ) -> str:
+        """Key from normalized query, k, fusion weight, collection version and re-ranker model"""
+        normalized_query = " ".join(query.lower().split())
+        key_data = json.dumps([normalized_query, k, alpha, collection_version, reranker])
+        return hashlib.md5(key_data.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[List[Tuple[str, Dict[str, Any]]]]:
+        """Ranked (chunk_id, scores) list, or None"""
+        with self._lock:
+            ranking = self.cache.get(key)
+            if ranking is None:
+                self.stats['misses'] += 1
+                return None
+            self.cache.move_to_end(key)
+            self.stats['hits'] += 1
+            return ranking
+
+    def set(self, key: str, documents: List[Document]) -> bool:
+        """
+        Store the ranking of retrieved documents
+
+        Returns:
+            False if a document has no chunk ID or the ranking is provisional
+            (re-ranking skipped over budget) - result not cached
+        """
+        ranking = []
+        for doc in documents:
+            doc_id = doc.metadata.get('doc_id')
+            if not doc_id or doc.metadata.get('rerank_skipped'):
+                return False
+            ranking.append((doc_id, {name: doc.metadata[name] for name in SCORE_KEYS if name in doc.metadata}))
+
+        with self._lock:
+            if key not in self.cache and len(self.cache) >= self.max_size:
+                self.cache.popitem(last=False)
+                self.stats['evictions'] += 1
+            self.cache[key] = ranking
+            self.cache.move_to_end(key)
+        return True
+
+    def discard(self, key: str):
+        """Drop an entry whose chunks could not be re-read"""
+        with self._lock:
+            self.cache.pop(key, None)
+
+    def clear(self):
+        """Clear all entries"""
+        with self._lock:
+            self.cache.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit rate and size"""
+        with self._lock:
+            total_requests = self.stats['hits'] + self.stats['misses']
+            return {
+                'size': len(self.cache),
+                'max_size': self.max_size,
+                'hits': self.stats['hits'],
+                'misses': self.stats['misses'],
+                'hit_rate': round(self.stats['hits'] / total_requests * 100, 2) if total_requests else 0.0,
+                'evictions': self.stats['evictions'],
+                'total_requests': total_requests
+            }
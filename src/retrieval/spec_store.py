@@ -0,0 +1,372 @@
+"""
+Structured specification store
+Normalized (product, attribute, value, unit, page) rows extracted from
+camelot tables at ingest time, kept in SQLite and queried before
+retrieval so spec lookups and product comparisons are direct reads
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+from pathlib import Path
+import os
+import re
+import sqlite3
+import threading
+
+from src.error_handling.logger import logger
+
+
+# Chunk metadata key carrying a table's rows from the parser to the store
+# (removed before the chunk is written to the vector store)
+SPEC_ROWS_KEY = 'spec_rows'
+
+_TOKEN_PATTERN = re.compile(r"[A-Za-z0-9]+(?:-[A-Za-z0-9]+)*")
+_QUANTITY_PATTERN = re.compile(r"^\d+(\.\d+)?[a-z%]*$", re.IGNORECASE)
+_TERM_PATTERN = re.compile(r"[a-z0-9]+")
+_VALUE_PATTERN = re.compile(
+    r"([-+]?\d+(?:[.,]\d+)?)\s*"
+    r"(dBu|dBV|dB|kHz|Hz|kW|W|VA|Ω|ohms?|mV|V|A|kg|lbs?|g|mm|cm|in|ms|°|%)?(?![A-Za-z])"
+)
+_UNIT_ALIASES = {'ohm': 'Ω', 'ohms': 'Ω', 'lbs': 'lb'}
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it its me of on or the this to what "
+    "when where which who why with you your tell give much many there".split()
+)
+# Comparison and product-line words that are not part of the attribute
+_IGNORED_TERMS = frozenset(
+    "vs versus compare compared comparison between difference both than each spec specs specification "
+    "specifications value bose professional controlspace designmax powermatch freespace edgemax panaray "
+    "loudspeaker loudspeakers speaker speakers processor amplifier model models product products".split()
+)
+_UNIT_TERMS = frozenset(
+    "db dbu dbv hz khz w kw watt watts va ohm ohms v volt volts kg lb lbs g mm cm in inch inches ms".split()
+)
+
+
+def product_ids(text: str) -> Dict[str, str]:
+    """Model identifiers in text (EX-1280C, DM8SE): compact lowercase id -> label as written"""
+    products = {}
+    for token in _TOKEN_PATTERN.findall(text):
+        letters = sum(char.isalpha() for char in token)
+        if (token[0].isalpha() and letters >= 2 and any(char.isdigit() for char in token)
+                and not _QUANTITY_PATTERN.match(token)):
+            products.setdefault(_compact(token), token)
+    return products
+
+
+def parse_value(text: str) -> Tuple[Optional[float], Optional[str]]:
+    """First number in a value cell and its unit, e.g. "+24 dBu" -> (24.0, "dBu")"""
+    match = _VALUE_PATTERN.search(text)
+    if not match:
+        return None, None
+    number = float(match.group(1).replace(',', '.'))
+    unit = match.group(2)
+    return number, _UNIT_ALIASES.get(unit.lower(), unit) if unit else None
+
+
+def spec_rows_from_table(
+    cells: List[List[str]],
+    source: str,
+    page: Optional[int],
+    table_index: int = 0
+) -> List[Dict]:
+    """
+    Normalize a table into spec rows
+
+    Three shapes are recognized:
+    - header row names products (attribute | DM8SE | DM6PE): one row per
+      product column
+    - first column names products (Model | Net weight, DM8SE | 1.2 kg):
+      transposed, header cells are the attributes
+    - attribute | value rows: only if exactly one product is named across
+      the file name and the table, otherwise the table is skipped
+
+    Only values containing a number are kept.
+
+    Args:
+        cells: Table cells, row-major (camelot table.df.values)
+        source: PDF path
+        page: 1-based page number of the table
+        table_index: Position of the table on its page
+    """
+    grid = [[" ".join(str(cell).split()) for cell in row] for row in cells]
+    grid = [row for row in grid if any(row)]
+    if not grid or len(grid[0]) < 2:
+        return []
+
+    header = grid[0]
+    header_products = [_first_product(cell) for cell in header]
+    row_products = [_first_product(row[0]) for row in grid[1:]]
+    triples = []
+    if any(header_products[1:]):
+        for row in grid[1:]:
+            for column, value in enumerate(row[1:], start=1):
+                if column < len(header_products) and header_products[column]:
+                    triples.append((header_products[column], row[0], value))
+    elif header_products[0] is None and row_products and \
+            sum(product is not None for product in row_products) * 2 > len(row_products):
+        for row, product in zip(grid[1:], row_products):
+            if product is None:
+                continue
+            for column, value in enumerate(row[1:], start=1):
+                if column < len(header):
+                    triples.append((product, header[column], value))
+    else:
+        products = product_ids(Path(source).stem)
+        products.update({
+            key: label for key, label in product_ids(" ".join(" ".join(row) for row in grid)).items()
+            if key not in products
+        })
+        if len(products) != 1:
+            return []
+        product = next(iter(products.items()))
+        for row in grid:
+            triples.append((product, row[0], " ".join(cell for cell in row[1:] if cell)))
+
+    rows = []
+    for (product, product_label), attribute, value in triples:
+        attribute = attribute.rstrip(':')
+        if not re.search(r"[A-Za-z]", attribute) or len(attribute) > 80 or not re.search(r"\d", value):
+            continue
+        number, unit = parse_value(value)
+        rows.append({
+            'product': product,
+            'product_label': product_label,
+            'attribute': _normalize_attribute(attribute),
+            'attribute_label': attribute,
+            'value': value,
+            'value_num': number,
+            'unit': unit,
+            'source': source,
+            'page': page,
+            'table_index': table_index
+        })
+    return rows
+
+
+def pop_spec_rows(chunks: Iterable) -> List[Dict]:
+    """Remove and collect spec rows attached to table chunks by TableProcessor"""
+    rows = []
+    for chunk in chunks:
+        rows.extend(chunk.metadata.pop(SPEC_ROWS_KEY, None) or [])
+    return rows
+
+
+def _compact(text: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", text.lower())
+
+
+def _first_product(text: str) -> Optional[Tuple[str, str]]:
+    return next(iter(product_ids(text).items()), None)
+
+
+def _normalize_attribute(text: str) -> str:
+    return " ".join(_TERM_PATTERN.findall(text.lower()))
+
+
+def _stem(term: str) -> str:
+    return term[:-1] if len(term) > 3 and term.endswith('s') else term
+
+
+def _stems(text: str) -> set:
+    return {_stem(term) for term in _TERM_PATTERN.findall(text.lower()) if term not in _STOPWORDS}
+
+
+class SpecTableStore:
+    """
+    SQLite table of normalized specification rows
+
+    Features:
+    - One row per (product, attribute) value with parsed number and unit
+    - Indexes on product and attribute for direct lookups
+    - Re-ingesting a table replaces its rows (keyed by source, page, table)
+    - answer(): spec lookups and product comparisons without retrieval
+    """
+
+    def __init__(self, path: Path):
+        """
+        Initialize store
+
+        Args:
+            path: SQLite database file
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=5.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS spec_rows ("
+            " product TEXT NOT NULL,"
+            " product_label TEXT NOT NULL,"
+            " attribute TEXT NOT NULL,"
+            " attribute_label TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " value_num REAL,"
+            " unit TEXT,"
+            " source TEXT NOT NULL,"
+            " page INTEGER,"
+            " table_index INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS spec_rows_product ON spec_rows (product, attribute)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS spec_rows_attribute ON spec_rows (attribute)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS spec_rows_table ON spec_rows (source, page, table_index)")
+        self._conn.commit()
+
+        self.stats = {'lookups': 0, 'answered': 0, 'errors': 0}
+        logger.info(f"Spec table store at {self.path} ({self.count()} rows)")
+
+    def add_rows(self, rows: List[Dict]) -> int:
+        """
+        Store rows, replacing earlier rows of the same tables
+
+        Returns:
+            Number of rows written
+        """
+        if not rows:
+            return 0
+        tables = {(row['source'], row['page'], row['table_index']) for row in rows}
+        try:
+            with self._lock:
+                self._conn.executemany(
+                    "DELETE FROM spec_rows WHERE source = ? AND page IS ? AND table_index = ?", list(tables)
+                )
+                self._conn.executemany(
+                    "INSERT INTO spec_rows (product, product_label, attribute, attribute_label, value, "
+                    "value_num, unit, source, page, table_index) VALUES "
+                    "(:product, :product_label, :attribute, :attribute_label, :value, "
+                    ":value_num, :unit, :source, :page, :table_index)",
+                    rows
+                )
+                self._conn.commit()
+        except sqlite3.Error as e:
+            self.stats['errors'] += 1
+            logger.warning(f"Spec table store write failed: {str(e)}")
+            return 0
+        logger.info(f"Spec table store: {len(rows)} rows from {len(tables)} table(s)")
+        return len(rows)
+
+    def lookup(
+        self,
+        product: Optional[str] = None,
+        attribute: Optional[str] = None,
+        prefix: bool = False
+    ) -> List[Dict]:
+        """
+        Rows for a product and/or exact attribute name
+
+        Args:
+            product: Model identifier (exact, so "EX-1280" never returns EX-1280C rows)
+            attribute: Attribute name (case and punctuation insensitive)
+            prefix: Match product as an id prefix instead (browsing only, never for answers)
+        """
+        clauses, params = [], []
+        if product and prefix:
+            clauses.append("product >= ? AND product < ?")
+            params += [_compact(product), _compact(product) + "\uffff"]
+        elif product:
+            clauses.append("product = ?")
+            params.append(_compact(product))
+        if attribute:
+            clauses.append("attribute = ?")
+            params.append(_normalize_attribute(attribute))
+        sql = "SELECT * FROM spec_rows"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        try:
+            with self._lock:
+                cursor = self._conn.execute(sql + " ORDER BY product, attribute", params)
+                names = [column[0] for column in cursor.description]
+                return [dict(zip(names, row)) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            self.stats['errors'] += 1
+            logger.warning(f"Spec table store read failed: {str(e)}")
+            return []
+
+    def answer(self, query: str) -> Optional[Dict]:
+        """
+        Answer a spec lookup or comparison from stored rows
+
+        Every product named in the query must have exactly one value for
+        an attribute containing all of the query's attribute words
+        (fewest extra words wins); otherwise None.
+
+        Returns:
+            {'answer', 'rows'} or None
+        """
+        products = product_ids(query)
+        if not products:
+            return None
+        terms = _stems(query) - _IGNORED_TERMS - _UNIT_TERMS
+        for label in products.values():
+            terms -= _stems(label)
+        if not terms:
+            return None
+
+        with self._lock:
+            self.stats['lookups'] += 1
+
+        matches = []
+        for product in products:
+            best, best_precision = [], 0.0
+            for row in self.lookup(product):
+                attribute_terms = _stems(row['attribute'])
+                if not terms <= attribute_terms:
+                    continue
+                precision = len(terms) / len(attribute_terms)
+                if precision > best_precision:
+                    best, best_precision = [row], precision
+                elif precision == best_precision:
+                    best.append(row)
+            if not best or len({_compact(row['value']) for row in best}) > 1:
+                return None
+            matches.append((best[0]['product_label'], best[0]))
+
+        with self._lock:
+            self.stats['answered'] += 1
+        return {'answer': self._render(matches), 'rows': [row for _, row in matches]}
+
+    @staticmethod
+    def _render(matches: List[Tuple[str, Dict]]) -> str:
+        def cite(row: Dict) -> str:
+            return f"[{os.path.basename(row['source'])}, page {row['page']}]"
+
+        attribute = matches[0][1]['attribute_label']
+        if len(matches) == 1:
+            label, row = matches[0]
+            name = attribute if attribute[:2].isupper() else attribute[0].lower() + attribute[1:]
+            return f"The {name} of the {label} is {row['value']} {cite(row)}."
+
+        answer = f"{attribute}: " + "; ".join(f"{label} {row['value']} {cite(row)}" for label, row in matches) + "."
+        (first_label, first), (second_label, second) = matches[0], matches[-1]
+        if (len(matches) == 2 and first['unit'] and first['unit'] == second['unit']
+                and first['value_num'] is not None and second['value_num'] is not None):
+            difference = abs(first['value_num'] - second['value_num'])
+            if difference:
+                larger = first_label if first['value_num'] > second['value_num'] else second_label
+                answer += f" The {larger} is higher by {difference:g} {first['unit']}."
+        return answer
+
+    def count(self) -> int:
+        """Stored rows"""
+        try:
+            with self._lock:
+                return self._conn.execute("SELECT COUNT(*) FROM spec_rows").fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def get_stats(self) -> Dict:
+        """Row/product counts and lookup statistics"""
+        try:
+            with self._lock:
+                rows, products = self._conn.execute(
+                    "SELECT COUNT(*), COUNT(DISTINCT product) FROM spec_rows"
+                ).fetchone()
+        except sqlite3.Error:
+            rows, products = 0, 0
+        return {'path': str(self.path), 'rows': rows, 'products': products, **self.stats}
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
@@ -1,14 +1,40 @@
 """
 ChromaDB manager with metadata support
 """
-from typing import List, Dict
+from typing import List, Dict, Iterable, Optional, Tuple
+from collections import Counter
+import hashlib
+import threading
+import time
 import chromadb
 from langchain_core.documents import Document
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from config.settings import config
+from src.vector_store.embedding_cache import EmbeddingCache
+from src.vector_store.embedding_batcher import EmbeddingBatcher
+from src.vector_store.collection_version import CollectionVersion, normalize_source
+from src.vector_store.mmap_index import MmapVectorIndex, open_or_build_index
 from src.error_handling.logger import logger
 
 
+def content_digest(text: str) -> str:
+    """SHA-256 digest of chunk text"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def chunk_id(doc: Document) -> str:
+    """
+    Deterministic chunk ID from source path, page, chunk index and content
+    
+    The same chunk of the same file always maps to the same ID, so
+    re-ingesting an unchanged PDF produces no new entries.
+    """
+    source = normalize_source(doc.metadata.get('source', ''))
+    location = f"{source}|{doc.metadata.get('page', '')}|{doc.metadata.get('chunk_id', '')}"
+    location_digest = hashlib.sha1(location.encode('utf-8')).hexdigest()[:12]
+    return f"chunk_{location_digest}_{content_digest(doc.page_content)[:16]}"
+
+
 class EnhancedChromaDB:
     """Enhanced ChromaDB with metadata support"""
     
@@ -31,6 +57,27 @@ class EnhancedChromaDB:
             
             logger.info("Embedding model loaded and cached")
             
+            # Concurrent query embeddings share one forward pass
+            self.embedding_batcher = None
+            self._embed_query_fn = self.embeddings.embed_query
+            if config.ENABLE_EMBEDDING_BATCHER:
+                self.embedding_batcher = EmbeddingBatcher(
+                    self.embeddings.embed_documents,
+                    max_batch=config.EMBEDDING_BATCHER_MAX_BATCH,
+                    max_wait_ms=config.EMBEDDING_BATCHER_MAX_WAIT_MS,
+                    timeout=config.EMBEDDING_TIMEOUT
+                )
+                self._embed_query_fn = self.embedding_batcher.embed
+            
+            # Skip forward passes for texts embedded before (repeat queries, boilerplate chunks)
+            self.embedding_cache = None
+            if config.ENABLE_EMBEDDING_CACHE:
+                self.embedding_cache = EmbeddingCache(
+                    config.EMBEDDING_MODEL,
+                    config.EMBEDDING_CACHE_DIR,
+                    memory_size=config.EMBEDDING_CACHE_MEMORY_SIZE
+                )
+            
             # Initialize ChromaDB with persistence
             self.client = chromadb.PersistentClient(path=str(config.VECTOR_DB_DIR))
             self.collection = self.client.get_or_create_collection(
@@ -38,84 +85,335 @@ class EnhancedChromaDB:
                 metadata={"hnsw:space": "cosine"}
             )
             
+            # Bumped on every add that writes chunks (used in cache keys)
+            self.version = CollectionVersion(config.VECTOR_DB_DIR / "collection_version.json")
+            
             # Track document count
             self.doc_count = self.collection.count()
             logger.info(f"Existing documents in collection: {self.doc_count}")
             
+            # Read-only memory-mapped serving index (VECTOR_BACKEND=mmap), opened lazily
+            self.dense_index: Optional[MmapVectorIndex] = None
+            self._dense_index_lock = threading.Lock()
+            self._dense_index_failed: Optional[str] = None  # Version whose export failed
+            if config.VECTOR_BACKEND == "mmap":
+                logger.info(f"Vector search backend: memory-mapped dense index at {config.DENSE_INDEX_DIR}")
+            
             logger.info("SUCCESS: ChromaDB initialized")
         
         except Exception as e:
             logger.error(f"ChromaDB initialization failed: {str(e)}")
             raise
     
-    def add_documents(self, documents: List[Document]):
-        """Add documents to vector store"""
+    def add_documents(
+        self,
+        documents: List[Document],
+        embed_batch_size: Optional[int] = None,
+        write_batch_size: Optional[int] = None
+    ) -> Dict:
+        """
+        Add documents to vector store using batched embedding
+        
+        Chunks are embedded through embed_documents in batches and written
+        to Chroma in bounded sub-batches, so memory stays flat and per-call
+        overhead is amortized across the batch. Chunk IDs are deterministic
+        (see chunk_id); chunks whose ID already exists are skipped before
+        embedding, and chunks whose content is already stored (content_hash
+        metadata) or repeated in the batch reuse that vector instead of
+        being embedded again.
+        
+        Args:
+            documents: Chunks to add
+            embed_batch_size: Chunks per embedding call (default: config.EMBEDDING_BATCH_SIZE)
+            write_batch_size: Chunks per collection.add call (default: config.VECTOR_DB_WRITE_BATCH_SIZE)
+        
+        Returns:
+            Ingestion statistics (new chunk IDs, skipped duplicates, elapsed time, chunks/second)
+        """
+        
+        embed_batch_size = max(1, embed_batch_size or config.EMBEDDING_BATCH_SIZE)
+        write_batch_size = max(1, write_batch_size or config.VECTOR_DB_WRITE_BATCH_SIZE)
+        
+        # Chroma rejects adds larger than its own limit
+        max_batch_size = getattr(self.client, 'max_batch_size', None)
+        if max_batch_size:
+            write_batch_size = min(write_batch_size, max_batch_size)
         
         try:
-            logger.info(f"Adding {len(documents)} documents...")
+            logger.info(
+                f"Adding {len(documents)} documents "
+                f"(embed_batch={embed_batch_size}, write_batch={write_batch_size})..."
+            )
+            
+            start_time = time.time()
             
-            # Prepare batch data
+            # Deduplicate against the batch itself and the collection
+            total_requested = len(documents)
+            documents, doc_ids = self._filter_existing(documents)
+            skipped = total_requested - len(documents)
+            if skipped:
+                logger.info(f"Skipping {skipped} chunks already in the collection")
+            
+            # Vectors of content already stored under another ID
+            hashes = [content_digest(doc.page_content) for doc in documents]
+            uses_left = Counter(hashes)
+            known_vectors = self._stored_embeddings(uses_left)
+            reused = 0
+            
+            embedding_time = 0.0
+            write_time = 0.0
+            added = 0
+            added_ids = []
+            
+            # Pending write buffer
             ids = []
             embeddings = []
             docs_content = []
             metadatas = []
             
-            for i, doc in enumerate(documents):
-                # Generate unique ID using current count + index
-                doc_id = f"doc_{self.doc_count + i}"
-                ids.append(doc_id)
+            for batch_start in range(0, len(documents), embed_batch_size):
+                batch = documents[batch_start:batch_start + embed_batch_size]
+                batch_hashes = hashes[batch_start:batch_start + embed_batch_size]
+                
+                # Embed each new content once, in one forward pass for the batch
+                texts = {}
+                for content_hash, doc in zip(batch_hashes, batch):
+                    if content_hash not in known_vectors:
+                        texts.setdefault(content_hash, doc.page_content)
+                reused += len(batch) - len(texts)
+                if texts:
+                    embed_start = time.time()
+                    known_vectors.update(zip(texts, self._embed_documents(list(texts.values()))))
+                    embedding_time += time.time() - embed_start
                 
-                # Generate embedding
-                embedding = self.embeddings.embed_query(doc.page_content)
-                embeddings.append(embedding)
+                for i, doc in enumerate(batch):
+                    doc_id = doc_ids[batch_start + i]
+                    content_hash = batch_hashes[i]
+                    ids.append(doc_id)
+                    added_ids.append(doc_id)
+                    embeddings.append(known_vectors[content_hash])
+                    docs_content.append(doc.page_content)
+                    metadatas.append({**doc.metadata, 'content_hash': content_hash})
+                    # Keep a vector only while later chunks still need it
+                    uses_left[content_hash] -= 1
+                    if not uses_left[content_hash]:
+                        del known_vectors[content_hash]
                 
-                docs_content.append(doc.page_content)
-                metadatas.append(doc.metadata)
+                # Flush bounded sub-batch to Chroma
+                if len(ids) >= write_batch_size:
+                    write_start = time.time()
+                    added += self._write_batch(ids, embeddings, docs_content, metadatas, write_batch_size)
+                    write_time += time.time() - write_start
                 
-                if (i + 1) % 10 == 0:
-                    logger.info(f"Processed {i + 1}/{len(documents)} documents...")
+                processed = min(batch_start + embed_batch_size, len(documents))
+                elapsed = time.time() - start_time
+                rate = processed / elapsed if elapsed > 0 else 0.0
+                logger.info(f"Embedded {processed}/{len(documents)} documents ({rate:.1f} chunks/s)...")
             
-            # Add all documents in batch
-            self.collection.add(
-                ids=ids,
-                embeddings=embeddings,
-                documents=docs_content,
-                metadatas=metadatas
-            )
+            # Flush remainder
+            if ids:
+                write_start = time.time()
+                added += self._write_batch(ids, embeddings, docs_content, metadatas, write_batch_size)
+                write_time += time.time() - write_start
+            
+            if added:
+                self.version.bump({doc.metadata.get('source', '') for doc in documents})
+                # Export the new serving index now rather than on the next query
+                self._serving_index()
             
             # Update document count
-            self.doc_count += len(documents)
+            self.doc_count += added
+            elapsed = time.time() - start_time
+            chunks_per_second = added / elapsed if elapsed > 0 else 0.0
             new_total = self.collection.count()
-            logger.info(f"SUCCESS: {len(documents)} documents added. Total in DB: {new_total}")
+            logger.info(
+                f"SUCCESS: {added} documents added in {elapsed:.2f}s "
+                f"({chunks_per_second:.1f} chunks/s, {reused} embeddings reused). Total in DB: {new_total}"
+            )
+            
+            return {
+                'ids': added_ids,
+                'chunks_added': added,
+                'chunks_skipped': skipped,
+                'embeddings_reused': reused,
+                'elapsed_seconds': round(elapsed, 3),
+                'embedding_seconds': round(embedding_time, 3),
+                'write_seconds': round(write_time, 3),
+                'chunks_per_second': round(chunks_per_second, 1),
+                'total_in_db': new_total
+            }
         
         except Exception as e:
             logger.error(f"Failed to add documents: {str(e)}")
             raise
     
-    def search(self, query: str, k: int = 5) -> Dict:
-        """Search documents"""
+    def remove_stale_chunks(self, current_ids: Dict[str, Iterable[str]]) -> List[str]:
+        """
+        Delete chunks of re-ingested sources that the new ingest no longer produced
+
+        Call after add_documents with every chunk ID extracted from each
+        fully processed source: stored chunks of that source with other IDs
+        belong to an earlier version of the file (changed or removed text).
+
+        Args:
+            current_ids: Source path -> chunk IDs of its latest ingest
+
+        Returns:
+            Deleted chunk IDs
+        """
+        if not current_ids:
+            return []
+
+        stored = self.collection.get(where={'source': {'$in': list(current_ids)}}, include=['metadatas'])
+        keep = {source: set(ids) for source, ids in current_ids.items()}
+        stale = []
+        sources = set()
+        for doc_id, metadata in zip(stored['ids'], stored['metadatas']):
+            source = (metadata or {}).get('source', '')
+            if doc_id not in keep.get(source, ()):
+                stale.append(doc_id)
+                sources.add(source)
+        if not stale:
+            return []
+
+        lookup_batch = getattr(self.client, 'max_batch_size', None) or 1000
+        for offset in range(0, len(stale), lookup_batch):
+            self.collection.delete(ids=stale[offset:offset + lookup_batch])
+
+        self.version.bump(sources)
+        self._serving_index()
+        self.doc_count = max(0, self.doc_count - len(stale))
+        logger.info(f"Removed {len(stale)} outdated chunks of {len(sources)} re-ingested document(s)")
+        return stale
+
+    def _filter_existing(self, documents: List[Document]) -> Tuple[List[Document], List[str]]:
+        """
+        Drop chunks whose deterministic ID is repeated or already stored
+        
+        Returns:
+            (remaining documents, their IDs)
+        """
+        unique: Dict[str, Document] = {}
+        for doc in documents:
+            unique.setdefault(chunk_id(doc), doc)
+        
+        candidate_ids = list(unique.keys())
+        existing = set()
+        lookup_batch = getattr(self.client, 'max_batch_size', None) or 1000
+        for offset in range(0, len(candidate_ids), lookup_batch):
+            result = self.collection.get(ids=candidate_ids[offset:offset + lookup_batch], include=[])
+            existing.update(result['ids'])
+        
+        doc_ids = [doc_id for doc_id in candidate_ids if doc_id not in existing]
+        return [unique[doc_id] for doc_id in doc_ids], doc_ids
+    
+    def _stored_embeddings(self, content_hashes: Iterable[str]) -> Dict[str, List[float]]:
+        """Stored vectors for chunks whose content_hash is in content_hashes (hash -> vector)"""
+        content_hashes = list(content_hashes)
+        vectors: Dict[str, List[float]] = {}
+        lookup_batch = getattr(self.client, 'max_batch_size', None) or 1000
+        for offset in range(0, len(content_hashes), lookup_batch):
+            try:
+                result = self.collection.get(
+                    where={'content_hash': {'$in': content_hashes[offset:offset + lookup_batch]}},
+                    include=['embeddings', 'metadatas']
+                )
+            except Exception as e:
+                logger.warning(f"Content hash lookup failed, embedding all chunks: {str(e)}")
+                return vectors
+            embeddings = result.get('embeddings')
+            if embeddings is None:
+                continue
+            for metadata, embedding in zip(result['metadatas'] or [], embeddings):
+                content_hash = (metadata or {}).get('content_hash')
+                if content_hash and embedding is not None:
+                    vectors.setdefault(content_hash, [float(value) for value in embedding])
+        return vectors
+    
+    def _write_batch(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        docs_content: List[str],
+        metadatas: List[Dict],
+        write_batch_size: int
+    ) -> int:
+        """Write buffered chunks to Chroma in sub-batches and clear the buffer"""
+        written = 0
+        for offset in range(0, len(ids), write_batch_size):
+            end = offset + write_batch_size
+            self.collection.add(
+                ids=ids[offset:end],
+                embeddings=embeddings[offset:end],
+                documents=docs_content[offset:end],
+                metadatas=metadatas[offset:end]
+            )
+            written += len(ids[offset:end])
+        
+        ids.clear()
+        embeddings.clear()
+        docs_content.clear()
+        metadatas.clear()
+        return written
+    
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a query (same vector search() uses, so it can be shared)"""
+        embedding_start = time.time()
+        if self.embedding_cache:
+            query_embedding = self.embedding_cache.embed_query(query, self._embed_query_fn)
+        else:
+            query_embedding = self._embed_query_fn(query)
+        logger.info(f"Query embedding generated in {time.time() - embedding_start:.2f}s")
+        return query_embedding
+    
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed many queries in one batched forward pass (through the embedding cache)"""
+        embedding_start = time.time()
+        if self.embedding_cache:
+            embeddings = self.embedding_cache.embed_documents(queries, self.embeddings.embed_documents, kind="query")
+        else:
+            embeddings = self.embeddings.embed_documents(queries)
+        logger.info(f"{len(queries)} query embeddings generated in {time.time() - embedding_start:.2f}s")
+        return embeddings
+    
+    def _embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed chunk texts, through the embedding cache if enabled"""
+        if self.embedding_cache:
+            return self.embedding_cache.embed_documents(texts, self.embeddings.embed_documents)
+        return self.embeddings.embed_documents(texts)
+    
+    def search(self, query: str, k: int = 5, query_embedding: Optional[List[float]] = None) -> Dict:
+        """
+        Search documents
+        
+        Args:
+            query: Query text
+            k: Number of results
+            query_embedding: Precomputed embed_query(query) result, if the caller has one
+        """
         
         try:
-            import time
-            total_docs = self.collection.count()
+            index = self._serving_index()
+            total_docs = index.count if index is not None else self.collection.count()
             logger.info(f"Searching in {total_docs} documents for: '{query[:50]}...'")
             
             if total_docs == 0:
                 logger.warning("Collection is empty! No documents to search.")
                 return {'documents': [[]], 'metadatas': [[]], 'distances': [[]]}
             
-            embedding_start = time.time()
-            query_embedding = self.embeddings.embed_query(query)
-            embedding_time = time.time() - embedding_start
-            logger.info(f"Query embedding generated in {embedding_time:.2f}s")
+            if query_embedding is None:
+                query_embedding = self.embed_query(query)
             
             search_start = time.time()
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=min(k, total_docs)
-            )
+            if index is not None:
+                results = index.query([query_embedding], n_results=min(k, total_docs))
+            else:
+                results = self.collection.query(
+                    query_embeddings=[query_embedding],
+                    n_results=min(k, total_docs)
+                )
             search_time = time.time() - search_start
-            logger.info(f"ChromaDB search completed in {search_time:.2f}s")
+            logger.info(f"{'Dense index' if index is not None else 'ChromaDB'} search completed in {search_time:.2f}s")
             
             # Log search results
             num_results = len(results['documents'][0]) if results.get('documents') else 0
@@ -130,6 +428,98 @@ class EnhancedChromaDB:
             logger.error(f"Search failed: {str(e)}")
             raise
     
+    def search_batch(
+        self,
+        queries: List[str],
+        k: int = 5,
+        query_embeddings: Optional[List[List[float]]] = None
+    ) -> List[Dict]:
+        """
+        Search many queries with one multi-vector collection.query call
+        
+        Args:
+            queries: Query texts
+            k: Number of results per query
+            query_embeddings: Precomputed embeddings (embed_queries), if available
+        
+        Returns:
+            One search()-shaped result dict per query
+        """
+        index = self._serving_index()
+        total_docs = index.count if index is not None else self.collection.count()
+        if total_docs == 0 or not queries:
+            return [{'ids': [[]], 'documents': [[]], 'metadatas': [[]], 'distances': [[]]} for _ in queries]
+        
+        if query_embeddings is None:
+            query_embeddings = self.embed_queries(queries)
+        
+        search_start = time.time()
+        if index is not None:
+            results = index.query(query_embeddings, n_results=min(k, total_docs))
+        else:
+            results = self.collection.query(
+                query_embeddings=query_embeddings,
+                n_results=min(k, total_docs)
+            )
+        logger.info(f"{'Dense index' if index is not None else 'ChromaDB'} batch search ({len(queries)} queries) completed in {time.time() - search_start:.2f}s")
+        
+        return [
+            {field: [results[field][i]] for field in ('ids', 'documents', 'metadatas', 'distances')}
+            for i in range(len(queries))
+        ]
+    
+    def get_documents(self, ids: List[str]) -> Dict[str, Document]:
+        """Chunks by ID (no embedding or similarity search)"""
+        index = self._serving_index()
+        if index is not None:
+            return index.get_documents(ids)
+        
+        results = self.collection.get(ids=ids, include=['documents', 'metadatas'])
+        return {
+            doc_id: Document(page_content=text, metadata=metadata or {})
+            for doc_id, text, metadata in zip(results['ids'], results['documents'], results['metadatas'])
+        }
+    
+    def _serving_index(self) -> Optional[MmapVectorIndex]:
+        """
+        Dense index for the current collection version (VECTOR_BACKEND=mmap)
+        
+        Reopened (or re-exported from Chroma) when the collection version
+        changes. Returns None - search through Chroma - for the chroma
+        backend or if the index cannot be built.
+        """
+        if config.VECTOR_BACKEND != "mmap":
+            return None
+        
+        version_key = self.version.key
+        index = self.dense_index
+        if index is not None and index.version_key == version_key:
+            return index
+        
+        if self._dense_index_failed == version_key:
+            return None
+        
+        with self._dense_index_lock:
+            index = self.dense_index
+            if index is not None and index.version_key == version_key:
+                return index
+            try:
+                self.dense_index = open_or_build_index(
+                    self.collection,
+                    config.DENSE_INDEX_DIR,
+                    version_key,
+                    ann_threshold=config.DENSE_INDEX_ANN_THRESHOLD,
+                    n_probe=config.DENSE_INDEX_NPROBE,
+                    quantization=config.DENSE_INDEX_QUANTIZATION,
+                    rerank_factor=config.DENSE_INDEX_RERANK_FACTOR
+                )
+                logger.info(f"Dense index opened: {self.dense_index.count} vectors (collection version {version_key})")
+            except Exception as e:
+                logger.warning(f"Dense index unavailable, searching ChromaDB: {str(e)}")
+                self._dense_index_failed = version_key
+                return None
+            return self.dense_index
+    
     def load_existing(self):
         """Load existing collection"""
         
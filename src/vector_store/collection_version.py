@@ -0,0 +1,148 @@
+"""
+Collection versioning for cache invalidation
+A monotonically increasing counter bumped whenever chunks are added,
+plus the version at which each source PDF was last (re-)ingested
+
+Stored as JSON next to the Chroma data so every process on the host sees
+the same version. The epoch is a random ID created with the file, so a
+wiped vector store never reuses version numbers of the old corpus.
+"""
+from typing import Dict, Iterable, Optional
+from pathlib import Path, PurePath
+import json
+import os
+import threading
+import uuid
+
+from src.error_handling.logger import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-writer only
+    fcntl = None
+
+
+def normalize_source(source: str) -> str:
+    """Source path in the form stored in chunk metadata and cited in answers"""
+    return PurePath(source).as_posix() if source else ''
+
+
+class CollectionVersion:
+    """
+    Versioned identity of the vector collection
+
+    - key: "<epoch>:<version>", changes on every ingestion that adds chunks
+    - source_version(src): version at which src last received new chunks
+    """
+
+    def __init__(self, path: Path):
+        """
+        Initialize version tracking
+
+        Args:
+            path: JSON file holding epoch, version and per-source versions
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._file_id: Optional[tuple] = None
+        self._state: Dict = {}
+        self._reload(force=True)
+
+        if not self._state:
+            self._write({'epoch': uuid.uuid4().hex[:12], 'version': 0, 'sources': {}})
+        logger.info(f"Collection version: {self.key}")
+
+    def _reload(self, force: bool = False):
+        """Re-read the file if another process changed it"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        # Writes replace the file, so the inode changes even within one mtime tick
+        file_id = (stat.st_ino, stat.st_mtime_ns)
+        if force or file_id != self._file_id:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self._state = json.load(f)
+                self._file_id = file_id
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not read collection version: {str(e)}")
+
+    def _write(self, state: Dict):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+        self._state = state
+        stat = os.stat(self.path)
+        self._file_id = (stat.st_ino, stat.st_mtime_ns)
+
+    @property
+    def version(self) -> int:
+        with self._lock:
+            self._reload()
+            return self._state.get('version', 0)
+
+    @property
+    def epoch(self) -> str:
+        with self._lock:
+            self._reload()
+            return self._state.get('epoch', '')
+
+    @property
+    def key(self) -> str:
+        """Cache-key component: epoch + version"""
+        with self._lock:
+            self._reload()
+            return self.state_key(self._state)
+
+    @staticmethod
+    def state_key(state: Dict) -> str:
+        """Cache-key component of a state dict (see key)"""
+        return f"{state.get('epoch', '')}:{state.get('version', 0)}"
+
+    def peek(self) -> Dict:
+        """
+        Last loaded state, without checking the file
+
+        Never blocks (state dicts are replaced, not mutated), but may lag
+        a change made by another process until the next reloading call.
+        """
+        return self._state
+
+    def source_version(self, source: str) -> int:
+        """Version at which source last received new chunks (0 = never)"""
+        with self._lock:
+            self._reload()
+            return self._state.get('sources', {}).get(normalize_source(source), 0)
+
+    def bump(self, sources: Iterable[str]) -> int:
+        """
+        Increment the version after chunks from `sources` were added
+
+        Returns:
+            New version
+        """
+        with self._lock, open(self.path.with_name(self.path.name + ".lock"), "w") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self._reload(force=True)
+            state = {
+                'epoch': self._state.get('epoch') or uuid.uuid4().hex[:12],
+                'version': self._state.get('version', 0) + 1,
+                'sources': dict(self._state.get('sources', {}))
+            }
+            for source in sources:
+                state['sources'][normalize_source(source)] = state['version']
+            self._write(state)
+
+        logger.info(f"Collection version bumped to {state['version']}")
+        return state['version']
+
+    def is_stale(self, version: int, sources: Iterable[str], state: Optional[Dict] = None) -> bool:
+        """True if any of `sources` was re-ingested after `version` (per `state`, default: the file)"""
+        if state is None:
+            return any(self.source_version(source) > version for source in sources if source)
+        versions = state.get('sources', {})
+        return any(versions.get(normalize_source(source), 0) > version for source in sources if source)
@@ -0,0 +1,172 @@
+"""
+Micro-batched query embedding
+Concurrent embed requests are gathered for a few milliseconds and encoded
+in one SentenceTransformer forward pass
+"""
+from typing import Callable, Dict, List
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+import queue
+import threading
+import time
+
+from src.error_handling.logger import logger
+
+
+class EmbeddingBatcher:
+    """
+    Background batching service in front of the embedding model
+
+    Callers block in embed() while a single worker thread collects requests
+    until max_batch items are queued or max_wait has passed since the first
+    one, runs embed_fn on the batch, and fans the vectors back out. Callers
+    give up after timeout seconds; requests abandoned before their batch
+    starts are dropped.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[List[str]], List[List[float]]],
+        max_batch: int = 32,
+        max_wait_ms: float = 5.0,
+        timeout: float = 30.0
+    ):
+        """
+        Initialize batcher
+
+        Args:
+            embed_fn: Batch embedding function (e.g. HuggingFaceEmbeddings.embed_documents)
+            max_batch: Maximum texts per forward pass
+            max_wait_ms: Maximum time the first request in a batch waits for company
+            timeout: Seconds embed() waits for its vector before raising TimeoutError
+        """
+        self.embed_fn = embed_fn
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.timeout = timeout
+        self._closed = False
+
+        # (text, future, enqueue time) items; None stops the worker
+        self._queue: queue.Queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'batches': 0,
+            'items': 0,
+            'errors': 0,
+            'timeouts': 0,
+            'total_queue_wait': 0.0,
+            'total_encode_time': 0.0
+        }
+        # Batch-size histogram, power-of-two buckets: "1", "2-3", "4-7", ...
+        self.histogram: Dict[str, int] = {}
+
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+        logger.info(f"Embedding batcher started (max_batch={self.max_batch}, max_wait={max_wait_ms}ms)")
+
+    def embed(self, text: str) -> List[float]:
+        """
+        Embed one text (blocks until its batch has been encoded)
+
+        Raises:
+            TimeoutError: If no vector arrives within timeout seconds
+            RuntimeError: If the batcher was closed
+        """
+        if self._closed:
+            raise RuntimeError("Embedding batcher is closed")
+        future: Future = Future()
+        self._queue.put((text, future, time.time()))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            with self._stats_lock:
+                self.stats['timeouts'] += 1
+            raise TimeoutError(f"Query embedding timed out after {self.timeout}s")
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+
+            batch = [first]
+            deadline = time.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.time()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)  # Finish this batch, then stop
+                    break
+                batch.append(item)
+
+            # Callers that timed out before the batch started are dropped
+            batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                self._encode(batch)
+            except Exception as e:
+                # Never leave a caller waiting on a future the worker gave up on
+                logger.error(f"Embedding batch failed: {str(e)}")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _encode(self, batch: List[tuple]):
+        texts = [text for text, _, _ in batch]
+        encode_start = time.time()
+        try:
+            vectors = self.embed_fn(texts)
+            if len(vectors) != len(batch):
+                raise ValueError(f"embed_fn returned {len(vectors)} vectors for {len(batch)} texts")
+        except Exception as e:
+            with self._stats_lock:
+                self.stats['errors'] += 1
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        encode_time = time.time() - encode_start
+
+        for (_, future, _), vector in zip(batch, vectors):
+            future.set_result(vector)
+
+        size = len(batch)
+        low = 1 << (size.bit_length() - 1)
+        bucket = str(low) if low == 1 else f"{low}-{2 * low - 1}"
+        with self._stats_lock:
+            self.stats['batches'] += 1
+            self.stats['items'] += size
+            self.stats['total_queue_wait'] += sum(encode_start - queued for _, _, queued in batch)
+            self.stats['total_encode_time'] += encode_time
+            self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+
+        if size > 1:
+            logger.debug(f"Embedded micro-batch of {size} queries in {encode_time * 1000:.1f}ms")
+
+    def get_stats(self) -> Dict:
+        """Batch counts, average batch size and batch-size histogram"""
+        with self._stats_lock:
+            batches = self.stats['batches']
+            items = self.stats['items']
+            return {
+                'max_batch': self.max_batch,
+                'max_wait_ms': round(self.max_wait * 1000, 1),
+                'batches': batches,
+                'items': items,
+                'errors': self.stats['errors'],
+                'timeouts': self.stats['timeouts'],
+                'avg_batch_size': round(items / batches, 2) if batches else 0.0,
+                'avg_queue_wait_ms': round(self.stats['total_queue_wait'] / items * 1000, 2) if items else 0.0,
+                'avg_encode_ms': round(self.stats['total_encode_time'] / batches * 1000, 2) if batches else 0.0,
+                'batch_size_histogram': dict(sorted(self.histogram.items(), key=lambda bucket: int(bucket[0].split('-')[0])))
+            }
+
+    def close(self):
+        """Stop the worker after pending requests are served"""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
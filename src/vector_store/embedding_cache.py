@@ -0,0 +1,263 @@
+"""
+Content-addressed embedding cache
+Bounded in-memory LRU in front of an append-only float32 store on disk,
+keyed by embedding model + text digest
+
+Layout (one directory per embedding model):
+- meta.json     model name and vector dimension
+- vectors.f32   raw float32 rows, appended
+- keys.tsv      "<digest>\t<row>" lines, appended after the row is written
+
+Several processes may share the directory: appends are serialized with
+an advisory file lock (POSIX), under which a writer first drops any torn
+tail left by a crashed writer and re-reads keys.tsv; each process picks up
+rows written by the others by reading new lines of keys.tsv on a miss.
+"""
+from typing import Callable, Dict, List, Optional
+from collections import OrderedDict
+from pathlib import Path
+import hashlib
+import json
+import os
+import re
+import threading
+
+import numpy as np
+
+from src.error_handling.logger import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-writer only
+    fcntl = None
+
+
+def text_digest(text: str, kind: str = "document") -> str:
+    """Cache key for a text ('query' and 'document' embeddings are kept apart)"""
+    return hashlib.sha256(f"{kind}\0{text}".encode('utf-8')).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Embedding lookups before SentenceTransformer forward passes
+
+    Features:
+    - In-memory LRU of recently used vectors
+    - Disk store shared across restarts and processes
+    - Batch API: only unseen texts are sent to the model, in one call
+    """
+
+    def __init__(self, model_name: str, directory: Path, memory_size: int = 10000):
+        """
+        Initialize cache
+
+        Args:
+            model_name: Embedding model (vectors of different models never mix)
+            directory: Root cache directory (a subdirectory per model is used)
+            memory_size: Vectors kept in the in-memory LRU
+        """
+        self.model_name = model_name
+        self.memory_size = memory_size
+        self.path = Path(directory) / re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        self._memory: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._rows: Dict[str, int] = {}
+        self._keys_offset = 0
+        self._dim: Optional[int] = None
+        self._lock = threading.RLock()
+
+        self.stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0
+        }
+
+        meta_file = self.path / "meta.json"
+        if meta_file.exists():
+            with open(meta_file, encoding="utf-8") as f:
+                self._dim = json.load(f).get('dim')
+        self._sync_keys()
+
+        logger.info(f"Embedding cache at {self.path} ({len(self._rows)} vectors on disk)")
+
+    def embed_query(self, text: str, embed_fn: Callable[[str], List[float]]) -> List[float]:
+        """Cached embed_fn(text) for a query"""
+        digest = text_digest(text, "query")
+        with self._lock:
+            vector = self._lookup(digest)
+        if vector is None:
+            vector = np.asarray(embed_fn(text), dtype=np.float32)
+            with self._lock:
+                self._store([digest], [vector])
+        return vector.tolist()
+
+    def embed_documents(
+        self,
+        texts: List[str],
+        embed_fn: Callable[[List[str]], List[List[float]]],
+        kind: str = "document"
+    ) -> List[List[float]]:
+        """
+        Cached embed_fn(texts): unseen (deduplicated) texts go to the model in one call
+
+        Args:
+            texts: Texts to embed
+            embed_fn: Batch embedding function
+            kind: "document" or "query" (kept apart, see text_digest)
+
+        Returns:
+            Embeddings in input order
+        """
+        digests = [text_digest(text, kind) for text in texts]
+        vectors: Dict[str, np.ndarray] = {}
+        missing: Dict[str, str] = {}
+
+        with self._lock:
+            for digest, text in zip(digests, texts):
+                if digest in vectors or digest in missing:
+                    continue
+                vector = self._lookup(digest)
+                if vector is None:
+                    missing[digest] = text
+                else:
+                    vectors[digest] = vector
+
+        if missing:
+            computed = embed_fn(list(missing.values()))
+            new_vectors = [np.asarray(vector, dtype=np.float32) for vector in computed]
+            vectors.update(zip(missing.keys(), new_vectors))
+            with self._lock:
+                self._store(list(missing.keys()), new_vectors)
+
+        return [vectors[digest].tolist() for digest in digests]
+
+    def _lookup(self, digest: str) -> Optional[np.ndarray]:
+        """Memory, then disk (syncing rows other processes appended)"""
+        vector = self._memory.get(digest)
+        if vector is not None:
+            self._memory.move_to_end(digest)
+            self.stats['memory_hits'] += 1
+            return vector
+
+        if digest not in self._rows:
+            self._sync_keys()
+        row = self._rows.get(digest)
+        if row is None:
+            self.stats['misses'] += 1
+            return None
+
+        vector = self._read_row(row)
+        if vector is None:
+            self.stats['misses'] += 1
+            return None
+        self._remember(digest, vector)
+        self.stats['disk_hits'] += 1
+        return vector
+
+    def _remember(self, digest: str, vector: np.ndarray):
+        self._memory[digest] = vector
+        self._memory.move_to_end(digest)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _read_row(self, row: int) -> Optional[np.ndarray]:
+        row_bytes = self._dim * 4
+        with open(self.path / "vectors.f32", "rb") as f:
+            f.seek(row * row_bytes)
+            data = f.read(row_bytes)
+        if len(data) != row_bytes:
+            return None
+        return np.frombuffer(data, dtype=np.float32).copy()
+
+    def _sync_keys(self):
+        """Read keys.tsv lines appended since the last sync"""
+        keys_file = self.path / "keys.tsv"
+        if not keys_file.exists():
+            return
+        with open(keys_file, "rb") as f:
+            f.seek(self._keys_offset)
+            data = f.read()
+        # Ignore a trailing partial line (writer mid-append)
+        complete = data[:data.rfind(b"\n") + 1]
+        for line in complete.decode("utf-8").splitlines():
+            digest, row = line.split("\t")
+            self._rows[digest] = int(row)
+        self._keys_offset += len(complete)
+
+    def _store(self, digests: List[str], vectors: List[np.ndarray]):
+        """Append vectors to disk and the memory LRU"""
+        for digest, vector in zip(digests, vectors):
+            self._remember(digest, vector)
+
+        if self._dim is None:
+            self._dim = int(vectors[0].shape[0])
+            with open(self.path / "meta.json", "w", encoding="utf-8") as f:
+                json.dump({'model': self.model_name, 'dim': self._dim}, f)
+
+        vectors_file = self.path / "vectors.f32"
+        keys_file = self.path / "keys.tsv"
+        row_bytes = self._dim * 4
+        with open(keys_file, "ab") as keys_out, open(vectors_file, "ab") as vectors_out:
+            if fcntl:
+                fcntl.flock(keys_out, fcntl.LOCK_EX)
+            try:
+                self._repair_tail(keys_file, vectors_file, row_bytes)
+                # Pick up rows other processes appended since our last sync,
+                # so a vector they already stored is not appended again
+                self._sync_keys()
+                # Rows are assigned from the file size under the lock, so
+                # concurrent writers never hand out the same row twice
+                row = os.path.getsize(vectors_file) // row_bytes
+                lines = []
+                for digest, vector in zip(digests, vectors):
+                    if digest in self._rows or vector.shape[0] != self._dim:
+                        continue
+                    vectors_out.write(np.ascontiguousarray(vector, dtype=np.float32).tobytes())
+                    lines.append(f"{digest}\t{row}\n")
+                    self._rows[digest] = row
+                    row += 1
+                # Vectors hit the file before the keys that point at them
+                vectors_out.flush()
+                keys_out.write("".join(lines).encode("utf-8"))
+                keys_out.flush()
+            finally:
+                if fcntl:
+                    fcntl.flock(keys_out, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _repair_tail(keys_file: Path, vectors_file: Path, row_bytes: int):
+        """
+        Drop a torn append left by a writer that died mid-write (call under the lock)
+
+        A partial row in vectors.f32 would shift every row appended after it,
+        and a partial line in keys.tsv would be glued to the next key. No
+        complete key points into either tail, since keys are written last.
+        """
+        size = os.path.getsize(vectors_file)
+        if size % row_bytes:
+            logger.warning(f"Embedding cache: dropping {size % row_bytes} bytes of a torn vector row")
+            os.truncate(vectors_file, size - size % row_bytes)
+
+        size = os.path.getsize(keys_file)
+        if size:
+            with open(keys_file, "rb") as f:
+                f.seek(max(0, size - 4096))
+                tail = f.read()
+            if not tail.endswith(b"\n"):
+                keep = size - len(tail) + tail.rfind(b"\n") + 1
+                logger.warning("Embedding cache: dropping a torn keys.tsv line")
+                os.truncate(keys_file, keep)
+
+    def get_stats(self) -> Dict:
+        """Hit/miss counts and sizes"""
+        with self._lock:
+            lookups = self.stats['memory_hits'] + self.stats['disk_hits'] + self.stats['misses']
+            hits = self.stats['memory_hits'] + self.stats['disk_hits']
+            return {
+                'model': self.model_name,
+                'memory_entries': len(self._memory),
+                'disk_entries': len(self._rows),
+                'hit_rate': round(hits / lookups * 100, 2) if lookups else 0.0,
+                **self.stats
+            }
@@ -0,0 +1,441 @@
+"""
+Memory-mapped dense vector index
+Read-only serving copy of the Chroma collection: embeddings in a .npy
+matrix searched with NumPy, chunk text and metadata in sidecar files
+
+Layout (one directory):
+- meta.json           format, collection version, sizes, partitioning
+- ids.json            chunk IDs (row i of the matrix)
+- vectors.npy         float32[n, dim] L2-normalized embeddings
+- texts.bin           UTF-8 chunk texts, concatenated
+- text_offsets.npy    int64[n + 1] byte offsets into texts.bin
+- metadata.json       metadata columns: {key: [value per row]}
+- centroids.npy       float32[n_lists, dim] IVF centroids (large corpora only)
+- list_offsets.npy    int64[n_lists + 1] row range of each IVF list
+- codes.npy           int8[n, dim] scalar-quantized rows (int8 quantization only)
+- scales.npy          float32[n] per-row dequantization scale (int8 only)
+
+Arrays and texts are opened with mmap, so worker processes on one host
+share a single page-cached copy and pay no load cost per process.
+
+Small corpora are searched exactly (one matrix product). Above
+ann_threshold rows, rows are grouped by nearest k-means centroid (IVF)
+and a query only scans the n_probe closest lists.
+
+With int8 quantization the scan reads the int8 codes (~4x less memory
+traffic and resident memory than float32), and only the top
+k * rerank_factor candidates are re-scored exactly against the float32
+rows, which stay on disk and are paged in for those rows alone. The disk
+footprint therefore grows (~1.25x float32-only); see memory_stats().
+"""
+from typing import Any, Dict, List, Optional, Sequence
+from pathlib import Path
+import json
+import mmap
+import os
+import shutil
+import time
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.error_handling.logger import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-writer only
+    fcntl = None
+
+
+INDEX_FORMAT = 1
+QUANTIZATIONS = ("none", "int8")
+
+# Rows dequantized per block when scanning int8 codes
+SCAN_BLOCK_ROWS = 16384
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first"""
+    if k >= len(scores):
+        return np.argsort(-scores, kind='stable')
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
+def quantize_int8(matrix: np.ndarray) -> tuple:
+    """Symmetric per-row int8 codes and scales (row ~= codes * scale)"""
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def _kmeans(vectors: np.ndarray, n_lists: int, iterations: int = 10, sample_size: int = 100_000) -> np.ndarray:
+    """Spherical k-means centroids on a sample of the (normalized) rows"""
+    rng = np.random.default_rng(0)
+    if len(vectors) > sample_size:
+        vectors = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+    centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        for j in range(n_lists):
+            members = vectors[assignment == j]
+            if len(members):
+                centroids[j] = members.sum(axis=0)
+        centroids = _normalize_rows(centroids)
+    return centroids
+
+
+class MmapVectorIndex:
+    """
+    Exact or IVF cosine search over a memory-mapped embedding matrix
+
+    query() returns results in collection.query() form, so retrievers
+    work unchanged on either backend.
+    """
+
+    def __init__(self, path: Path, n_probe: int = 16, rerank_factor: int = 4):
+        """
+        Open an index directory
+
+        Args:
+            path: Index directory (see build_index)
+            n_probe: IVF lists scanned per query (ignored for exact search)
+            rerank_factor: int8 candidates per result re-scored in float32
+        """
+        self.path = Path(path)
+        with open(self.path / "meta.json", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get('format') != INDEX_FORMAT:
+            raise ValueError(f"Unsupported dense index format: {self.meta.get('format')}")
+
+        self.version_key: str = self.meta['collection_version']
+        self.count: int = self.meta['n_docs']
+        self.n_probe = max(1, n_probe)
+        self.rerank_factor = max(1, rerank_factor)
+        self.quantization: str = self.meta.get('quantization', 'none')
+
+        with open(self.path / "ids.json", encoding="utf-8") as f:
+            self.ids: List[str] = json.load(f)
+        self._rows = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        with open(self.path / "metadata.json", encoding="utf-8") as f:
+            self._metadata_columns: Dict[str, List[Any]] = json.load(f)
+
+        self.vectors = np.load(self.path / "vectors.npy", mmap_mode='r')
+        self._text_offsets = np.load(self.path / "text_offsets.npy", mmap_mode='r')
+        self._texts = None
+        if self._text_offsets[-1] > 0:
+            with open(self.path / "texts.bin", "rb") as f:
+                self._texts = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.codes = None
+        self.scales = None
+        if self.quantization == "int8":
+            self.codes = np.load(self.path / "codes.npy", mmap_mode='r')
+            self.scales = np.load(self.path / "scales.npy", mmap_mode='r')
+
+        self.centroids = None
+        self._list_offsets = None
+        if self.meta.get('n_lists'):
+            self.centroids = np.load(self.path / "centroids.npy", mmap_mode='r')
+            self._list_offsets = np.load(self.path / "list_offsets.npy", mmap_mode='r')
+
+    def text(self, row: int) -> str:
+        start, end = int(self._text_offsets[row]), int(self._text_offsets[row + 1])
+        return self._texts[start:end].decode('utf-8') if end > start else ''
+
+    def metadata(self, row: int) -> Dict[str, Any]:
+        return {
+            key: column[row]
+            for key, column in self._metadata_columns.items()
+            if column[row] is not None
+        }
+
+    def _candidate_rows(self, query_vector: np.ndarray) -> Optional[np.ndarray]:
+        """Rows of the n_probe closest IVF lists (None: scan everything)"""
+        if self.centroids is None:
+            return None
+        lists = _top_k(self.centroids @ query_vector, self.n_probe)
+        return np.concatenate([
+            np.arange(self._list_offsets[j], self._list_offsets[j + 1]) for j in lists
+        ])
+
+    def _approximate_scores(self, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """(rows x queries) similarities from the int8 codes, dequantized block by block"""
+        if rows is not None:
+            return (self.codes[rows].astype(np.float32) @ queries.T) * self.scales[rows][:, None]
+
+        scores = np.empty((self.count, len(queries)), dtype=np.float32)
+        for start in range(0, self.count, SCAN_BLOCK_ROWS):
+            end = min(start + SCAN_BLOCK_ROWS, self.count)
+            scores[start:end] = (self.codes[start:end].astype(np.float32) @ queries.T) * self.scales[start:end, None]
+        return scores
+
+    def _select(self, rows: np.ndarray, scores: np.ndarray, query_vector: np.ndarray, k: int) -> List[tuple]:
+        """Top k of rows by score; quantized scores are re-ranked with the float32 rows"""
+        if self.codes is None:
+            top = _top_k(scores, min(k, len(rows)))
+            return [(int(rows[i]), float(scores[i])) for i in top]
+
+        candidates = np.sort(rows[_top_k(scores, min(k * self.rerank_factor, len(rows)))])
+        exact = np.asarray(self.vectors[candidates] @ query_vector)
+        top = _top_k(exact, min(k, len(candidates)))
+        return [(int(candidates[i]), float(exact[i])) for i in top]
+
+    def search(self, query_embeddings: Sequence[Sequence[float]], k: int) -> List[List[tuple]]:
+        """
+        Nearest rows per query
+
+        Returns:
+            Per query, [(row, cosine similarity)] best first
+        """
+        queries = _normalize_rows(np.asarray(query_embeddings, dtype=np.float32))
+        k = min(k, self.count)
+        if k <= 0:
+            return [[] for _ in range(len(queries))]
+
+        if self.centroids is None:
+            # Exact scan: one (n x dim) @ (dim x q) product for the whole batch
+            if self.codes is None:
+                scores = np.asarray(self.vectors @ queries.T)
+            else:
+                scores = self._approximate_scores(queries)
+            rows = np.arange(self.count)
+            return [self._select(rows, scores[:, i], queries[i], k) for i in range(len(queries))]
+
+        results = []
+        for query_vector in queries:
+            rows = self._candidate_rows(query_vector)
+            if self.codes is None:
+                scores = np.asarray(self.vectors[rows] @ query_vector)
+            else:
+                scores = self._approximate_scores(query_vector[None, :], rows)[:, 0]
+            results.append(self._select(rows, scores, query_vector, k))
+        return results
+
+    def memory_stats(self) -> Dict[str, Any]:
+        """
+        Bytes per chunk scanned per query, and the on-disk vector footprint
+
+        int8 shrinks what a query scans, not the disk: the float32 rows are
+        kept next to the codes for exact re-scoring of the top candidates,
+        so the vector files take dim * 4 + dim + 4 bytes per chunk
+        (~1.25x the float32-only index).
+        """
+        dim = int(self.meta.get('dim', 0))
+        scanned = dim + 4 if self.codes is not None else dim * 4
+        stored = dim * 4 + (dim + 4 if self.codes is not None else 0)
+        disk_bytes = sum(
+            os.path.getsize(self.path / name)
+            for name in ("vectors.npy", "codes.npy", "scales.npy")
+            if (self.path / name).exists()
+        )
+        return {
+            'quantization': self.quantization,
+            'vectors': self.count,
+            'dim': dim,
+            'scan_bytes_per_vector': scanned,
+            'float32_bytes_per_vector': dim * 4,
+            'compression': round(dim * 4 / scanned, 2) if scanned else 0.0,
+            'disk_bytes_per_vector': stored,
+            'disk_bytes': disk_bytes,
+            'disk_overhead': round(stored / (dim * 4), 2) if dim else 0.0
+        }
+
+    def query(self, query_embeddings: Sequence[Sequence[float]], n_results: int) -> Dict[str, List[List]]:
+        """collection.query()-shaped results (cosine distance = 1 - similarity)"""
+        results = {'ids': [], 'documents': [], 'metadatas': [], 'distances': []}
+        for hits in self.search(query_embeddings, n_results):
+            results['ids'].append([self.ids[row] for row, _ in hits])
+            results['documents'].append([self.text(row) for row, _ in hits])
+            results['metadatas'].append([self.metadata(row) for row, _ in hits])
+            results['distances'].append([1.0 - score for _, score in hits])
+        return results
+
+    def get_documents(self, ids: List[str]) -> Dict[str, Document]:
+        """Chunks by ID"""
+        documents = {}
+        for doc_id in ids:
+            row = self._rows.get(doc_id)
+            if row is not None:
+                documents[doc_id] = Document(page_content=self.text(row), metadata=self.metadata(row))
+        return documents
+
+    def close(self):
+        if self._texts is not None:
+            self._texts.close()
+            self._texts = None
+
+
+def build_index(
+    collection,
+    path: Path,
+    version_key: str,
+    ann_threshold: int = 50000,
+    quantization: str = "none",
+    fetch_batch_size: int = 1000
+):
+    """
+    Export a Chroma collection to an index directory atomically (temp dir + rename)
+
+    Args:
+        collection: Chroma collection to export
+        path: Index directory
+        version_key: Collection version the export corresponds to
+        ann_threshold: Row count from which the index is IVF-partitioned
+        quantization: "none" or "int8" (codes scanned, float32 kept for re-ranking)
+        fetch_batch_size: Rows per collection.get call
+    """
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization '{quantization}' (expected one of {QUANTIZATIONS})")
+
+    start_time = time.time()
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    if tmp_path.exists():
+        shutil.rmtree(tmp_path)
+    tmp_path.mkdir(parents=True)
+
+    ids: List[str] = []
+    vectors: List[np.ndarray] = []
+    texts: List[bytes] = []
+    metadatas: List[Dict[str, Any]] = []
+
+    total = collection.count()
+    for offset in range(0, total, fetch_batch_size):
+        batch = collection.get(
+            include=['embeddings', 'documents', 'metadatas'],
+            limit=fetch_batch_size,
+            offset=offset
+        )
+        ids.extend(batch['ids'])
+        vectors.append(np.asarray(batch['embeddings'], dtype=np.float32))
+        texts.extend((text or '').encode('utf-8') for text in batch['documents'])
+        metadatas.extend(metadata or {} for metadata in batch['metadatas'])
+
+    dim = vectors[0].shape[1] if vectors else 0
+    matrix = _normalize_rows(np.concatenate(vectors)) if vectors else np.zeros((0, dim), dtype=np.float32)
+
+    # IVF: order rows by list so each list is one contiguous slice
+    n_lists = 0
+    if len(ids) >= ann_threshold:
+        n_lists = max(1, int(np.sqrt(len(ids))))
+        centroids = _kmeans(matrix, n_lists)
+        assignment = np.concatenate([
+            np.argmax(matrix[offset:offset + 10000] @ centroids.T, axis=1)
+            for offset in range(0, len(matrix), 10000)
+        ])
+        order = np.argsort(assignment, kind='stable')
+        list_offsets = np.searchsorted(assignment[order], np.arange(n_lists + 1)).astype(np.int64)
+        matrix = matrix[order]
+        ids = [ids[i] for i in order]
+        texts = [texts[i] for i in order]
+        metadatas = [metadatas[i] for i in order]
+        np.save(tmp_path / "centroids.npy", centroids.astype(np.float32))
+        np.save(tmp_path / "list_offsets.npy", list_offsets)
+
+    np.save(tmp_path / "vectors.npy", np.ascontiguousarray(matrix, dtype=np.float32))
+    if quantization == "int8":
+        codes, scales = quantize_int8(matrix)
+        np.save(tmp_path / "codes.npy", codes)
+        np.save(tmp_path / "scales.npy", scales)
+
+    text_offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    np.cumsum([len(text) for text in texts], out=text_offsets[1:])
+    np.save(tmp_path / "text_offsets.npy", text_offsets)
+    with open(tmp_path / "texts.bin", "wb") as f:
+        f.write(b"".join(texts))
+
+    keys = sorted({key for metadata in metadatas for key in metadata})
+    with open(tmp_path / "metadata.json", "w", encoding="utf-8") as f:
+        json.dump({key: [metadata.get(key) for metadata in metadatas] for key in keys}, f)
+    with open(tmp_path / "ids.json", "w", encoding="utf-8") as f:
+        json.dump(ids, f)
+    with open(tmp_path / "meta.json", "w", encoding="utf-8") as f:
+        json.dump({
+            'format': INDEX_FORMAT,
+            'collection_version': version_key,
+            'n_docs': len(ids),
+            'dim': int(dim),
+            'n_lists': n_lists,
+            'quantization': quantization
+        }, f)
+
+    # Processes still mapping the old files keep reading them until they reopen
+    if path.exists():
+        shutil.rmtree(path)
+    os.replace(tmp_path, path)
+
+    logger.info(
+        f"Dense index built: {len(ids)} vectors, dim {dim}, "
+        f"{'IVF ' + str(n_lists) + ' lists' if n_lists else 'exact'}, quantization {quantization} "
+        f"in {time.time() - start_time:.2f}s"
+    )
+
+
+def load_index(
+    path: Path,
+    version_key: str,
+    n_probe: int = 16,
+    quantization: str = "none",
+    rerank_factor: int = 4
+) -> Optional[MmapVectorIndex]:
+    """
+    Open the index if it matches the collection version and quantization
+
+    Returns:
+        Index, or None if missing, stale or unreadable
+    """
+    path = Path(path)
+    meta_file = path / "meta.json"
+    if not meta_file.exists():
+        return None
+
+    try:
+        with open(meta_file, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get('format') != INDEX_FORMAT or meta.get('collection_version') != version_key:
+            return None
+        if meta.get('quantization', 'none') != quantization:
+            return None
+        return MmapVectorIndex(path, n_probe=n_probe, rerank_factor=rerank_factor)
+    except Exception as e:
+        logger.warning(f"Failed to open dense index: {str(e)}")
+        return None
+
+
+def open_or_build_index(
+    collection,
+    path: Path,
+    version_key: str,
+    ann_threshold: int = 50000,
+    n_probe: int = 16,
+    quantization: str = "none",
+    rerank_factor: int = 4
+) -> MmapVectorIndex:
+    """
+    Open the index for version_key, exporting it from Chroma first if needed
+
+    One process builds while others on the host wait for it (file lock).
+    """
+    index = load_index(path, version_key, n_probe, quantization, rerank_factor)
+    if index is not None:
+        return index
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(path.name + ".lock"), "w") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        index = load_index(path, version_key, n_probe, quantization, rerank_factor)
+        if index is None:
+            build_index(collection, path, version_key, ann_threshold=ann_threshold, quantization=quantization)
+            index = MmapVectorIndex(path, n_probe=n_probe, rerank_factor=rerank_factor)
+    return index
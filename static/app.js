@@ -105,7 +105,7 @@ async function handleSubmit(e) {
     queryInput.disabled = true;
     
     try {
-        const response = await fetch(`${API_BASE}/api/query`, {
+        const response = await fetch(`${API_BASE}/api/query/stream`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -118,13 +118,37 @@ async function handleSubmit(e) {
             throw new Error(error.detail || 'Query failed');
         }
         
-        const data = await response.json();
+        // Render tokens as they arrive, then replace with the final message
+        let streamDiv = null;
+        let streamedText = '';
+        let data = null;
+        
+        await readEventStream(response, (event, payload) => {
+            if (event === 'token') {
+                if (!streamDiv) {
+                    removeLoadingMessage(loadingId);
+                    streamDiv = addStreamingMessage();
+                }
+                streamedText += payload.text;
+                streamDiv.querySelector('.message-content').innerHTML = formatContent(streamedText);
+                messagesArea.scrollTop = messagesArea.scrollHeight;
+            } else if (event === 'done') {
+                data = payload;
+            }
+        });
         
         // Debug: log response data
         console.log('Query response:', data);
         
-        // Remove loading indicator
+        // Remove loading indicator / streaming placeholder
         removeLoadingMessage(loadingId);
+        if (streamDiv) {
+            streamDiv.remove();
+        }
+        
+        if (!data) {
+            throw new Error('Stream ended without a result');
+        }
         
         // Add assistant response
         if (data.status === 'success') {
@@ -148,6 +172,58 @@ async function handleSubmit(e) {
     }
 }
 
+async function readEventStream(response, onEvent) {
+    // Minimal Server-Sent Events parser for a fetch() response body
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        
+        buffer += decoder.decode(value, { stream: true });
+        
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            
+            let event = 'message';
+            let dataLines = [];
+            for (const line of rawEvent.split('\n')) {
+                if (line.startsWith('event:')) {
+                    event = line.slice(6).trim();
+                } else if (line.startsWith('data:')) {
+                    dataLines.push(line.slice(5).trim());
+                }
+            }
+            
+            if (dataLines.length > 0) {
+                onEvent(event, JSON.parse(dataLines.join('\n')));
+            }
+        }
+    }
+}
+
+function addStreamingMessage() {
+    const messageDiv = document.createElement('div');
+    messageDiv.className = 'message message-assistant';
+    
+    const contentDiv = document.createElement('div');
+    contentDiv.className = 'message-content';
+    messageDiv.appendChild(contentDiv);
+    
+    const welcomeMsg = messagesArea.querySelector('.welcome-message');
+    if (welcomeMsg) {
+        welcomeMsg.remove();
+    }
+    
+    messagesArea.appendChild(messageDiv);
+    messagesArea.scrollTop = messagesArea.scrollHeight;
+    return messageDiv;
+}
+
 function addMessage(type, content, sources = [], time = '', confidence = null, cacheHit = false) {
     const messageDiv = document.createElement('div');
     messageDiv.className = `message message-${type}`;
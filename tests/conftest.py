@@ -0,0 +1,170 @@
+"""
+Test configuration: make the project root importable (src, config)
+"""
+import hashlib
+import json
+import re
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import config  # noqa: E402
+
+
+class FakeOllama:
+    """
+    Local stand-in for the Ollama HTTP API
+
+    - GET /api/tags lists config.OLLAMA_MODEL
+    - POST /api/generate answers `reply` (stream=false) or writes
+      `stream_lines` as NDJSON (stream=true); a None entry closes the
+      connection at that point, like a crashed server
+    """
+
+    def __init__(self):
+        self.reply = "Blocking answer"
+        self.stream_lines = [
+            {'response': " Hello", 'done': False},
+            {'response': " world", 'done': False},
+            {'response': "", 'done': True, 'prompt_eval_count': 12, 'eval_count': 2},
+        ]
+        self.requests = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, data):
+                body = json.dumps(data).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                self._send_json({'models': [{'name': f"{config.OLLAMA_MODEL}:latest"}]})
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                fake.requests.append(payload)
+                if not payload.get('stream'):
+                    self._send_json({'response': fake.reply, 'done': True, 'eval_count': 3})
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                for line in fake.stream_lines:
+                    if line is None:
+                        break
+                    self.wfile.write((json.dumps(line) + "\n").encode())
+                    self.wfile.flush()
+                self.close_connection = True
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def fake_ollama(monkeypatch):
+    """Fake Ollama server; config.OLLAMA_BASE_URL points at it for the test"""
+    server = FakeOllama()
+    monkeypatch.setattr(config, "OLLAMA_BASE_URL", server.url)
+    yield server
+    server.close()
+
+
+def parse_sse(body: str):
+    """Split a Server-Sent Events body into (event, data) pairs"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def write_pdf(path, pages) -> str:
+    """Write a minimal PDF with one line of Helvetica text per page"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        escaped = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        stream = f"BT /F1 12 Tf 72 720 Td ({escaped}) Tj ET".encode()
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (len(objects))
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    Path(path).write_bytes(bytes(out))
+    return str(path)
+
+
+@pytest.fixture
+def make_pdf(tmp_path):
+    """Factory writing a small text PDF (one string per page) under tmp_path"""
+    def factory(pages, name="doc.pdf"):
+        return write_pdf(tmp_path / name, pages)
+    return factory
+
+
+class FakeEmbeddings:
+    """Deterministic bag-of-words vectors in place of the HuggingFace model"""
+
+    dim = 32
+
+    def __init__(self, **kwargs):
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+    def _embed(self, text):
+        vector = [0.0] * self.dim
+        for word in re.findall(r"[a-z0-9]+", text.lower()):
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dim] += 1.0
+        norm = sum(value * value for value in vector) ** 0.5 or 1.0
+        return [value / norm for value in vector]
+
+
+@pytest.fixture
+def vector_store(tmp_path, monkeypatch):
+    """EnhancedChromaDB persisted under tmp_path, with FakeEmbeddings"""
+    from src.vector_store import chromadb_manager
+
+    monkeypatch.setattr(chromadb_manager, "HuggingFaceEmbeddings", FakeEmbeddings)
+    monkeypatch.setattr(config, "VECTOR_DB_DIR", tmp_path / "vector_db")
+    monkeypatch.setattr(config, "DENSE_INDEX_DIR", tmp_path / "dense_index")
+    monkeypatch.setattr(config, "ENABLE_EMBEDDING_BATCHER", False)
+    monkeypatch.setattr(config, "ENABLE_EMBEDDING_CACHE", False)
+    monkeypatch.setattr(config, "VECTOR_BACKEND", "chroma")
+    return chromadb_manager.EnhancedChromaDB()
@@ -0,0 +1,165 @@
+"""
+Batch answering: shared retrieval, duplicate questions, the /api/query/batch
+SSE endpoint and load shedding (against conftest.fake_ollama)
+"""
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+from langchain_core.documents import Document
+
+from config.settings import config
+from conftest import parse_sse
+from src.generation.llm_handler_phi import Phi2Handler
+from src.interfaces.query_executor import QueueFullError
+from src.interfaces.single_flight import SingleFlight
+from src.retrieval.query_cache import QueryCache
+
+
+POWER = "What is the output power of the amplifier?"
+CABLE = "Which speaker cable should I use?"
+PIZZA = "Best pizza recipe?"
+
+
+@pytest.fixture
+def rag(fake_ollama, monkeypatch):
+    """RAG system with the real batch pipeline, LLM handler and answer cache; retrieval is stubbed"""
+    rag_phi = pytest.importorskip("src.interfaces.rag_phi")
+    monkeypatch.setattr(config, "ENABLE_QUERY_CACHE", True)
+    monkeypatch.setattr(config, "ENABLE_CONFIDENCE_SCORING", False)
+    monkeypatch.setattr(config, "ENABLE_REQUEST_COALESCING", True)
+
+    rag = rag_phi.BoseRAGPhi.__new__(rag_phi.BoseRAGPhi)
+    rag.llm = Phi2Handler()
+    rag.cache = QueryCache(max_size=10, ttl_seconds=3600, enable_cache=True)
+    rag.single_flight = SingleFlight()
+    rag.metrics = MagicMock()
+    rag.vector_store = MagicMock()
+    rag.vector_store.version.version = 1
+    rag.vector_store.version.epoch = "epoch"
+    rag.vector_store.version.key = "epoch:1"
+    rag.vector_store.version.peek.return_value = {'epoch': "epoch", 'version': 1}
+    rag.vector_store.version.state_key.return_value = "epoch:1"
+    rag.vector_store.embed_queries.side_effect = lambda queries: [[1.0, 0.0] for _ in queries]
+    rag.generation_slots = threading.BoundedSemaphore(2)
+    rag.prompt_builder = MagicMock()
+    rag.prompt_builder.template_name.return_value = "specification"
+    rag.retriever = MagicMock()
+    rag.spec_store = None
+
+    doc = Document(page_content="Output power 120 W", metadata={'source': "amp.pdf", 'page': 2})
+    rag.retrieved = []
+
+    def retrieve_batch(queries, k=5, query_embeddings=None):
+        rag.retrieved.append(list(queries))
+        return [[doc] for _ in queries]
+
+    rag.retrieve_batch = retrieve_batch
+    rag._build_context = lambda query, docs, query_embedding, start_time, component_times, verbose: (
+        None, (docs, f"prompt: {query}", [0.9], query_embedding)
+    )
+    return rag
+
+
+def generations(fake_ollama):
+    return [request for request in fake_ollama.requests if not request.get('stream')]
+
+
+def test_batch_shares_retrieval_and_answers_duplicates_once(rag, fake_ollama):
+    results = {item['index']: item['result'] for item in rag.answer_queries([POWER, CABLE, POWER, PIZZA])}
+
+    assert sorted(results) == [0, 1, 2, 3]
+    # One retrieval for the distinct on-topic questions; the off-topic one never retrieves
+    assert rag.retrieved == [[POWER, CABLE]]
+    assert len(generations(fake_ollama)) == 2
+    assert results[0]['answer'] == results[2]['answer'] == "Blocking answer"
+    assert results[2]['query'] == POWER
+    assert results[1]['sources'][0]['source'] == "amp.pdf"
+    assert results[3]['sources'] == []
+    # Nothing is left in flight once the batch is done
+    assert rag.single_flight.begin(rag.cache.cache_key(POWER, rag.cache_context()))[1] is True
+
+
+def test_repeated_batch_is_served_from_the_answer_cache(rag, fake_ollama):
+    list(rag.answer_queries([POWER, CABLE]))
+    fake_ollama.requests.clear()
+
+    results = [item['result'] for item in rag.answer_queries([CABLE, POWER])]
+
+    assert all(result['cache_hit'] for result in results)
+    assert generations(fake_ollama) == []
+    assert rag.retrieved == [[POWER, CABLE]]
+
+
+def test_generation_failure_is_reported_per_question(rag, fake_ollama, monkeypatch):
+    generate = rag.llm.generate
+
+    def flaky(prompt, template=None):
+        if CABLE in prompt:
+            raise RuntimeError("model crashed")
+        return generate(prompt, template=template)
+
+    monkeypatch.setattr(rag.llm, "generate", flaky)
+
+    results = {item['index']: item['result'] for item in rag.answer_queries([POWER, CABLE])}
+
+    assert results[0]['status'] == 'success'
+    assert results[1]['status'] == 'error'
+
+
+@pytest.fixture
+def app_module(rag, monkeypatch):
+    pytest.importorskip("fastapi")
+    import app as app_module
+
+    monkeypatch.setattr(app_module, "rag", rag)
+    return app_module
+
+
+@pytest.fixture
+def client(app_module):
+    from fastapi.testclient import TestClient
+
+    return TestClient(app_module.app)
+
+
+def test_batch_endpoint_streams_results_then_done(client):
+    response = client.post("/api/query/batch", json={'questions': [POWER, CABLE, POWER]})
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    assert [name for name, _ in events] == ['result', 'result', 'result', 'done']
+    assert sorted(data['index'] for name, data in events if name == 'result') == [0, 1, 2]
+    assert all(data['result']['status'] == 'success' for name, data in events if name == 'result')
+    assert events[-1][1]['status'] == 'success'
+    assert events[-1][1]['count'] == 3
+
+
+def test_batch_endpoint_validates_the_question_count(client, monkeypatch):
+    monkeypatch.setattr(config, "BATCH_MAX_QUESTIONS", 2)
+
+    assert client.post("/api/query/batch", json={'questions': []}).status_code == 400
+    assert client.post("/api/query/batch", json={'questions': [POWER, CABLE, PIZZA]}).status_code == 400
+
+
+class BusyExecutor:
+    """Executor with no free worker and a full queue"""
+
+    async def run(self, fn, *args, **kwargs):
+        raise QueueFullError("Server busy")
+
+    async def stream(self, iterator_fn, *args, **kwargs):
+        raise QueueFullError("Server busy")
+        yield
+
+
+def test_busy_executor_sheds_load(app_module, client, monkeypatch):
+    monkeypatch.setattr(app_module, "executor", BusyExecutor())
+
+    response = client.post("/api/query", json={'question': POWER})
+    assert response.status_code == 503
+    assert response.headers['retry-after'] == "1"
+
+    events = parse_sse(client.post("/api/query/batch", json={'questions': [POWER]}).text)
+    assert events == [('done', {'status': 'error', 'count': 0, 'error': "Server busy"})]
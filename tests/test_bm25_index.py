@@ -0,0 +1,73 @@
+"""
+IncrementalBM25 under concurrent queries and updates
+"""
+import random
+import threading
+
+from langchain_core.documents import Document
+
+from src.retrieval.bm25_index import IncrementalBM25
+
+
+VOCABULARY = "speaker impedance ohm frequency response watt input output dsp channel mount ceiling".split()
+
+
+def make_document(rng: random.Random) -> Document:
+    return Document(page_content=" ".join(rng.choices(VOCABULARY, k=30)), metadata={})
+
+
+def test_queries_during_add_remove_and_compact():
+    rng = random.Random(0)
+    index = IncrementalBM25(merge_ratio=0.05)
+    index.add_documents([f"base-{i}" for i in range(500)], [make_document(rng) for _ in range(500)])
+
+    stop = threading.Event()
+    errors = []
+    queries = 0
+
+    def reader():
+        nonlocal queries
+        reader_rng = random.Random(threading.get_ident())
+        while not stop.is_set():
+            try:
+                query = " ".join(reader_rng.choices(VOCABULARY, k=3))
+                results = index.top_k(query, 10)
+                assert results and all(score > 0 for _, score in results)
+                index.top_k_batch([query, "impedance ohm"], 5)
+                queries += 1
+            except Exception as e:
+                errors.append(e)
+
+    readers = [threading.Thread(target=reader) for _ in range(3)]
+    for thread in readers:
+        thread.start()
+
+    try:
+        for round_number in range(200):
+            new_ids = [f"delta-{round_number}-{i}" for i in range(20)]
+            index.add_documents(new_ids, [make_document(rng) for _ in new_ids])
+            index.remove_documents(rng.sample(sorted(index.documents), 10))
+            if round_number % 20 == 0:
+                index.compact()
+    finally:
+        stop.set()
+        for thread in readers:
+            thread.join()
+
+    assert not errors, f"{len(errors)} query errors, first: {errors[0]!r}"
+    assert queries > 0
+    assert index.compactions > 0
+
+
+def test_segment_matches_live_documents():
+    rng = random.Random(1)
+    index = IncrementalBM25()
+    index.add_documents([f"doc-{i}" for i in range(50)], [make_document(rng) for _ in range(50)])
+    index.remove_documents([f"doc-{i}" for i in range(0, 50, 5)])
+    index.add("extra", make_document(rng))
+
+    segment = index.segment()
+
+    assert set(segment['doc_ids']) == set(index.documents)
+    assert [index.documents[doc_id] for doc_id in segment['doc_ids']] == segment['documents']
+    assert index.delta_size == 0
@@ -0,0 +1,105 @@
+"""
+BM25 snapshot versions and atomic switching
+"""
+import random
+import threading
+
+import pytest
+
+from langchain_core.documents import Document
+
+from src.retrieval.bm25_index import IncrementalBM25
+from src.retrieval.bm25_snapshot import (
+    POINTER_FILE, collection_fingerprint, documents_fingerprint, load_snapshot, save_snapshot
+)
+from src.vector_store.chromadb_manager import content_digest
+
+
+VOCABULARY = "speaker impedance ohm frequency response watt input output dsp channel".split()
+
+
+def make_index(n_docs: int, seed: int) -> IncrementalBM25:
+    rng = random.Random(seed)
+    index = IncrementalBM25()
+    index.add_documents(
+        [f"doc-{seed}-{i}" for i in range(n_docs)],
+        [Document(page_content=" ".join(rng.choices(VOCABULARY, k=20)), metadata={'i': i}) for i in range(n_docs)]
+    )
+    return index
+
+
+def fingerprint(index: IncrementalBM25) -> str:
+    return documents_fingerprint(index.documents.keys(), index.documents.values())
+
+
+def test_save_switches_current_and_drops_previous_version(tmp_path):
+    first = make_index(30, seed=0)
+    save_snapshot(first, tmp_path)
+    first_version = (tmp_path / POINTER_FILE).read_text()
+
+    second = make_index(40, seed=1)
+    save_snapshot(second, tmp_path)
+    second_version = (tmp_path / POINTER_FILE).read_text()
+
+    assert first_version != second_version
+    assert not (tmp_path / first_version).exists()
+    assert load_snapshot(tmp_path, fingerprint(first)) is None
+
+    loaded = load_snapshot(tmp_path, fingerprint(second))
+    assert loaded is not None
+    assert set(loaded.documents) == set(second.documents)
+    assert loaded.top_k("impedance ohm", 5) == second.top_k("impedance ohm", 5)
+
+
+def test_concurrent_saves_leave_one_complete_snapshot(tmp_path):
+    indexes = [make_index(20 + i, seed=i) for i in range(4)]
+    errors = []
+
+    def saver(index):
+        try:
+            for _ in range(5):
+                save_snapshot(index, tmp_path)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=saver, args=(index,)) for index in indexes]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    loaded = [load_snapshot(tmp_path, fingerprint(index)) for index in indexes]
+    assert sum(index is not None for index in loaded) == 1
+
+
+def test_snapshot_is_stale_when_content_changes_under_the_same_ids(tmp_path):
+    index = IncrementalBM25()
+    index.add_documents(["doc_0"], [Document(page_content="output power 120 W")])
+    save_snapshot(index, tmp_path)
+
+    changed = IncrementalBM25()
+    changed.add_documents(["doc_0"], [Document(page_content="output power 240 W")])
+
+    assert load_snapshot(tmp_path, fingerprint(changed)) is None
+    assert load_snapshot(tmp_path, fingerprint(index)) is not None
+
+
+def test_collection_fingerprint_matches_the_indexed_chunks():
+    chromadb = pytest.importorskip("chromadb")
+    collection = chromadb.Client().create_collection(f"fingerprint-{random.random()}")
+    texts = ["output power 120 W", "input impedance 10 kOhm"]
+    # One chunk carries content_hash metadata, the legacy one does not
+    collection.add(
+        ids=["chunk_a", "doc_1"],
+        documents=texts,
+        embeddings=[[1.0, 0.0], [0.0, 1.0]],
+        metadatas=[{'content_hash': content_digest(texts[0])}, {'page': 1}]
+    )
+    index = IncrementalBM25()
+    index.add_documents(["chunk_a", "doc_1"], [Document(page_content=text) for text in texts])
+
+    assert collection_fingerprint(collection) == fingerprint(index)
+
+    collection.update(ids=["doc_1"], documents=["input impedance 20 kOhm"], embeddings=[[0.0, 1.0]])
+    assert collection_fingerprint(collection) != fingerprint(index)
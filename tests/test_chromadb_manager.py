@@ -0,0 +1,74 @@
+"""
+Vector store ingestion: deterministic IDs, deduplication, re-ingest of changed files
+"""
+from unittest.mock import MagicMock
+
+from langchain_core.documents import Document
+
+from config.settings import config
+from src.interfaces.rag_phi import BoseRAGPhi
+from src.retrieval.hybrid_retriever import HybridRetriever
+from src.vector_store.chromadb_manager import chunk_id
+
+
+def chunks(source, texts):
+    return [
+        Document(page_content=text, metadata={'source': source, 'page': page, 'chunk_id': 0})
+        for page, text in enumerate(texts)
+    ]
+
+
+def test_reingesting_an_unchanged_file_adds_nothing(vector_store):
+    first = vector_store.add_documents(chunks("amp.pdf", ["output power 120 W", "weight 9 kg"]))
+    version = vector_store.version.key
+
+    second = vector_store.add_documents(chunks("amp.pdf", ["output power 120 W", "weight 9 kg"]))
+
+    assert first['chunks_added'] == 2
+    assert second['chunks_added'] == 0
+    assert second['chunks_skipped'] == 2
+    assert vector_store.version.key == version
+
+
+def test_outdated_chunks_of_a_changed_file_are_removed(vector_store):
+    vector_store.add_documents(chunks("amp.pdf", ["output power 120 W", "weight 9 kg", "ships in a carton"]))
+    vector_store.add_documents(chunks("other.pdf", ["input level +24 dBu"]))
+    version = vector_store.version.key
+
+    updated = chunks("amp.pdf", ["output power 240 W", "weight 9 kg"])
+    vector_store.add_documents(updated)
+    removed = vector_store.remove_stale_chunks({"amp.pdf": [chunk_id(doc) for doc in updated]})
+
+    stored = vector_store.collection.get(include=['documents'])
+    assert sorted(stored['documents']) == ["input level +24 dBu", "output power 240 W", "weight 9 kg"]
+    assert len(removed) == 2
+    assert vector_store.version.key != version
+    assert vector_store.version.source_version("amp.pdf") > vector_store.version.source_version("other.pdf")
+
+
+def test_nothing_is_removed_when_the_file_is_unchanged(vector_store):
+    current = chunks("amp.pdf", ["output power 120 W"])
+    vector_store.add_documents(current)
+    version = vector_store.version.key
+
+    assert vector_store.remove_stale_chunks({"amp.pdf": [chunk_id(doc) for doc in current]}) == []
+    assert vector_store.version.key == version
+
+
+def test_reingest_drops_outdated_chunks_from_the_keyword_index(vector_store, monkeypatch):
+    monkeypatch.setattr(config, "ENABLE_HYBRID_SEARCH", True)
+    monkeypatch.setattr(config, "ENABLE_PARALLEL_INGESTION", False)
+    rag = BoseRAGPhi.__new__(BoseRAGPhi)
+    rag.vector_store = vector_store
+    rag.spec_store = None
+    rag.reranker = None
+    rag.router = MagicMock()
+    vector_store.add_documents(chunks("amp.pdf", ["output power 120 W", "ships in a carton"]))
+    rag.retriever = HybridRetriever(vector_store, enable_snapshot=False)
+
+    rag.router.process_pdf.return_value = chunks("amp.pdf", ["output power 240 W"])
+    assert rag.process_documents(["amp.pdf"])['status'] == 'success'
+
+    indexed = [doc.page_content for doc in rag.retriever.indexed_docs.values()]
+    assert indexed == ["output power 240 W"]
+    assert vector_store.collection.count() == 1
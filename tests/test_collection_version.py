@@ -0,0 +1,47 @@
+"""
+Collection version: cache-key identity shared across processes
+"""
+from src.vector_store.collection_version import CollectionVersion
+
+
+def test_bump_changes_the_key_and_records_sources(tmp_path):
+    version = CollectionVersion(tmp_path / "version.json")
+    key = version.key
+
+    assert version.bump(["data/amp.pdf"]) == 1
+    assert version.key != key
+    assert version.source_version("data/amp.pdf") == 1
+    assert version.source_version("data/other.pdf") == 0
+
+
+def test_instances_sharing_the_file_see_each_others_bumps(tmp_path):
+    first = CollectionVersion(tmp_path / "version.json")
+    second = CollectionVersion(tmp_path / "version.json")
+
+    first.bump(["amp.pdf"])
+    first.bump(["other.pdf"])
+
+    assert second.version == 2
+    assert second.key == first.key
+    assert second.epoch == first.epoch
+
+
+def test_a_new_file_starts_a_new_epoch(tmp_path):
+    first = CollectionVersion(tmp_path / "one.json")
+    second = CollectionVersion(tmp_path / "two.json")
+
+    # Same version number, different collections: keys must differ
+    assert first.version == second.version == 0
+    assert first.key != second.key
+
+
+def test_staleness_is_per_source(tmp_path):
+    version = CollectionVersion(tmp_path / "version.json")
+    version.bump(["amp.pdf"])
+    answered_at = version.version
+    version.bump(["other.pdf"])
+
+    assert not version.is_stale(answered_at, ["amp.pdf"])
+    assert version.is_stale(answered_at, ["amp.pdf", "other.pdf"])
+    assert version.is_stale(answered_at, ["other.pdf"], state=version.peek())
+    assert not version.is_stale(answered_at, [""])
@@ -0,0 +1,58 @@
+"""
+Confidence scoring: single and batch paths agree; batches tokenize each chunk once
+"""
+import re
+
+from langchain_core.documents import Document
+
+from src.generation import confidence_scorer
+from src.generation.confidence_scorer import ConfidenceScorer
+
+
+POWER = Document(page_content="The EX-1280 delivers 1200 watts into 4 ohm loads.", metadata={'doc_id': "a"})
+INPUT = Document(page_content="Maximum input level is +24 dBu, balanced.", metadata={'doc_id': "b"})
+NO_ID = Document(page_content="Weight: 9 kg. Rack mountable (2U).", metadata={})
+
+ITEMS = [
+    ("output power?", "The EX-1280 delivers 1200 watts into 4 ohm loads.", [POWER, INPUT], [0.82, 0.4]),
+    ("input level?", "It might be +24 dBu, possibly lower.", [INPUT, POWER], None),
+    ("weight?", "The amplifier weighs 9 kg and is rack mountable.", [NO_ID], [0.2]),
+    ("warranty?", "I don't know.", [POWER, INPUT, NO_ID], [0.1, 0.1, 0.1]),
+    ("anything?", "No sources were found for this question at all.", [], None),
+]
+
+
+def test_batch_scores_match_single_scores():
+    single = [ConfidenceScorer().calculate_confidence(*item) for item in ITEMS]
+
+    assert ConfidenceScorer().calculate_confidence_batch(ITEMS) == single
+    assert len({result['label'] for result in single}) > 1
+
+
+class CountingPattern:
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.texts = []
+
+    def findall(self, text):
+        self.texts.append(text)
+        return self.pattern.findall(text)
+
+
+def test_batch_tokenizes_each_distinct_chunk_once(monkeypatch):
+    pattern = CountingPattern(re.compile(r'\w+'))
+    monkeypatch.setattr(confidence_scorer, "_CHUNK_TERM_PATTERN", pattern)
+    # Cache smaller than the batch's chunks: the batch still reuses its own term sets
+    scorer = ConfidenceScorer(chunk_cache_size=1)
+
+    scorer.calculate_confidence_batch(ITEMS)
+
+    assert len(pattern.texts) == 3
+    assert len(set(pattern.texts)) == 3
+
+
+def test_disabled_scorer_is_neutral_in_both_paths():
+    scorer = ConfidenceScorer(enable_scoring=False)
+
+    assert scorer.calculate_confidence_batch(ITEMS[:2]) == [scorer.calculate_confidence(*ITEMS[0])] * 2
+    assert scorer.calculate_confidence(*ITEMS[0]) == {'overall': 0.75, 'label': 'medium', 'enabled': False}
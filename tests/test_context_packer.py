@@ -0,0 +1,76 @@
+"""
+Token-budgeted context packing
+"""
+from langchain_core.documents import Document
+
+from src.generation.context_packer import ContextPacker, approximate_tokens
+
+
+def doc(text, source="manual.pdf", page=1, content_type="TEXT"):
+    return Document(page_content=text, metadata={'source': source, 'page': page, 'content_type': content_type})
+
+
+def test_no_documents_pack_to_nothing():
+    assert ContextPacker().pack("output power", [], 200) == ("", 0)
+
+
+def test_no_usable_units_pack_to_nothing():
+    # Top chunks are empty and the rest share no term with the query
+    docs = [doc(""), doc("   \n"), doc("Unrelated warranty text.")]
+
+    assert ContextPacker().pack("output power", docs, 200) == ("", 0)
+
+
+def test_relevant_units_are_kept_within_budget():
+    docs = [
+        doc("The chassis is black. Output power is 120 W RMS. Ships in a carton."),
+        doc("Maximum input level is +24 dBu.", source="other.pdf", page=3),
+    ]
+    budget = approximate_tokens("[Source 1] manual.pdf (Page 1)") + 2 + approximate_tokens("Output power is 120 W RMS.")
+
+    context, used = ContextPacker().pack("What is the output power?", docs, budget)
+
+    assert used <= budget
+    assert "Output power is 120 W RMS." in context
+    assert "Ships in a carton." not in context
+    assert context.startswith("[Source 1] manual.pdf (Page 1)")
+
+
+def test_selected_units_keep_source_order_and_headers():
+    docs = [
+        doc("Output power is 120 W. Frequency response is 40 Hz - 20 kHz."),
+        doc("Input impedance is 10 kOhm.", source="other.pdf", page=3),
+    ]
+
+    context, _ = ContextPacker().pack("output power frequency response input impedance", docs, 500)
+
+    assert context == (
+        "[Source 1] manual.pdf (Page 1)\nOutput power is 120 W.\nFrequency response is 40 Hz - 20 kHz.\n\n"
+        "[Source 2] other.pdf (Page 3)\nInput impedance is 10 kOhm."
+    )
+
+
+def test_overlapping_chunks_are_not_repeated():
+    docs = [doc("Output power is 120 W."), doc("Output power is 120 W.", page=2)]
+
+    context, _ = ContextPacker().pack("output power", docs, 500)
+
+    assert context.count("Output power is 120 W.") == 1
+
+
+def test_table_rows_are_separate_units():
+    table = doc("Model  Power  Weight\nEX-1280  1200 W  9 kg\nEX-640  640 W  7 kg", content_type="TABLE")
+
+    assert ContextPacker.split_units(table) == ["Model Power Weight", "EX-1280 1200 W 9 kg", "EX-640 640 W 7 kg"]
+
+
+def test_budget_below_every_unit_truncates_the_best_one():
+    docs = [doc("Output power is 120 W RMS into 4 ohms at 1 kHz with both channels driven.")]
+    packer = ContextPacker()
+    header_tokens = approximate_tokens("[Source 1] manual.pdf (Page 1)") + 2
+
+    context, used = packer.pack("output power", docs, header_tokens + 4)
+
+    assert context.startswith("[Source 1] manual.pdf (Page 1)\nOutput")
+    assert "driven" not in context
+    assert used == approximate_tokens(context)
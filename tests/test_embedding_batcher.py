@@ -0,0 +1,95 @@
+"""
+Query embedding micro-batcher
+"""
+import threading
+import time
+
+import pytest
+
+from src.vector_store.embedding_batcher import EmbeddingBatcher
+
+
+class RecordingEmbed:
+    def __init__(self, delay=0.0, fail=False):
+        self.batches = []
+        self.delay = delay
+        self.fail = fail
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("model crashed")
+        return [[float(len(text))] for text in texts]
+
+
+def embed_concurrently(batcher, texts):
+    results = {}
+    errors = {}
+
+    def call(text):
+        try:
+            results[text] = batcher.embed(text)
+        except Exception as e:
+            errors[text] = e
+
+    threads = [threading.Thread(target=call, args=(text,)) for text in texts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_concurrent_queries_share_forward_passes():
+    embed = RecordingEmbed()
+    batcher = EmbeddingBatcher(embed, max_batch=8, max_wait_ms=200)
+    texts = ["q" * n for n in range(1, 9)]
+
+    results, errors = embed_concurrently(batcher, texts)
+    batcher.close()
+
+    assert not errors
+    assert results == {text: [float(len(text))] for text in texts}
+    assert len(embed.batches) < len(texts)
+    assert all(len(batch) <= 8 for batch in embed.batches)
+    assert batcher.get_stats()['items'] == 8
+
+
+def test_batches_never_exceed_max_batch():
+    embed = RecordingEmbed()
+    batcher = EmbeddingBatcher(embed, max_batch=2, max_wait_ms=200)
+
+    results, _ = embed_concurrently(batcher, ["a", "bb", "ccc", "dddd", "eeeee"])
+    batcher.close()
+
+    assert len(results) == 5
+    assert max(len(batch) for batch in embed.batches) == 2
+
+
+def test_model_errors_reach_every_caller_in_the_batch():
+    batcher = EmbeddingBatcher(RecordingEmbed(fail=True), max_batch=4, max_wait_ms=50)
+
+    results, errors = embed_concurrently(batcher, ["a", "bb", "ccc"])
+    batcher.close()
+
+    assert not results
+    assert all(isinstance(error, RuntimeError) for error in errors.values())
+    assert len(errors) == 3
+
+
+def test_callers_time_out_instead_of_waiting_forever():
+    batcher = EmbeddingBatcher(RecordingEmbed(delay=0.5), max_batch=1, max_wait_ms=0, timeout=0.05)
+
+    with pytest.raises(TimeoutError):
+        batcher.embed("slow")
+    assert batcher.get_stats()['timeouts'] == 1
+    batcher.close()
+
+
+def test_closed_batcher_rejects_requests():
+    batcher = EmbeddingBatcher(RecordingEmbed())
+    batcher.close()
+
+    with pytest.raises(RuntimeError):
+        batcher.embed("late")
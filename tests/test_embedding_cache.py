@@ -0,0 +1,82 @@
+"""
+Embedding cache: batch misses, disk reuse and shared-directory appends
+"""
+import numpy as np
+
+from src.vector_store.embedding_cache import EmbeddingCache, text_digest
+
+
+def fake_embed(texts):
+    """Deterministic 4-dim vectors derived from the text length"""
+    return [[float(len(text)), 1.0, 2.0, 3.0] for text in texts]
+
+
+class CountingEmbed:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return fake_embed(texts)
+
+
+def test_only_unseen_texts_are_embedded_once(tmp_path):
+    cache = EmbeddingCache("model", tmp_path)
+    embed = CountingEmbed()
+
+    first = cache.embed_documents(["a", "bb", "a"], embed)
+    second = cache.embed_documents(["bb", "ccc"], embed)
+
+    assert first == fake_embed(["a", "bb", "a"])
+    assert second == fake_embed(["bb", "ccc"])
+    assert embed.calls == [["a", "bb"], ["ccc"]]
+
+
+def test_vectors_are_reused_across_instances(tmp_path):
+    EmbeddingCache("model", tmp_path).embed_documents(["a", "bb"], fake_embed)
+    embed = CountingEmbed()
+
+    cache = EmbeddingCache("model", tmp_path)
+    assert cache.embed_documents(["bb", "a"], embed) == fake_embed(["bb", "a"])
+    assert embed.calls == []
+    assert cache.get_stats()['disk_hits'] == 2
+
+
+def test_query_and_document_vectors_are_kept_apart(tmp_path):
+    cache = EmbeddingCache("model", tmp_path)
+    cache.embed_documents(["a"], fake_embed)
+    calls = []
+
+    cache.embed_query("a", lambda text: calls.append(text) or [9.0, 9.0, 9.0, 9.0])
+
+    assert calls == ["a"]
+
+
+def test_concurrent_writers_do_not_append_duplicate_rows(tmp_path):
+    first = EmbeddingCache("model", tmp_path)
+    second = EmbeddingCache("model", tmp_path)
+
+    first.embed_documents(["a"], fake_embed)
+    # second has not synced yet and misses, but must not append "a" again
+    second._store([text_digest("a")], [np.asarray(fake_embed(["a"])[0], dtype=np.float32)])
+
+    keys = (first.path / "keys.tsv").read_text().splitlines()
+    assert len(keys) == 1
+    assert (first.path / "vectors.f32").stat().st_size == 4 * 4
+
+
+def test_torn_append_is_dropped_before_the_next_store(tmp_path):
+    cache = EmbeddingCache("model", tmp_path)
+    cache.embed_documents(["a"], fake_embed)
+    # A writer died mid-append: half a vector row and half a key line
+    with open(cache.path / "vectors.f32", "ab") as f:
+        f.write(b"\x00" * 6)
+    with open(cache.path / "keys.tsv", "ab") as f:
+        f.write(b"deadbeef\t")
+
+    EmbeddingCache("model", tmp_path).embed_documents(["bb", "ccc"], fake_embed)
+
+    reader = EmbeddingCache("model", tmp_path)
+    embed = CountingEmbed()
+    assert reader.embed_documents(["a", "bb", "ccc"], embed) == fake_embed(["a", "bb", "ccc"])
+    assert embed.calls == []
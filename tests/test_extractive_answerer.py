@@ -0,0 +1,46 @@
+"""
+Extractive answers for spec lookups
+"""
+from langchain_core.documents import Document
+
+from src.generation.extractive_answerer import ExtractiveAnswerer
+
+
+EX1280C_TABLE = Document(
+    page_content="Maximum input level    +24 dBu\nInput impedance    10 kΩ\nFrequency response    20 Hz - 20 kHz",
+    metadata={'source': "docs/EX-1280C.pdf", 'page': 3, 'content_type': 'TABLE'}
+)
+
+
+def test_answers_spec_lookup_from_matching_table_row():
+    result = ExtractiveAnswerer().answer("What is the maximum input level of the EX-1280C in dBu?", [EX1280C_TABLE])
+
+    assert result is not None
+    assert result['value'] == "+24 dBu"
+    assert "EX-1280C" in result['answer'] and "page 3" in result['answer']
+
+
+def test_product_must_match_whole_identifier():
+    # An EX-1280C chunk must not answer a question about the EX-1280
+    assert ExtractiveAnswerer().answer("What is the maximum input level of the EX-1280 in dBu?", [EX1280C_TABLE]) is None
+
+
+def test_product_named_only_in_file_name_matches():
+    doc = Document(page_content="Maximum input level: +21 dBu", metadata={'source': "docs/EX-1280_guide.pdf", 'page': 2})
+
+    result = ExtractiveAnswerer().answer("What is the maximum input level of the EX-1280 in dBu?", [doc])
+
+    assert result is not None and result['value'] == "+21 dBu"
+
+
+def test_comparison_and_unitless_questions_use_the_llm():
+    answerer = ExtractiveAnswerer()
+
+    assert answerer.answer("Compare the input level of the EX-1280C and EX-1280 in dBu", [EX1280C_TABLE]) is None
+    assert answerer.answer("How do I mount the EX-1280C?", [EX1280C_TABLE]) is None
+
+
+def test_conflicting_values_are_ambiguous():
+    other = Document(page_content="Maximum input level    +18 dBu", metadata={'source': "docs/EX-1280C_v2.pdf", 'page': 4, 'content_type': 'TABLE'})
+
+    assert ExtractiveAnswerer().answer("What is the maximum input level of the EX-1280C in dBu?", [EX1280C_TABLE, other]) is None
@@ -0,0 +1,114 @@
+"""
+Memory-mapped dense index: exact, int8 and IVF recall against brute force
+"""
+import uuid
+
+import numpy as np
+import pytest
+
+from src.vector_store.mmap_index import MmapVectorIndex, build_index, load_index
+
+
+N_DOCS = 1200
+DIM = 32
+K = 10
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    """Clustered unit vectors in a Chroma collection, plus queries near the clusters"""
+    chromadb = pytest.importorskip("chromadb")
+    rng = np.random.default_rng(7)
+    centers = rng.normal(size=(24, DIM))
+    vectors = centers[rng.integers(0, len(centers), N_DOCS)] + 0.35 * rng.normal(size=(N_DOCS, DIM))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = centers[rng.integers(0, len(centers), 50)] + 0.35 * rng.normal(size=(50, DIM))
+
+    collection = chromadb.Client().create_collection(f"mmap-{uuid.uuid4().hex}")
+    ids = [f"chunk_{i}" for i in range(N_DOCS)]
+    collection.add(
+        ids=ids,
+        embeddings=vectors.tolist(),
+        documents=[f"text {i}" for i in range(N_DOCS)],
+        metadatas=[{'page': i % 7, 'source': "amp.pdf"} for i in range(N_DOCS)]
+    )
+    return collection, vectors.astype(np.float32), queries.astype(np.float32)
+
+
+def exact_top_k(vectors, queries, k):
+    normalized = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    return [set(np.argsort(-(vectors @ query))[:k]) for query in normalized]
+
+
+def row_of(doc_id):
+    return int(doc_id.split("_")[1])
+
+
+def recall(index, vectors, queries, k=K):
+    truth = exact_top_k(vectors, queries, k)
+    found = [{row_of(doc_id) for doc_id in hits} for hits in index.query(queries.tolist(), k)['ids']]
+    return np.mean([len(expected & got) / k for expected, got in zip(truth, found)])
+
+
+def build(corpus, tmp_path, **options):
+    collection, _, _ = corpus
+    n_probe = options.pop('n_probe', 16)
+    rerank_factor = options.pop('rerank_factor', 4)
+    build_index(collection, tmp_path / "index", "epoch:1", fetch_batch_size=500, **options)
+    return MmapVectorIndex(tmp_path / "index", n_probe=n_probe, rerank_factor=rerank_factor)
+
+
+def test_exact_float32_search_matches_brute_force(corpus, tmp_path):
+    _, vectors, queries = corpus
+    index = build(corpus, tmp_path)
+
+    assert recall(index, vectors, queries) == 1.0
+
+
+def test_int8_search_with_float32_rescoring_keeps_recall(corpus, tmp_path):
+    _, vectors, queries = corpus
+    index = build(corpus, tmp_path, quantization="int8")
+
+    assert recall(index, vectors, queries) >= 0.98
+    stats = index.memory_stats()
+    assert stats['scan_bytes_per_vector'] == DIM + 4
+    assert stats['disk_bytes_per_vector'] == DIM * 4 + DIM + 4
+
+
+def test_int8_scores_are_exact_after_rescoring(corpus, tmp_path):
+    _, vectors, queries = corpus
+    index = build(corpus, tmp_path, quantization="int8")
+    query = queries[0] / np.linalg.norm(queries[0])
+
+    for row, score in index.search([queries[0].tolist()], K)[0]:
+        assert score == pytest.approx(float(vectors[row_of(index.ids[row])] @ query), abs=1e-5)
+
+
+@pytest.mark.parametrize("quantization", ["none", "int8"])
+def test_ivf_search_recall(corpus, tmp_path, quantization):
+    _, vectors, queries = corpus
+    index = build(corpus, tmp_path, ann_threshold=100, quantization=quantization, n_probe=8)
+
+    assert index.centroids is not None
+    assert recall(index, vectors, queries) >= 0.9
+
+
+def test_results_carry_documents_metadata_and_distances(corpus, tmp_path):
+    _, vectors, _ = corpus
+    index = build(corpus, tmp_path)
+
+    results = index.query([vectors[5].tolist()], 3)
+
+    assert results['ids'][0][0] == "chunk_5"
+    assert results['documents'][0][0] == "text 5"
+    assert results['metadatas'][0][0] == {'page': 5, 'source': "amp.pdf"}
+    assert results['distances'][0][0] == pytest.approx(0.0, abs=1e-5)
+    assert index.get_documents(["chunk_5", "missing"])["chunk_5"].page_content == "text 5"
+
+
+def test_index_is_reopened_only_for_its_version_and_quantization(corpus, tmp_path):
+    build(corpus, tmp_path, quantization="int8")
+
+    assert load_index(tmp_path / "index", "epoch:1", quantization="int8") is not None
+    assert load_index(tmp_path / "index", "epoch:2", quantization="int8") is None
+    assert load_index(tmp_path / "index", "epoch:1", quantization="none") is None
@@ -0,0 +1,63 @@
+"""
+Parallel ingestion: page-range task planning and the process-pool pipeline
+(real worker processes parsing small generated PDFs, see conftest.make_pdf)
+"""
+from src.document_processing.parallel_ingest import ParallelIngestionPipeline, plan_tasks
+from src.document_processing.router import ProcessingRouter
+from src.vector_store.chromadb_manager import chunk_id
+
+
+MANUAL = ["Amplifier output power is 120 W per channel.",
+          "Speaker impedance is 8 ohm nominal.",
+          "Mount the pendant speaker to the ceiling grid."]
+
+
+def test_long_pdfs_are_split_into_page_ranges(make_pdf, tmp_path):
+    manual = make_pdf(MANUAL, "manual.pdf")
+    leaflet = make_pdf(["Input level +24 dBu."], "leaflet.pdf")
+    missing = str(tmp_path / "missing.pdf")
+
+    assert plan_tasks([manual, leaflet, missing], 2) == [
+        (manual, (1, 2)), (manual, (3, 3)), (leaflet, None), (missing, None)
+    ]
+    assert plan_tasks([manual], 3) == [(manual, None)]
+    assert plan_tasks([manual], 0) == [(manual, None)]
+
+
+def test_parallel_ingest_stores_the_same_chunks_as_sequential(vector_store, make_pdf):
+    manual = make_pdf(MANUAL, "manual.pdf")
+    leaflet = make_pdf(["Input level +24 dBu."], "leaflet.pdf")
+    router = ProcessingRouter()
+    expected = {chunk_id(chunk) for path in (manual, leaflet) for chunk in router.process_pdf(path)}
+
+    stats = ParallelIngestionPipeline(vector_store, max_workers=2, pages_per_task=1, write_batch_size=2).run(
+        [manual, leaflet]
+    )
+
+    assert stats['documents_processed'] == 2
+    assert stats['documents_failed'] == 0
+    assert stats['chunk_counts'] == {manual: 3, leaflet: 1}
+    assert stats['chunks_added'] == stats['total_chunks'] == 4
+    assert set(stats['ids']) == expected
+    assert [chunk_id(chunk) for chunk in stats['documents']] == stats['ids']
+    assert set(vector_store.collection.get()['ids']) == expected
+    assert stats['removed_ids'] == []
+
+
+def test_parallel_reingest_replaces_the_chunks_of_a_changed_file(vector_store, make_pdf):
+    pipeline = ParallelIngestionPipeline(vector_store, max_workers=2, pages_per_task=1)
+    manual = make_pdf(MANUAL, "manual.pdf")
+    leaflet = make_pdf(["Input level +24 dBu."], "leaflet.pdf")
+    first = pipeline.run([manual, leaflet])
+
+    make_pdf([MANUAL[0].replace("120", "240"), MANUAL[1]], "manual.pdf")
+    second = pipeline.run([manual])
+
+    assert second['chunks_added'] == 1
+    assert second['chunks_skipped'] == 1
+    assert len(second['removed_ids']) == 2
+    stored = vector_store.collection.get(include=['documents'])
+    assert set(stored['ids']) == set(first['ids']) - set(second['removed_ids']) | set(second['ids'])
+    assert sorted(stored['documents']) == sorted([
+        "Amplifier output power is 240 W per channel.", MANUAL[1], "Input level +24 dBu."
+    ])
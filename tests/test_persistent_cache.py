@@ -0,0 +1,46 @@
+"""
+Persistent answer cache (SQLite) and its use as the second QueryCache tier
+"""
+import time
+
+from src.retrieval.persistent_cache import PersistentAnswerCache
+from src.retrieval.query_cache import QueryCache
+
+
+def test_results_survive_a_new_connection(tmp_path):
+    store = PersistentAnswerCache(tmp_path / "answers.sqlite3")
+    store.set("key", "output power?", {'answer': "120 W"})
+    store.close()
+
+    assert PersistentAnswerCache(tmp_path / "answers.sqlite3").get("key") == {'answer': "120 W"}
+
+
+def test_expired_entries_are_not_served(tmp_path):
+    store = PersistentAnswerCache(tmp_path / "answers.sqlite3", ttl_seconds=1)
+    store.set("key", "output power?", {'answer': "120 W"})
+    store._conn.execute("UPDATE answers SET created = ?", (time.time() - 5,))
+
+    assert store.get("key") is None
+
+
+def test_least_recently_used_rows_are_evicted_beyond_max_entries(tmp_path):
+    store = PersistentAnswerCache(tmp_path / "answers.sqlite3", max_entries=3)
+    store.EVICTION_INTERVAL = 1
+    for i in range(5):
+        store.set(f"key{i}", f"q{i}", {'answer': i})
+        store._conn.execute("UPDATE answers SET accessed = ? WHERE key = ?", (i, f"key{i}"))
+
+    assert store.get_stats()['entries'] == 3
+    assert store.get("key0") is None
+    assert store.get("key4") == {'answer': 4}
+
+
+def test_query_cache_falls_through_to_the_store_across_instances(tmp_path):
+    writer = QueryCache(store=PersistentAnswerCache(tmp_path / "answers.sqlite3"))
+    writer.set("What is the output power?", {'answer': "120 W"}, context={'version': 1})
+
+    reader = QueryCache(store=PersistentAnswerCache(tmp_path / "answers.sqlite3"))
+
+    assert reader.get("What is the output power?", {'version': 1}) == {'answer': "120 W"}
+    assert reader.get("What is the output power?", {'version': 2}) is None
+    assert reader.get_stats()['persistent_hits'] == 1
@@ -0,0 +1,97 @@
+"""
+Answer cache: exact tier, semantic tier (threshold and key-term guard), validator
+"""
+import math
+
+import pytest
+
+from src.retrieval.query_cache import QueryCache
+
+
+def at_angle(degrees):
+    """Unit vector whose cosine similarity to at_angle(0) is cos(degrees)"""
+    radians = math.radians(degrees)
+    return [math.cos(radians), math.sin(radians)]
+
+
+@pytest.fixture
+def cache():
+    return QueryCache(max_size=10, ttl_seconds=3600, similarity_threshold=0.9, near_hit_margin=0.05)
+
+
+def test_exact_hit_and_context_separation(cache):
+    cache.set("What is the output power?", {'answer': "120 W"}, context={'version': 1})
+
+    assert cache.get("What is the output power?", {'version': 1})['answer'] == "120 W"
+    assert cache.get("What is the output power?", {'version': 2}) is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = QueryCache(max_size=2)
+    cache.set("first", {'answer': "1"})
+    cache.set("second", {'answer': "2"})
+    cache.get("first")
+    cache.set("third", {'answer': "3"})
+
+    assert cache.get("second") is None
+    assert cache.get("first")['answer'] == "1"
+    assert cache.get_stats()['evictions'] == 1
+
+
+def test_paraphrase_above_threshold_is_a_semantic_hit(cache):
+    cache.set("What is the output power of the EX-1280?", {'answer': "1200 W"}, query_embedding=at_angle(0))
+
+    # cos(20 degrees) = 0.94 >= 0.9
+    result = cache.get_similar("How much power does the EX-1280 deliver?", at_angle(20))
+
+    assert result['answer'] == "1200 W"
+    assert result['query'] == "How much power does the EX-1280 deliver?"
+    assert result['semantic_match']['query'] == "What is the output power of the EX-1280?"
+    assert cache.get_stats()['semantic_hits'] == 1
+
+
+def test_match_below_threshold_is_a_near_hit_not_a_hit(cache):
+    cache.set("What is the output power of the EX-1280?", {'answer': "1200 W"}, query_embedding=at_angle(0))
+
+    # cos(28 degrees) = 0.88: below 0.9 but within the 0.05 near-hit margin
+    assert cache.get_similar("How much power does the EX-1280 deliver?", at_angle(28)) is None
+    # cos(60 degrees) = 0.5: not even near
+    assert cache.get_similar("Is the EX-1280 rack mountable?", at_angle(60)) is None
+    assert cache.get_stats()['near_hits'] == 1
+    assert cache.get_stats()['semantic_hits'] == 0
+
+
+def test_different_model_numbers_never_match(cache):
+    cache.set("What is the output power of the EX-1280?", {'answer': "1200 W"}, query_embedding=at_angle(0))
+
+    # Identical embedding, but EX-1280C is a different product
+    assert cache.get_similar("What is the output power of the EX-1280C?", at_angle(0)) is None
+    assert cache.get_similar("What is the output power of the EX-1280", at_angle(0))['answer'] == "1200 W"
+
+
+def test_different_values_never_match(cache):
+    cache.set("Which amplifier drives 70V lines?", {'answer': "EX-640"}, query_embedding=at_angle(0))
+
+    assert cache.get_similar("Which amplifier drives 100V lines?", at_angle(0)) is None
+
+
+def test_semantic_tier_is_off_without_a_threshold():
+    cache = QueryCache(max_size=10)
+    cache.set("What is the output power?", {'answer': "120 W"}, query_embedding=at_angle(0))
+
+    assert cache.get_similar("What is the output power", at_angle(0)) is None
+
+
+def test_validator_rejections_are_dropped_from_every_lookup():
+    stale_sources = set()
+    cache = QueryCache(
+        max_size=10,
+        similarity_threshold=0.9,
+        validator=lambda result: result['source'] not in stale_sources
+    )
+    cache.set("output power", {'answer': "120 W", 'source': "amp.pdf"}, query_embedding=at_angle(0))
+    stale_sources.add("amp.pdf")
+
+    assert cache.get_similar("output power?", at_angle(0)) is None
+    assert cache.get("output power") is None
+    assert cache.get_stats()['invalidations'] == 1
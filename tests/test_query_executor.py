@@ -0,0 +1,112 @@
+"""
+Admission control in QueryExecutor: worker limit, queue bound, rejection
+"""
+import asyncio
+import threading
+
+import pytest
+
+from src.interfaces.query_executor import QueryExecutor, QueueFullError
+
+
+async def until(condition, timeout=5.0):
+    """Yield to the loop until condition() holds"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def executor():
+    executor = QueryExecutor(max_concurrent=1, max_queue=1)
+    yield executor
+    executor.shutdown()
+
+
+def test_calls_beyond_the_queue_bound_are_rejected(executor):
+    release = threading.Event()
+    running = []
+
+    def blocking(name):
+        running.append(name)
+        release.wait(5)
+        return name
+
+    async def scenario():
+        first = asyncio.ensure_future(executor.run(blocking, "first"))
+        await until(lambda: executor.get_stats()['active'] == 1)
+        second = asyncio.ensure_future(executor.run(blocking, "second"))
+        await until(lambda: executor.get_stats()['queue_depth'] == 1)
+
+        with pytest.raises(QueueFullError):
+            await executor.run(blocking, "third")
+        # Only one worker: the queued call has not started
+        assert running == ["first"]
+
+        release.set()
+        return await asyncio.gather(first, second)
+
+    assert asyncio.run(scenario()) == ["first", "second"]
+    stats = executor.get_stats()
+    assert stats['completed'] == 2
+    assert stats['rejected'] == 1
+    assert stats['max_queue_depth_seen'] == 1
+    assert stats['active'] == 0 and stats['queue_depth'] == 0
+
+
+def test_zero_queue_only_rejects_while_busy():
+    executor = QueryExecutor(max_concurrent=1, max_queue=0)
+    release = threading.Event()
+
+    async def scenario():
+        assert await executor.run(lambda: "idle") == "idle"
+        busy = asyncio.ensure_future(executor.run(release.wait, 5))
+        await until(lambda: executor.get_stats()['active'] == 1)
+        with pytest.raises(QueueFullError):
+            await executor.run(lambda: "busy")
+        release.set()
+        await busy
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+    assert executor.get_stats()['rejected'] == 1
+
+
+def test_stream_holds_its_slot_until_the_iterator_is_exhausted():
+    executor = QueryExecutor(max_concurrent=1, max_queue=0)
+
+    async def scenario():
+        items = []
+        async for item in executor.stream(lambda: iter([1, 2, 3])):
+            items.append(item)
+            if item == 1:
+                with pytest.raises(QueueFullError):
+                    await executor.run(lambda: None)
+        # Slot released afterwards
+        assert await executor.run(lambda: "after") == "after"
+        return items
+
+    try:
+        assert asyncio.run(scenario()) == [1, 2, 3]
+    finally:
+        executor.shutdown()
+
+
+def test_failures_propagate_and_free_the_slot(executor):
+    def fail():
+        raise ValueError("boom")
+
+    async def scenario():
+        with pytest.raises(ValueError):
+            await executor.run(fail)
+        return await executor.run(lambda: "ok")
+
+    assert asyncio.run(scenario()) == "ok"
+    stats = executor.get_stats()
+    assert stats['failed'] == 1
+    assert stats['completed'] == 1
+    assert stats['active'] == 0
@@ -0,0 +1,112 @@
+"""
+Cross-encoder re-ranking: ordering, score cache, latency budget fallback
+"""
+import time
+
+import pytest
+from langchain_core.documents import Document
+
+from src.retrieval.reranker import CrossEncoderReranker
+
+
+class FakeCrossEncoder:
+    """Scores a pair by the number of query words in the chunk; optional delay per batch"""
+
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.pairs = []
+
+    def predict(self, pairs, batch_size, show_progress_bar):
+        self.pairs.extend(pairs)
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("model crashed")
+        return [len(set(query.lower().split()) & set(text.lower().split())) for query, text in pairs]
+
+
+def make_reranker(monkeypatch, model, **options):
+    monkeypatch.setattr(CrossEncoderReranker, "_load_model", staticmethod(lambda *args: model))
+    return CrossEncoderReranker("fake-cross-encoder", **options)
+
+
+FUSED = [
+    Document(page_content="warranty terms and conditions", metadata={'doc_id': "w"}),
+    Document(page_content="weight of the amplifier", metadata={'doc_id': "x"}),
+    Document(page_content="output power of the amplifier in watts", metadata={'doc_id': "p"}),
+    Document(page_content="rack ears", metadata={'doc_id': "r"}),
+]
+QUERY = "output power amplifier watts"
+
+
+def test_candidates_are_reordered_by_cross_encoder_score(monkeypatch):
+    reranker = make_reranker(monkeypatch, FakeCrossEncoder(), batch_size=2)
+
+    ranked = reranker.rerank(QUERY, FUSED, k=2)
+
+    assert [doc.metadata['doc_id'] for doc in ranked] == ["p", "x"]
+    assert ranked[0].metadata['fused_rank'] == 3
+    assert ranked[0].metadata['rerank_score'] == 4
+    assert reranker.get_stats()['reranked'] == 1
+
+
+def test_only_max_candidates_are_scored_and_the_rest_keep_fused_order(monkeypatch):
+    model = FakeCrossEncoder()
+    reranker = make_reranker(monkeypatch, model, max_candidates=2)
+
+    ranked = reranker.rerank(QUERY, FUSED, k=4)
+
+    assert len(model.pairs) == 2
+    assert [doc.metadata['doc_id'] for doc in ranked] == ["x", "w", "p", "r"]
+
+
+def test_pair_scores_are_cached(monkeypatch):
+    model = FakeCrossEncoder()
+    reranker = make_reranker(monkeypatch, model)
+
+    first = reranker.rerank(QUERY, FUSED, k=3)
+    second = reranker.rerank("  Output power AMPLIFIER watts ", FUSED, k=3)
+
+    assert len(model.pairs) == len(FUSED)
+    assert [doc.metadata['doc_id'] for doc in second] == [doc.metadata['doc_id'] for doc in first]
+    assert reranker.get_stats()['cache_hits'] == len(FUSED)
+
+
+def test_over_budget_keeps_fused_order_and_marks_it_provisional(monkeypatch):
+    # Each batch of one pair takes 30ms against a 10ms budget
+    reranker = make_reranker(monkeypatch, FakeCrossEncoder(delay=0.03), batch_size=1, latency_budget_ms=10)
+
+    ranked = reranker.rerank(QUERY, FUSED, k=3)
+
+    assert [doc.metadata['doc_id'] for doc in ranked] == ["w", "x", "p"]
+    assert all(doc.metadata['rerank_skipped'] for doc in ranked)
+    assert 'rerank_score' not in ranked[0].metadata
+    assert reranker.get_stats()['budget_exceeded'] == 1
+
+
+def test_budget_fallback_stops_scoring_early(monkeypatch):
+    model = FakeCrossEncoder(delay=0.03)
+    reranker = make_reranker(monkeypatch, model, batch_size=1, latency_budget_ms=10)
+
+    reranker.rerank(QUERY, FUSED, k=3)
+
+    # The first batch always runs; later ones are skipped once over budget
+    assert len(model.pairs) == 1
+
+
+def test_model_errors_fall_back_to_fused_order(monkeypatch):
+    reranker = make_reranker(monkeypatch, FakeCrossEncoder(fail=True))
+
+    ranked = reranker.rerank(QUERY, FUSED, k=2)
+
+    assert [doc.metadata['doc_id'] for doc in ranked] == ["w", "x"]
+    assert reranker.get_stats()['errors'] == 1
+
+
+@pytest.mark.parametrize("documents", [[], FUSED[:1]])
+def test_nothing_to_reorder(monkeypatch, documents):
+    model = FakeCrossEncoder()
+    reranker = make_reranker(monkeypatch, model)
+
+    assert reranker.rerank(QUERY, documents, k=3) == documents
+    assert model.pairs == []
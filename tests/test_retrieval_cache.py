@@ -0,0 +1,51 @@
+"""
+Retrieval cache: keys, LRU, provisional rankings
+"""
+from langchain_core.documents import Document
+
+from src.retrieval.retrieval_cache import RetrievalCache
+
+
+def ranked(*doc_ids, **extra):
+    return [
+        Document(page_content=doc_id, metadata={'doc_id': doc_id, 'hybrid_score': 1.0 / (i + 1), 'page': 3, **extra})
+        for i, doc_id in enumerate(doc_ids)
+    ]
+
+
+def test_key_normalizes_the_query_and_includes_version_and_settings():
+    key = RetrievalCache.make_key("What is  the Output power?", 5, 0.5, "epoch:1")
+
+    assert key == RetrievalCache.make_key("what is the output power?", 5, 0.5, "epoch:1")
+    assert key != RetrievalCache.make_key("what is the output power?", 5, 0.5, "epoch:2")
+    assert key != RetrievalCache.make_key("what is the output power?", 10, 0.5, "epoch:1")
+    assert key != RetrievalCache.make_key("what is the output power?", 5, 0.7, "epoch:1")
+    assert key != RetrievalCache.make_key("what is the output power?", 5, 0.5, "epoch:1", reranker="ce")
+
+
+def test_only_ids_and_scores_are_stored():
+    cache = RetrievalCache()
+
+    assert cache.set("key", ranked("a", "b"))
+    assert cache.get("key") == [("a", {'hybrid_score': 1.0}), ("b", {'hybrid_score': 0.5})]
+
+
+def test_provisional_or_unidentified_rankings_are_not_cached():
+    cache = RetrievalCache()
+
+    assert not cache.set("skipped", ranked("a", rerank_skipped=True))
+    assert not cache.set("no-id", [Document(page_content="x", metadata={})])
+    assert cache.get("skipped") is None
+    assert cache.get("no-id") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = RetrievalCache(max_size=2)
+    cache.set("first", ranked("a"))
+    cache.set("second", ranked("b"))
+    cache.get("first")
+    cache.set("third", ranked("c"))
+
+    assert cache.get("second") is None
+    assert cache.get("first") is not None
+    assert cache.get_stats()['evictions'] == 1
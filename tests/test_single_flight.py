@@ -0,0 +1,59 @@
+"""
+Single-flight: concurrent identical calls share one computation
+"""
+import threading
+
+import pytest
+
+from src.interfaces.single_flight import SingleFlight
+
+
+def test_followers_receive_the_leaders_result():
+    flight = SingleFlight()
+    leader_call, is_leader = flight.begin("q")
+    results = []
+    followers = []
+    for _ in range(3):
+        call, follower_is_leader = flight.begin("q")
+        assert not follower_is_leader
+        followers.append(threading.Thread(target=lambda call=call: results.append(flight.wait(call, timeout=5))))
+    for thread in followers:
+        thread.start()
+
+    flight.finish("q", leader_call, result={'answer': "120 W"})
+    for thread in followers:
+        thread.join()
+
+    assert is_leader
+    assert results == [{'answer': "120 W"}] * 3
+    assert flight.get_stats() == {'leaders': 1, 'coalesced': 3, 'in_flight': 0}
+
+
+def test_followers_receive_the_leaders_error():
+    flight = SingleFlight()
+    leader_call, _ = flight.begin("q")
+    call, _ = flight.begin("q")
+
+    flight.finish("q", leader_call, error=RuntimeError("generation failed"))
+
+    with pytest.raises(RuntimeError, match="generation failed"):
+        flight.wait(call)
+
+
+def test_nothing_is_retained_after_finish():
+    flight = SingleFlight()
+    call, _ = flight.begin("q")
+    flight.finish("q", call, result=1)
+
+    _, is_leader = flight.begin("q")
+
+    assert is_leader
+
+
+def test_wait_times_out_if_the_leader_never_finishes():
+    flight = SingleFlight()
+    flight.begin("q")
+    call, _ = flight.begin("q")
+
+    with pytest.raises(TimeoutError):
+        flight.wait(call, timeout=0.01)
@@ -0,0 +1,87 @@
+"""
+Spec table normalization for the different table shapes
+"""
+from src.retrieval.spec_store import SpecTableStore, spec_rows_from_table
+
+
+def values(rows):
+    return {(row['product'], row['attribute'], row['value']) for row in rows}
+
+
+def test_product_per_column_table():
+    cells = [
+        ["", "DM8SE", "DM6PE"],
+        ["Sensitivity", "89 dB", "87 dB"],
+        ["Nominal impedance", "8 Ω", "8 Ω"],
+    ]
+
+    rows = spec_rows_from_table(cells, "docs/DesignMax_guide.pdf", page=3, table_index=1)
+
+    assert values(rows) == {
+        ("dm8se", "sensitivity", "89 dB"), ("dm6pe", "sensitivity", "87 dB"),
+        ("dm8se", "nominal impedance", "8 Ω"), ("dm6pe", "nominal impedance", "8 Ω"),
+    }
+    assert all(row['page'] == 3 and row['table_index'] == 1 for row in rows)
+
+
+def test_product_per_row_table_is_transposed():
+    cells = [
+        ["Model", "Net weight", "Dimensions"],
+        ["DM8SE", "2.1 kg", "320 x 220 mm"],
+        ["DM6PE", "1.6 kg", "280 x 190 mm"],
+    ]
+
+    rows = spec_rows_from_table(cells, "docs/DesignMax_guide.pdf", page=5)
+
+    assert values(rows) == {
+        ("dm8se", "net weight", "2.1 kg"), ("dm8se", "dimensions", "320 x 220 mm"),
+        ("dm6pe", "net weight", "1.6 kg"), ("dm6pe", "dimensions", "280 x 190 mm"),
+    }
+    weight = next(row for row in rows if row['product'] == "dm6pe" and row['attribute'] == "net weight")
+    assert (weight['value_num'], weight['unit']) == (1.6, "kg")
+
+
+def test_attribute_value_table_uses_the_single_product_in_the_file_name():
+    cells = [["Frequency response", "20 Hz - 20 kHz"], ["Latency", "0.8 ms"]]
+
+    rows = spec_rows_from_table(cells, "docs/EX-1280C_guide.pdf", page=2)
+
+    assert values(rows) == {("ex1280c", "frequency response", "20 Hz - 20 kHz"), ("ex1280c", "latency", "0.8 ms")}
+
+
+def test_attribute_value_table_with_ambiguous_product_is_skipped():
+    cells = [["Frequency response", "20 Hz - 20 kHz"], ["Latency", "0.8 ms"]]
+
+    assert spec_rows_from_table(cells, "docs/PM8500_EX-1280C_guide.pdf", page=2) == []
+    assert spec_rows_from_table(cells + [["Compatible with", "PM8500"]], "docs/EX-1280C_guide.pdf", page=2) == []
+
+
+def test_store_answers_from_transposed_rows(tmp_path):
+    cells = [
+        ["Model", "Net weight"],
+        ["DM8SE", "2.1 kg"],
+        ["DM6PE", "1.6 kg"],
+    ]
+    store = SpecTableStore(tmp_path / "specs.sqlite3")
+    try:
+        store.add_rows(spec_rows_from_table(cells, "docs/DesignMax_guide.pdf", page=5))
+
+        found = store.answer("What is the net weight of the DM6PE?")
+
+        assert found is not None
+        assert "1.6 kg" in found['answer'] and "2.1 kg" not in found['answer']
+    finally:
+        store.close()
+
+
+def test_store_answers_only_the_exact_product(tmp_path):
+    cells = [["Maximum input level", "+24 dBu"]]
+    store = SpecTableStore(tmp_path / "specs.sqlite3")
+    try:
+        store.add_rows(spec_rows_from_table(cells, "docs/EX-1280C.pdf", page=3))
+
+        assert store.answer("What is the maximum input level of the EX-1280?") is None
+        assert "+24 dBu" in store.answer("What is the maximum input level of the EX-1280C?")['answer']
+        assert len(store.lookup("EX-1280", prefix=True)) == 1
+    finally:
+        store.close()
@@ -0,0 +1,120 @@
+"""
+Token streaming from Ollama through the RAG pipeline and the SSE endpoint
+(against a local fake Ollama server, see conftest.fake_ollama)
+"""
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+from langchain_core.documents import Document
+
+from config.settings import config
+from conftest import parse_sse
+from src.generation.llm_handler_phi import Phi2Handler
+from src.retrieval.query_cache import QueryCache
+
+
+TRUNCATED_STREAM = [{'response': "Partial", 'done': False}, None]
+
+
+def test_generate_stream_parses_ndjson_fragments(fake_ollama):
+    llm = Phi2Handler()
+
+    assert list(llm.generate_stream("prompt", template="specification")) == ["Hello", " world"]
+    assert fake_ollama.requests[-1]['stream'] is True
+    assert llm.get_prompt_stats()['specification']['requests'] == 1
+
+
+def test_generate_stream_falls_back_to_blocking_call_before_first_token(fake_ollama):
+    fake_ollama.stream_lines = [{'error': "model is loading"}]
+
+    assert list(Phi2Handler().generate_stream("prompt")) == ["Blocking answer"]
+
+
+@pytest.mark.parametrize("failure", [None, {'error': "out of memory"}])
+def test_generate_stream_raises_after_first_token(fake_ollama, failure):
+    fake_ollama.stream_lines = [{'response': "Partial", 'done': False}, failure]
+    fragments = []
+
+    with pytest.raises(RuntimeError):
+        for text in Phi2Handler().generate_stream("prompt"):
+            fragments.append(text)
+    assert fragments == ["Partial"]
+
+
+@pytest.fixture
+def rag(fake_ollama, monkeypatch):
+    """RAG system with the real LLM handler and answer cache; retrieval is stubbed"""
+    rag_phi = pytest.importorskip("src.interfaces.rag_phi")
+    monkeypatch.setattr(config, "ENABLE_QUERY_CACHE", True)
+    monkeypatch.setattr(config, "ENABLE_CONFIDENCE_SCORING", False)
+    monkeypatch.setattr(config, "ENABLE_REQUEST_COALESCING", False)
+
+    rag = rag_phi.BoseRAGPhi.__new__(rag_phi.BoseRAGPhi)
+    rag.llm = Phi2Handler()
+    rag.cache = QueryCache(max_size=10, ttl_seconds=3600, enable_cache=True)
+    rag.metrics = MagicMock()
+    rag.vector_store = MagicMock()
+    rag.vector_store.version.version = 1
+    rag.vector_store.version.epoch = "epoch"
+    rag.vector_store.version.key = "epoch:1"
+    rag.generation_slots = threading.BoundedSemaphore(1)
+    rag.prompt_builder = MagicMock()
+    rag.prompt_builder.template_name.return_value = "specification"
+    rag.retriever = MagicMock()
+
+    doc = Document(page_content="Output power 120 W", metadata={'source': "amp.pdf", 'page': 2})
+    rag._prepare_answer = lambda query, start_time, component_times, verbose=False: (
+        None, ([doc], "prompt", [0.9], None)
+    )
+    return rag
+
+
+def test_streamed_answer_is_finalized_and_cached(rag):
+    events = list(rag.answer_query_stream("What is the output power?"))
+
+    assert [event['event'] for event in events] == ['sources', 'token', 'token', 'done']
+    assert events[-1]['data']['status'] == 'success'
+    assert events[-1]['data']['answer'] == "Hello world"
+    assert rag.cache.get("What is the output power?", rag.cache_context())['answer'] == "Hello world"
+
+
+def test_mid_stream_failure_ends_with_error_and_is_not_cached(rag, fake_ollama):
+    fake_ollama.stream_lines = TRUNCATED_STREAM
+
+    events = list(rag.answer_query_stream("What is the output power?"))
+
+    assert [event['event'] for event in events] == ['sources', 'token', 'done']
+    assert events[-1]['data']['status'] == 'error'
+    assert rag.cache.get("What is the output power?", rag.cache_context()) is None
+
+
+@pytest.fixture
+def client(rag, monkeypatch):
+    pytest.importorskip("fastapi")
+    from fastapi.testclient import TestClient
+    import app as app_module
+
+    monkeypatch.setattr(app_module, "rag", rag)
+    return TestClient(app_module.app)
+
+
+def test_sse_endpoint_streams_sources_tokens_and_done(client):
+    response = client.post("/api/query/stream", json={'question': "What is the output power?"})
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    assert [name for name, _ in events] == ['sources', 'token', 'token', 'done']
+    assert events[0][1]['sources'][0]['page'] == 2
+    assert "".join(data['text'] for name, data in events if name == 'token') == "Hello world"
+    assert events[-1][1]['answer'] == "Hello world"
+
+
+def test_sse_endpoint_reports_mid_stream_failure(client, fake_ollama):
+    fake_ollama.stream_lines = TRUNCATED_STREAM
+
+    events = parse_sse(client.post("/api/query/stream", json={'question': "What is the output power?"}).text)
+
+    assert events[-1][0] == 'done'
+    assert events[-1][1]['status'] == 'error'
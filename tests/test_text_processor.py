@@ -0,0 +1,28 @@
+"""
+Text extraction: whole-file and page-range ingest must agree
+"""
+from src.document_processing.text_processor import TextProcessor
+from src.vector_store.chromadb_manager import chunk_id
+
+
+PAGES = ["Output power 120 W RMS", "Frequency response 40 Hz - 20 kHz", "Maximum input level +24 dBu"]
+
+
+def test_page_range_reads_only_the_requested_pages(make_pdf):
+    chunks = TextProcessor().process(make_pdf(PAGES), pages=(2, 3))
+
+    assert [chunk.metadata['page'] for chunk in chunks] == [1, 2]
+    assert "40 Hz" in chunks[0].page_content
+    assert "+24 dBu" in chunks[1].page_content
+
+
+def test_page_ranges_produce_the_same_chunks_as_the_whole_file(make_pdf):
+    path = make_pdf(PAGES)
+    processor = TextProcessor()
+
+    whole = processor.process(path)
+    ranged = processor.process(path, pages=(1, 2)) + processor.process(path, pages=(3, 5))
+
+    assert [chunk.page_content for chunk in ranged] == [chunk.page_content for chunk in whole]
+    assert [chunk.metadata for chunk in ranged] == [chunk.metadata for chunk in whole]
+    assert [chunk_id(chunk) for chunk in ranged] == [chunk_id(chunk) for chunk in whole]